@@ -1,30 +1,33 @@
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import AsyncSession
+from jose import JWTError
 from passlib.context import CryptContext
 
-from app.core.security import get_password_hash , authenticate_user , oauth2_scheme , verify_password , create_access_token
-from app.db.db import get_db
+from app.core.cache import principal_cache
+from app.core.instrumentation import InstrumentedAPIRoute
+from app.core.revocation import token_revocations
+from app.core.security import get_password_hash_async , oauth2_scheme , verify_and_update_password_async , create_access_token , decode_access_token
+from app.db.db import get_async_db
+from app.db.statements import USER_BY_EMAIL, USER_BY_ID
 from app.schema.user_schema import LoginRequest, RegisterRequest, TokenResponse, UserOut, UserShort
 from app.models.User import User
 
-router = APIRouter(prefix="/auth", tags=["Authentication"])
+router = APIRouter(prefix="/auth", tags=["Authentication"], route_class=InstrumentedAPIRoute)
 
-SECRET_KEY = "CHANGE_ME_IN_PRODUCTION"
-ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 8 
 
 
 
 
-def get_current_user(
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -32,16 +35,27 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
+    # In-process Bloom filter first; only a possible match costs a Redis round trip.
+    if await token_revocations.is_revoked(payload.get("jti")):
+        raise credentials_exception
+
+    # Cache hits never touch the session, so no pool checkout happens either.
+    cached = await principal_cache.get(user_id, payload.get("ver"))
+    if cached is not None:
+        return cached
 
-    user = db.query(User).filter(User.id == user_id, User.is_deleted == False).first()
+    started = time.perf_counter()
+    user = await db.scalar(USER_BY_ID, {"id": user_id})
+    principal_cache.record_db_lookup(time.perf_counter() - started)
     if user is None or not user.is_active:
         raise credentials_exception
+    await principal_cache.set(user)
     return user
 
 
@@ -50,16 +64,16 @@ def get_current_user(
 # ---------------------------------------------------------------------------
 
 @router.post("/register", response_model=UserOut, summary="Register")
-def register(payload: RegisterRequest, db: Session = Depends(get_db)):
+async def register(payload: RegisterRequest, db: AsyncSession = Depends(get_async_db)):
 
-    existing_user = db.query(User).filter(User.email == payload.email).first()
+    existing_user = await db.scalar(USER_BY_EMAIL, {"email": payload.email})
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
     new_user = User(
         name=payload.name,
         email=payload.email,
-        password_hash=get_password_hash(payload.password),
+        password_hash=await get_password_hash_async(payload.password),
         role=payload.role,
         phone=payload.phone,
         is_active=True,
@@ -70,8 +84,8 @@ def register(payload: RegisterRequest, db: Session = Depends(get_db)):
     )
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
 
     return new_user
 
@@ -81,9 +95,9 @@ LOCK_TIME_MINUTES = 15
 
 
 @router.post("/login", response_model=TokenResponse, summary="Login")
-def login(payload: LoginRequest, db: Session = Depends(get_db)):
+async def login(payload: LoginRequest, db: AsyncSession = Depends(get_async_db)):
 
-    user = db.query(User).filter(User.email == payload.email).first()
+    user = await db.scalar(USER_BY_EMAIL, {"email": payload.email})
 
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
@@ -96,7 +110,8 @@ def login(payload: LoginRequest, db: Session = Depends(get_db)):
         )
 
     # Check password
-    if not verify_password(payload.password, user.password_hash):
+    verified, new_hash = await verify_and_update_password_async(payload.password, user.password_hash)
+    if not verified:
         user.failed_login_attempts += 1
 
         # Lock account if too many attempts
@@ -104,21 +119,25 @@ def login(payload: LoginRequest, db: Session = Depends(get_db)):
             user.locked_until = datetime.utcnow() + timedelta(minutes=LOCK_TIME_MINUTES)
             user.failed_login_attempts = 0
 
-        db.commit()
+        await db.commit()
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     # Check if inactive
     if not user.is_active:
         raise HTTPException(status_code=403, detail="Account deactivated")
 
-    # Successful login
+    # Successful login; transparently rehash if the Argon2 parameters changed
+    if new_hash:
+        user.password_hash = new_hash
     user.failed_login_attempts = 0
     user.locked_until = None
     user.last_login = datetime.utcnow()
-    db.commit()
+    await db.commit()
+    # Reload server-set columns now; lazy refresh is not available on AsyncSession.
+    await db.refresh(user)
 
     token = create_access_token(
-        {"sub": str(user.id), "role": user.role.value},
+        {"sub": str(user.id), "role": user.role.value, "ver": user.version},
         timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
     )
 
@@ -129,15 +148,18 @@ def login(payload: LoginRequest, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=UserOut, summary="Current user")
-def current_user(user: User = Depends(get_current_user)):
+async def current_user(user: User = Depends(get_current_user)):
     """Return the currently authenticated user's profile."""
     return user
 
 
 @router.post("/logout", summary="Logout")
-def logout():
+async def logout(token: str = Depends(oauth2_scheme), user: User = Depends(get_current_user)):
     """
-    Client-side logout – invalidate the token on the client.
-    For server-side invalidation, implement a token blacklist.
+    Revoke the presented token on every worker until it would have expired.
+    Tokens issued before ``jti`` claims existed cannot be revoked and run out instead.
     """
+    payload = decode_access_token(token)
+    if payload.get("jti") is not None:
+        await token_revocations.revoke(payload["jti"], payload["exp"])
     return {"message": "Logged out successfully"}
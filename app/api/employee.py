@@ -6,153 +6,345 @@ from uuid import UUID
 from typing import List, Optional
 from datetime import date
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-
-from app.db.db import get_db
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, joinedload, selectinload
+
+from app.db.db import get_async_db
+from app.db.statements import live_by_id, live_id
 from app.api.auth import get_current_user
+from app.core.cache import department_cache
+from app.core.config import settings
+from app.core.expand import expand_options
+from app.core.instrumentation import InstrumentedAPIRoute
+from app.core.etag import (
+    check_collection_not_modified, check_not_modified, if_match_versions, raise_update_miss, set_etag,
+    versioned_update,
+)
+from app.core.pagination import paginate
+from app.core.responses import ORJSONResponse
+from app.services.attendance import (
+    SUMMARY_GROUPS, SUMMARY_PERIODS, iter_bulk_rows, stream_summary, summary_statement,
+    update_attendance_record, write_attendance_batch,
+)
+from app.services import hierarchy
+from app.services.export import (
+    ATTENDANCE_EXPORT_COLUMNS, EMPLOYEE_EXPORT_COLUMNS, EXPORT_FORMATS, stream_export,
+)
+from app.services.attendance_rollup import RollupDelta
+from app.services.queries import (
+    ATTENDANCE_ROWS, DEPARTMENT_ROWS, EMPLOYEE_ROWS, LEAVE_ROWS,
+    filter_attendance, filter_employees, filter_leave_requests,
+)
+from app.services.leave import (
+    ACTIVE_LEAVE_STATUSES, LeaveOverlap, LeaveTransitionError, is_overlap_violation,
+    transition_leave_request,
+)
+from app.services.shift_rules import ShiftPolicy
 from app.schema.employee_schema import (
-    DepartmentCreate, DepartmentUpdate, DepartmentOut,
-    EmployeeCreate, EmployeeUpdate, EmployeeOut,
-    AttendanceCreate, AttendanceUpdate, AttendanceOut,
-    LeaveRequestCreate, LeaveRequestUpdate, LeaveRequestOut,
+    DepartmentCreate, DepartmentUpdate, DepartmentOut, DepartmentExpandedOut,
+    EmployeeCreate, EmployeeUpdate, EmployeeOut, EmployeeExpandedOut,
+    AttendanceCreate, AttendanceUpdate, AttendanceOut, AttendanceExpandedOut,
+    AttendanceBulkResult, AttendanceBulkRowResult,
+    LeaveRequestCreate, LeaveRequestUpdate, LeaveRequestOut, LeaveRequestExpandedOut,
 )
-from models import Department, Employee, Attendance, LeaveRequest, User
+from app.models.base import SOFT_DELETE
+from app.models.employee import Department, DepartmentClosure, Employee, EmployeeClosure, Attendance, LeaveRequest
+from app.models.User import User
 
 router = APIRouter(tags=["HR"])
 
+# Relationships each list endpoint can embed via ?expand=, with their loader strategy.
+DEPARTMENT_EXPANSIONS = {"parent": (Department.parent, selectinload), "manager": (Department.manager, joinedload)}
+EMPLOYEE_EXPANSIONS = {
+    "user": (Employee.user, joinedload),
+    "department": (Employee.department, joinedload),
+    "manager": (Employee.manager, selectinload),
+}
+ATTENDANCE_EXPANSIONS = {"employee": (Attendance.employee, joinedload)}
+LEAVE_EXPANSIONS = {"employee": (LeaveRequest.employee, joinedload), "approver": (LeaveRequest.approver, joinedload)}
+
+
+def _export_response(stmt, fmt: str, name: str) -> StreamingResponse:
+    return StreamingResponse(
+        stream_export(stmt, fmt),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
+
 
 # ===========================================================================
 # DEPARTMENTS
 # ===========================================================================
 
-dept_router = APIRouter(prefix="/departments")
+dept_router = APIRouter(prefix="/departments", route_class=InstrumentedAPIRoute)
 
 
-@dept_router.get("", response_model=List[DepartmentOut], summary="List departments")
-def list_departments(
+@dept_router.get("", response_model=List[DepartmentExpandedOut], summary="List departments")
+async def list_departments(
+    response: Response,
     is_active: Optional[bool] = None,
+    cursor: Optional[str] = None,
     skip: int = 0, limit: int = 100,
-    db: Session = Depends(get_db),
+    expand: Optional[str] = Query(None, description="Comma-separated relations to embed"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
     _: User = Depends(get_current_user),
 ):
-    q = db.query(Department).filter(Department.is_deleted == False)
+    q = select(Department).where(Department.is_deleted == False)
     if is_active is not None:
-        q = q.filter(Department.is_active == is_active)
-    return q.offset(skip).limit(limit).all()
+        q = q.where(Department.is_active == is_active)
+    if expand:
+        # Embedded rows are not covered by the collection tag, so expanded lists
+        # are neither cached nor 304'd.
+        q = q.options(*expand_options(expand, DEPARTMENT_EXPANSIONS))
+        return await paginate(db, q, Department.created_at, Department.id, response, cursor, skip, limit, descending=False)
+
+    async def load():
+        await check_collection_not_modified(db, q, Department, None, response)
+        page = q.with_only_columns(*DEPARTMENT_ROWS.columns)
+        rows = await paginate(db, page, Department.created_at, Department.id, response, cursor, skip, limit, descending=False, as_rows=True)
+        return DEPARTMENT_ROWS.response(rows, response.headers)
+
+    key = f"list:{is_active}:{cursor}:{skip}:{limit}"
+    return await department_cache.respond(key, load, if_none_match)
 
 
 @dept_router.post("", response_model=DepartmentOut, status_code=201, summary="Create department")
-def create_department(
+async def create_department(
     payload: DepartmentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: User = Depends(get_current_user),
 ):
     dept = Department(**payload.model_dump())
     db.add(dept)
-    db.commit()
-    db.refresh(dept)
+    await db.flush()
+    await hierarchy.add_node(db, DepartmentClosure, dept.id, dept.parent_id)
+    await db.commit()
+    await department_cache.invalidate()
+    await db.refresh(dept)
     return dept
 
 
 @dept_router.get("/{dept_id}", response_model=DepartmentOut)
-def get_department(dept_id: UUID, db: Session = Depends(get_db), _: User = Depends(get_current_user)):
-    dept = db.query(Department).filter(Department.id == dept_id, Department.is_deleted == False).first()
-    if not dept:
+async def get_department(
+    dept_id: UUID,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db), _: User = Depends(get_current_user),
+):
+    async def load():
+        dept = await db.scalar(live_by_id(Department), {"id": dept_id})
+        if not dept:
+            raise HTTPException(404, "Department not found")
+        out = ORJSONResponse(DepartmentOut.model_validate(dept).model_dump(mode="json"))
+        set_etag(out, dept)
+        return out
+
+    return await department_cache.respond(f"get:{dept_id}", load, if_none_match)
+
+
+@dept_router.get("/{dept_id}/subtree", response_model=List[DepartmentOut], summary="Department and all sub-departments")
+async def get_department_subtree(
+    dept_id: UUID,
+    max_depth: Optional[int] = Query(None, ge=0),
+    db: AsyncSession = Depends(get_async_db), _: User = Depends(get_current_user),
+):
+    if not await db.scalar(live_id(Department), {"id": dept_id}):
         raise HTTPException(404, "Department not found")
-    return dept
+    q = (
+        select(Department)
+        .join(DepartmentClosure, DepartmentClosure.descendant_id == Department.id)
+        .where(DepartmentClosure.ancestor_id == dept_id, Department.is_deleted == False)
+        .order_by(DepartmentClosure.depth, Department.name)
+    )
+    if max_depth is not None:
+        q = q.where(DepartmentClosure.depth <= max_depth)
+    return (await db.scalars(q)).all()
 
 
 @dept_router.patch("/{dept_id}", response_model=DepartmentOut)
-def update_department(
-    dept_id: UUID, payload: DepartmentUpdate,
-    db: Session = Depends(get_db), _: User = Depends(get_current_user),
+async def update_department(
+    dept_id: UUID, payload: DepartmentUpdate, response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db), _: User = Depends(get_current_user),
 ):
-    dept = db.query(Department).filter(Department.id == dept_id, Department.is_deleted == False).first()
-    if not dept:
-        raise HTTPException(404, "Department not found")
-    for k, v in payload.model_dump(exclude_unset=True).items():
-        setattr(dept, k, v)
-    db.commit()
-    db.refresh(dept)
+    """Send the ``ETag`` from a previous read as ``If-Match`` to get a 412 instead of overwriting a concurrent edit."""
+    changes = payload.model_dump(exclude_unset=True)
+    if "parent_id" in changes:
+        # Before the row update, so parent_id and the closure change under the same lock.
+        await hierarchy.lock_tree(db, DepartmentClosure)
+    dept = await versioned_update(
+        db, Department, dept_id, changes, if_match_versions(if_match, dept_id), "Department not found",
+    )
+    if "parent_id" in changes:
+        try:
+            await hierarchy.move_node(db, DepartmentClosure, dept_id, changes["parent_id"])
+        except hierarchy.HierarchyCycleError:
+            await db.rollback()
+            raise HTTPException(400, "A department cannot be moved under itself or one of its sub-departments")
+    await db.commit()
+    await department_cache.invalidate()
+    set_etag(response, dept)
     return dept
 
 
 @dept_router.delete("/{dept_id}", status_code=204)
-def delete_department(dept_id: UUID, db: Session = Depends(get_db), _: User = Depends(get_current_user)):
-    dept = db.query(Department).filter(Department.id == dept_id, Department.is_deleted == False).first()
-    if not dept:
-        raise HTTPException(404, "Department not found")
-    dept.soft_delete()
-    db.commit()
+async def delete_department(dept_id: UUID, db: AsyncSession = Depends(get_async_db), _: User = Depends(get_current_user)):
+    # A conditional UPDATE, so a concurrent second delete gets a 404, not a stale flush.
+    await versioned_update(db, Department, dept_id, SOFT_DELETE, None, "Department not found")
+    await db.commit()
+    await department_cache.invalidate()
 
 
 router.include_router(dept_router)
 
 
 
-emp_router = APIRouter(prefix="/employees")
+emp_router = APIRouter(prefix="/employees", route_class=InstrumentedAPIRoute)
 
 
-@emp_router.get("", response_model=List[EmployeeOut], summary="List employees")
-def list_employees(
+@emp_router.get("", response_model=List[EmployeeExpandedOut], summary="List employees")
+async def list_employees(
+    response: Response,
     department_id: Optional[UUID] = None,
+    include_subdepartments: bool = False,
     is_active: Optional[bool] = None,
+    cursor: Optional[str] = None,
     skip: int = 0, limit: int = 100,
-    db: Session = Depends(get_db), _: User = Depends(get_current_user),
+    expand: Optional[str] = Query(None, description="Comma-separated relations to embed"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db), _: User = Depends(get_current_user),
 ):
-    q = db.query(Employee).filter(Employee.is_deleted == False)
-    if department_id:
-        q = q.filter(Employee.department_id == department_id)
-    if is_active is not None:
-        q = q.filter(Employee.is_active == is_active)
-    return q.offset(skip).limit(limit).all()
+    q = filter_employees(select(Employee), department_id, include_subdepartments, is_active)
+    if expand:
+        q = q.options(*expand_options(expand, EMPLOYEE_EXPANSIONS))
+        return await paginate(db, q, Employee.created_at, Employee.id, response, cursor, skip, limit, descending=False)
+    not_modified = await check_collection_not_modified(db, q, Employee, if_none_match, response)
+    if not_modified:
+        return not_modified
+    q = q.with_only_columns(*EMPLOYEE_ROWS.columns)
+    rows = await paginate(db, q, Employee.created_at, Employee.id, response, cursor, skip, limit, descending=False, as_rows=True)
+    return EMPLOYEE_ROWS.response(rows, response.headers)
 
 
 @emp_router.post("", response_model=EmployeeOut, status_code=201)
-def create_employee(
+async def create_employee(
     payload: EmployeeCreate,
-    db: Session = Depends(get_db), _: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db), _: User = Depends(get_current_user),
 ):
-    if db.query(Employee).filter(Employee.employee_number == payload.employee_number).first():
+    if await db.scalar(select(Employee.id).where(Employee.employee_number == payload.employee_number)):
         raise HTTPException(409, "Employee number already exists")
     emp = Employee(**payload.model_dump())
     db.add(emp)
-    db.commit()
-    db.refresh(emp)
+    await db.flush()
+    await hierarchy.add_node(db, EmployeeClosure, emp.id, emp.manager_id)
+    await db.commit()
+    await db.refresh(emp)
     return emp
 
 
+@emp_router.get("/export", summary="Export employees as NDJSON or CSV")
+async def export_employees(
+    format: str = Query("ndjson", pattern=f"^({'|'.join(EXPORT_FORMATS)})$"),
+    department_id: Optional[UUID] = None,
+    include_subdepartments: bool = False,
+    is_active: Optional[bool] = None,
+    _: User = Depends(get_current_user),
+):
+    """Every matching employee in one streamed response, ordered by employee number."""
+    q = filter_employees(select(*EMPLOYEE_EXPORT_COLUMNS), department_id, include_subdepartments, is_active)
+    return _export_response(q.order_by(Employee.employee_number), format, "employees")
+
+
 @emp_router.get("/{emp_id}", response_model=EmployeeOut)
-def get_employee(emp_id: UUID, db: Session = Depends(get_db), _: User = Depends(get_current_user)):
-    emp = db.query(Employee).filter(Employee.id == emp_id, Employee.is_deleted == False).first()
+async def get_employee(
+    emp_id: UUID, response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db), _: User = Depends(get_current_user),
+):
+    not_modified = await check_not_modified(db, Employee, emp_id, if_none_match)
+    if not_modified:
+        return not_modified
+    emp = await db.scalar(live_by_id(Employee), {"id": emp_id})
     if not emp:
         raise HTTPException(404, "Employee not found")
+    set_etag(response, emp)
     return emp
 
 
-@emp_router.patch("/{emp_id}", response_model=EmployeeOut)
-def update_employee(
-    emp_id: UUID, payload: EmployeeUpdate,
-    db: Session = Depends(get_db), _: User = Depends(get_current_user),
+@emp_router.get("/{emp_id}/reports", response_model=List[EmployeeOut], summary="Direct and indirect reports")
+async def get_employee_reports(
+    emp_id: UUID,
+    depth: Optional[int] = Query(None, ge=1, description="1 = direct reports only; omit for the whole org below"),
+    db: AsyncSession = Depends(get_async_db), _: User = Depends(get_current_user),
 ):
-    emp = db.query(Employee).filter(Employee.id == emp_id, Employee.is_deleted == False).first()
-    if not emp:
+    q = (
+        select(Employee)
+        .join(EmployeeClosure, EmployeeClosure.descendant_id == Employee.id)
+        .where(EmployeeClosure.ancestor_id == emp_id, EmployeeClosure.depth > 0, Employee.is_deleted == False)
+        .order_by(EmployeeClosure.depth, Employee.employee_number)
+    )
+    if depth is not None:
+        q = q.where(EmployeeClosure.depth <= depth)
+    return await _related_or_404(db, q, emp_id)
+
+
+@emp_router.get("/{emp_id}/chain", response_model=List[EmployeeOut], summary="Management chain up to the top")
+async def get_employee_chain(emp_id: UUID, db: AsyncSession = Depends(get_async_db), _: User = Depends(get_current_user)):
+    q = (
+        select(Employee)
+        .join(EmployeeClosure, EmployeeClosure.ancestor_id == Employee.id)
+        .where(EmployeeClosure.descendant_id == emp_id, EmployeeClosure.depth > 0, Employee.is_deleted == False)
+        .order_by(EmployeeClosure.depth)
+    )
+    return await _related_or_404(db, q, emp_id)
+
+
+async def _related_or_404(db: AsyncSession, q, emp_id: UUID):
+    # The uncorrelated EXISTS is a one-time filter on the employee itself, so
+    # any rows at all prove it is live; the separate existence check only runs
+    # for leaves and top-level managers, to tell them apart from a 404.
+    anchor = aliased(Employee)
+    q = q.where(select(anchor.id).where(anchor.id == emp_id, anchor.is_deleted == False).exists())
+    rows = (await db.scalars(q)).all()
+    if not rows and not await db.scalar(live_id(Employee), {"id": emp_id}):
         raise HTTPException(404, "Employee not found")
-    for k, v in payload.model_dump(exclude_unset=True).items():
-        setattr(emp, k, v)
-    db.commit()
-    db.refresh(emp)
+    return rows
+
+
+@emp_router.patch("/{emp_id}", response_model=EmployeeOut)
+async def update_employee(
+    emp_id: UUID, payload: EmployeeUpdate, response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db), _: User = Depends(get_current_user),
+):
+    """Send the ``ETag`` from a previous read as ``If-Match`` to get a 412 instead of overwriting a concurrent edit."""
+    changes = payload.model_dump(exclude_unset=True)
+    if "manager_id" in changes:
+        # Before the row update, so manager_id and the closure change under the same lock.
+        await hierarchy.lock_tree(db, EmployeeClosure)
+    emp = await versioned_update(
+        db, Employee, emp_id, changes, if_match_versions(if_match, emp_id), "Employee not found",
+    )
+    if "manager_id" in changes:
+        try:
+            await hierarchy.move_node(db, EmployeeClosure, emp_id, changes["manager_id"])
+        except hierarchy.HierarchyCycleError:
+            await db.rollback()
+            raise HTTPException(400, "An employee cannot report to themselves or to one of their reports")
+    await db.commit()
+    set_etag(response, emp)
     return emp
 
 
 @emp_router.delete("/{emp_id}", status_code=204)
-def delete_employee(emp_id: UUID, db: Session = Depends(get_db), _: User = Depends(get_current_user)):
-    emp = db.query(Employee).filter(Employee.id == emp_id, Employee.is_deleted == False).first()
-    if not emp:
-        raise HTTPException(404, "Employee not found")
-    emp.soft_delete()
-    db.commit()
+async def delete_employee(emp_id: UUID, db: AsyncSession = Depends(get_async_db), _: User = Depends(get_current_user)):
+    await versioned_update(db, Employee, emp_id, SOFT_DELETE, None, "Employee not found")
+    await db.commit()
 
 
 router.include_router(emp_router)
@@ -162,66 +354,163 @@ router.include_router(emp_router)
 # ATTENDANCE
 # ===========================================================================
 
-att_router = APIRouter(prefix="/attendance")
+att_router = APIRouter(prefix="/attendance", route_class=InstrumentedAPIRoute)
 
 
-@att_router.get("", response_model=List[AttendanceOut], summary="List attendance records")
-def list_attendance(
+@att_router.get("", response_model=List[AttendanceExpandedOut], summary="List attendance records")
+async def list_attendance(
+    response: Response,
     employee_id: Optional[UUID] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
+    cursor: Optional[str] = None,
     skip: int = 0, limit: int = 100,
-    db: Session = Depends(get_db), _: User = Depends(get_current_user),
+    expand: Optional[str] = Query(None, description="Comma-separated relations to embed"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db), _: User = Depends(get_current_user),
 ):
-    q = db.query(Attendance).filter(Attendance.is_deleted == False)
-    if employee_id:
-        q = q.filter(Attendance.employee_id == employee_id)
-    if start_date:
-        q = q.filter(Attendance.attendance_date >= start_date)
-    if end_date:
-        q = q.filter(Attendance.attendance_date <= end_date)
-    return q.order_by(Attendance.attendance_date.desc()).offset(skip).limit(limit).all()
+    q = filter_attendance(select(Attendance), employee_id, start_date, end_date)
+    if expand:
+        q = q.options(*expand_options(expand, ATTENDANCE_EXPANSIONS))
+        return await paginate(db, q, Attendance.attendance_date, Attendance.id, response, cursor, skip, limit)
+    not_modified = await check_collection_not_modified(db, q, Attendance, if_none_match, response)
+    if not_modified:
+        return not_modified
+    q = q.with_only_columns(*ATTENDANCE_ROWS.columns)
+    rows = await paginate(db, q, Attendance.attendance_date, Attendance.id, response, cursor, skip, limit, as_rows=True)
+    return ATTENDANCE_ROWS.response(rows, response.headers)
 
 
 @att_router.post("", response_model=AttendanceOut, status_code=201)
-def create_attendance(
+async def create_attendance(
     payload: AttendanceCreate,
-    db: Session = Depends(get_db), _: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db), _: User = Depends(get_current_user),
 ):
-    existing = db.query(Attendance).filter(
+    existing = await db.scalar(select(Attendance.id).where(
         Attendance.employee_id == payload.employee_id,
         Attendance.attendance_date == payload.attendance_date,
         Attendance.is_deleted == False,
-    ).first()
+    ))
     if existing:
         raise HTTPException(409, "Attendance record for this date already exists")
     att = Attendance(**payload.model_dump())
+    ShiftPolicy.from_settings().apply(att)
     db.add(att)
-    db.commit()
-    db.refresh(att)
+    await db.flush()
+    delta = RollupDelta()
+    delta.add(att)
+    await delta.apply(db)
+    await db.commit()
+    await db.refresh(att)
     return att
 
 
+@att_router.post("/bulk", response_model=AttendanceBulkResult, summary="Bulk import attendance")
+async def bulk_create_attendance(
+    request: Request,
+    mode: str = Query("skip", pattern="^(skip|upsert)$"),
+    batch_size: int = Query(settings.ATTENDANCE_BULK_BATCH_SIZE, ge=1, le=settings.ATTENDANCE_BULK_MAX_BATCH_SIZE),
+    db: AsyncSession = Depends(get_async_db), _: User = Depends(get_current_user),
+):
+    """
+    Import attendance records from a JSON array, NDJSON (``application/x-ndjson``)
+    or CSV (``text/csv``) body. Rows are written in batches of ``batch_size``,
+    each as one multi-row ``INSERT ... ON CONFLICT``; the response reports a
+    status for every input row by its position in the upload.
+    """
+    rows: List[AttendanceBulkRowResult] = []
+    batch = []
+    seen = set()
+
+    async for index, raw in iter_bulk_rows(request):
+        try:
+            if isinstance(raw, Exception):
+                raise ValueError(str(raw))
+            record = AttendanceCreate.model_validate(raw)
+        except (ValueError, ValidationError) as exc:
+            rows.append(AttendanceBulkRowResult(index=index, status="invalid", error=str(exc)))
+            continue
+        key = (record.employee_id, record.attendance_date)
+        if key in seen:
+            rows.append(AttendanceBulkRowResult(index=index, status="duplicate", error="Repeated within upload"))
+            continue
+        seen.add(key)
+        batch.append((index, record))
+        if len(batch) >= batch_size:
+            rows.extend(await write_attendance_batch(db, batch, mode))
+            batch = []
+    if batch:
+        rows.extend(await write_attendance_batch(db, batch, mode))
+
+    rows.sort(key=lambda r: r.index)
+    result = AttendanceBulkResult(rows=rows)
+    for r in rows:
+        setattr(result, r.status, getattr(result, r.status) + 1)
+    return result
+
+
+@att_router.get("/export", summary="Export attendance as NDJSON or CSV")
+async def export_attendance(
+    format: str = Query("ndjson", pattern=f"^({'|'.join(EXPORT_FORMATS)})$"),
+    employee_id: Optional[UUID] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    _: User = Depends(get_current_user),
+):
+    """Every matching attendance record in one streamed response, ordered by date then employee."""
+    q = filter_attendance(select(*ATTENDANCE_EXPORT_COLUMNS), employee_id, start_date, end_date)
+    return _export_response(q.order_by(Attendance.attendance_date, Attendance.employee_id), format, "attendance")
+
+
+@att_router.get("/summary", summary="Aggregated attendance per employee or department")
+async def attendance_summary(
+    start_date: date,
+    end_date: date,
+    group_by: str = Query("employee", pattern=f"^({'|'.join(SUMMARY_GROUPS)})$"),
+    period: str = Query("month", pattern=f"^({'|'.join(SUMMARY_PERIODS)})$"),
+    employee_id: Optional[UUID] = None,
+    department_id: Optional[UUID] = None,
+    _: User = Depends(get_current_user),
+):
+    """
+    Worked hours, overtime, late/half-day counts and absence rate per
+    ``group_by`` key and ``period`` bucket, streamed as NDJSON
+    (one ``AttendanceSummaryRow`` per line).
+    """
+    if end_date < start_date:
+        raise HTTPException(400, "end_date must not be before start_date")
+    stmt = summary_statement(group_by, period, start_date, end_date, employee_id, department_id)
+    return StreamingResponse(stream_summary(stmt), media_type="application/x-ndjson")
+
+
 @att_router.get("/{att_id}", response_model=AttendanceOut)
-def get_attendance(att_id: UUID, db: Session = Depends(get_db), _: User = Depends(get_current_user)):
-    att = db.query(Attendance).filter(Attendance.id == att_id, Attendance.is_deleted == False).first()
+async def get_attendance(
+    att_id: UUID, response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db), _: User = Depends(get_current_user),
+):
+    not_modified = await check_not_modified(db, Attendance, att_id, if_none_match)
+    if not_modified:
+        return not_modified
+    att = await db.scalar(live_by_id(Attendance), {"id": att_id})
     if not att:
         raise HTTPException(404, "Attendance record not found")
+    set_etag(response, att)
     return att
 
 
 @att_router.patch("/{att_id}", response_model=AttendanceOut)
-def update_attendance(
-    att_id: UUID, payload: AttendanceUpdate,
-    db: Session = Depends(get_db), _: User = Depends(get_current_user),
+async def update_attendance(
+    att_id: UUID, payload: AttendanceUpdate, response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db), _: User = Depends(get_current_user),
 ):
-    att = db.query(Attendance).filter(Attendance.id == att_id, Attendance.is_deleted == False).first()
-    if not att:
-        raise HTTPException(404, "Attendance record not found")
-    for k, v in payload.model_dump(exclude_unset=True).items():
-        setattr(att, k, v)
-    db.commit()
-    db.refresh(att)
+    """Send the ``ETag`` from a previous read as ``If-Match`` to get a 412 instead of overwriting a concurrent edit."""
+    versions = if_match_versions(if_match, att_id)
+    att = await update_attendance_record(db, att_id, payload.model_dump(exclude_unset=True), versions)
+    if att is None:
+        await raise_update_miss(db, Attendance, att_id, versions, "Attendance record not found")
+    set_etag(response, att)
     return att
 
 
@@ -232,61 +521,114 @@ router.include_router(att_router)
 # LEAVE REQUESTS
 # ===========================================================================
 
-leave_router = APIRouter(prefix="/leave-requests")
+leave_router = APIRouter(prefix="/leave-requests", route_class=InstrumentedAPIRoute)
 
 
-@leave_router.get("", response_model=List[LeaveRequestOut])
-def list_leave_requests(
+@leave_router.get("", response_model=List[LeaveRequestExpandedOut])
+async def list_leave_requests(
+    response: Response,
     employee_id: Optional[UUID] = None,
     status: Optional[str] = None,
+    cursor: Optional[str] = None,
     skip: int = 0, limit: int = 100,
-    db: Session = Depends(get_db), _: User = Depends(get_current_user),
+    expand: Optional[str] = Query(None, description="Comma-separated relations to embed"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db), _: User = Depends(get_current_user),
 ):
-    q = db.query(LeaveRequest).filter(LeaveRequest.is_deleted == False)
-    if employee_id:
-        q = q.filter(LeaveRequest.employee_id == employee_id)
-    if status:
-        q = q.filter(LeaveRequest.status == status)
-    return q.order_by(LeaveRequest.created_at.desc()).offset(skip).limit(limit).all()
+    q = filter_leave_requests(select(LeaveRequest), employee_id, status)
+    if expand:
+        q = q.options(*expand_options(expand, LEAVE_EXPANSIONS))
+        return await paginate(db, q, LeaveRequest.created_at, LeaveRequest.id, response, cursor, skip, limit)
+    not_modified = await check_collection_not_modified(db, q, LeaveRequest, if_none_match, response)
+    if not_modified:
+        return not_modified
+    q = q.with_only_columns(*LEAVE_ROWS.columns)
+    rows = await paginate(db, q, LeaveRequest.created_at, LeaveRequest.id, response, cursor, skip, limit, as_rows=True)
+    return LEAVE_ROWS.response(rows, response.headers)
 
 
 @leave_router.post("", response_model=LeaveRequestOut, status_code=201)
-def create_leave_request(
+async def create_leave_request(
     payload: LeaveRequestCreate,
-    db: Session = Depends(get_db), _: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db), _: User = Depends(get_current_user),
 ):
     leave = LeaveRequest(**payload.model_dump())
     db.add(leave)
-    db.commit()
-    db.refresh(leave)
+    try:
+        await db.commit()
+    except IntegrityError as exc:
+        await db.rollback()
+        if is_overlap_violation(exc):
+            raise HTTPException(409, str(LeaveOverlap()))
+        raise
+    await db.refresh(leave)
     return leave
 
 
+@leave_router.get("/calendar", response_model=List[LeaveRequestOut], summary="Team leave calendar")
+async def leave_calendar(
+    start: date, end: date,
+    department_id: Optional[UUID] = None,
+    include_subdepartments: bool = False,
+    status: List[str] = Query(list(ACTIVE_LEAVE_STATUSES)),
+    db: AsyncSession = Depends(get_async_db), _: User = Depends(get_current_user),
+):
+    """Leave requests overlapping ``[start, end]`` (inclusive), via the GiST index on ``period``."""
+    if end < start:
+        raise HTTPException(400, "end must be on or after start")
+    q = select(LeaveRequest).where(
+        LeaveRequest.period.overlaps(func.daterange(start, end, "[]")),
+        LeaveRequest.status.in_(status),
+        LeaveRequest.is_deleted == False,
+    )
+    if department_id:
+        q = q.join(Employee, Employee.id == LeaveRequest.employee_id)
+        if include_subdepartments:
+            q = q.join(DepartmentClosure, DepartmentClosure.descendant_id == Employee.department_id).where(
+                DepartmentClosure.ancestor_id == department_id
+            )
+        else:
+            q = q.where(Employee.department_id == department_id)
+    result = await db.scalars(q.order_by(LeaveRequest.start_date, LeaveRequest.employee_id))
+    return result.all()
+
+
 @leave_router.get("/{leave_id}", response_model=LeaveRequestOut)
-def get_leave_request(leave_id: UUID, db: Session = Depends(get_db), _: User = Depends(get_current_user)):
-    leave = db.query(LeaveRequest).filter(LeaveRequest.id == leave_id, LeaveRequest.is_deleted == False).first()
+async def get_leave_request(
+    leave_id: UUID, response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db), _: User = Depends(get_current_user),
+):
+    not_modified = await check_not_modified(db, LeaveRequest, leave_id, if_none_match)
+    if not_modified:
+        return not_modified
+    leave = await db.scalar(live_by_id(LeaveRequest), {"id": leave_id})
     if not leave:
         raise HTTPException(404, "Leave request not found")
+    set_etag(response, leave)
     return leave
 
 
 @leave_router.patch("/{leave_id}", response_model=LeaveRequestOut, summary="Approve / Reject leave")
-def update_leave_request(
-    leave_id: UUID, payload: LeaveRequestUpdate,
-    db: Session = Depends(get_db), current_user: User = Depends(get_current_user),
+async def update_leave_request(
+    leave_id: UUID, payload: LeaveRequestUpdate, response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user),
 ):
-    leave = db.query(LeaveRequest).filter(LeaveRequest.id == leave_id, LeaveRequest.is_deleted == False).first()
-    if not leave:
-        raise HTTPException(404, "Leave request not found")
-    if payload.status:
-        leave.status = payload.status
-        leave.approved_by = current_user.id
-        from datetime import datetime
-        leave.approved_at = datetime.utcnow()
-    if payload.rejection_reason:
-        leave.rejection_reason = payload.rejection_reason
-    db.commit()
-    db.refresh(leave)
+    """
+    Approving debits the employee's leave balance atomically (409 if it is
+    insufficient); moving an approved request to any other status credits it
+    back. Every movement is recorded in the leave ledger. Honours ``If-Match``.
+    """
+    try:
+        leave = await transition_leave_request(
+            db, leave_id, current_user.id,
+            new_status=payload.status, rejection_reason=payload.rejection_reason,
+            expected_versions=if_match_versions(if_match, leave_id),
+        )
+    except LeaveTransitionError as exc:
+        raise HTTPException(exc.status_code, str(exc))
+    set_etag(response, leave)
     return leave
 
 
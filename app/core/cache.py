@@ -0,0 +1,522 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from uuid import uuid4
+
+import orjson
+import redis
+import redis.asyncio
+from fastapi import Response
+from prometheus_client import REGISTRY
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.core.etag import etag_matches, not_modified
+from app.core.metrics import StatsCollector
+from app.models.User import User
+from app.schema.user_schema import UserOut
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Thread-safe in-process LRU cache whose entries expire ``ttl`` seconds after being set."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class PrincipalCache:
+    """
+    Cache of authenticated principals keyed by token ``sub``.
+
+    Each entry is stamped with the user's principal generation (``User.version``,
+    carried in tokens as ``ver``), which only changes with ``role``,
+    ``is_active`` or ``is_deleted``. An entry serves every token whose
+    generation is not newer than its own, so all of a user's devices share
+    it; a token issued after a change the entry predates is a miss.
+
+    L1 lives in the worker process; L2 is a Redis hash per user shared by all
+    workers when ``REDIS_URL`` is configured. The client is synchronous, since
+    invalidation runs from session events, so the async ``get``/``set`` run
+    its calls in a worker thread and only an L1 miss leaves the event loop.
+
+    Once a principal change commits, ``invalidate`` leaves a tombstone carrying
+    the new generation in the committing worker's L1 and in L2, so a request
+    that read the row before the commit cannot cache the old state again, and
+    publishes it on ``CHANNEL``. Every worker's listener thread (``start``)
+    writes the same tombstone into its own L1, so a token issued before the
+    change stops being served from any L1 within a round trip. The listener
+    clears L1 whenever it (re)subscribes, as anything published in between
+    was missed. Without ``REDIS_URL`` there is only the one tier, and a worker
+    that is not running the listener serves its L1 entries until they expire,
+    ``PRINCIPAL_CACHE_TTL_SECONDS`` at most.
+    """
+
+    KEY_PREFIX = "principal:"
+    CHANNEL = "principal:invalidate"
+    # Bounds how long stop() waits.
+    POLL_INTERVAL = 1.0
+    RETRY_INTERVAL = 5.0
+    # Write the entry unless the key already holds a newer generation (a tombstone).
+    _SET_SCRIPT = """
+    local current = redis.call('HGET', KEYS[1], 'gen')
+    if current and tonumber(current) > tonumber(ARGV[1]) then return 0 end
+    redis.call('HSET', KEYS[1], 'gen', ARGV[1], 'user', ARGV[2])
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+    return 1
+    """
+
+    def __init__(self, maxsize: int, ttl: int, redis_url: Optional[str] = None):
+        self.ttl = ttl
+        self._local = TTLCache(maxsize, ttl)
+        self._redis = redis.Redis.from_url(redis_url) if redis_url else None
+        self._set_script = self._redis.register_script(self._SET_SCRIPT) if self._redis else None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self._db_lookups = 0
+        self._db_seconds = 0.0
+
+    # -- lookups -------------------------------------------------------------
+
+    async def get(self, sub: str, generation: Optional[int] = None) -> Optional[User]:
+        item = self._local.get(sub)
+        if item is not None and item[1] is not None and (generation is None or item[0] >= generation):
+            self._count("local_hits")
+            return _to_principal(item[1], item[0])
+
+        # Tokens issued before the ``ver`` claim existed only use the local tier.
+        if self._redis is not None and generation is not None:
+            try:
+                cached_gen, raw = await asyncio.to_thread(self._redis.hmget, self.KEY_PREFIX + sub, "gen", "user")
+            except redis.RedisError as exc:
+                logger.warning("Principal cache Redis lookup failed: %s", exc)
+                cached_gen, raw = None, None
+            if raw is not None and int(cached_gen) >= generation:
+                out = UserOut.model_validate_json(raw)
+                self._set_local(sub, int(cached_gen), out)
+                self._count("redis_hits")
+                return _to_principal(out, int(cached_gen))
+
+        self._count("misses")
+        return None
+
+    async def set(self, user: User) -> None:
+        sub = str(user.id)
+        out = UserOut.model_validate(user)
+        self._set_local(sub, user.version, out)
+        if self._redis is not None:
+            try:
+                await asyncio.to_thread(
+                    self._set_script, keys=[self.KEY_PREFIX + sub], args=[user.version, out.model_dump_json(), self.ttl],
+                )
+            except redis.RedisError as exc:
+                logger.warning("Principal cache Redis write failed: %s", exc)
+
+    def invalidate(self, sub: str, generation: int) -> None:
+        """Drop ``sub``'s entry on every worker, refusing any write of a generation older than ``generation``."""
+        self._set_local(sub, generation, None)
+        if self._redis is None:
+            return
+        try:
+            # Committed from an AsyncSession: keep the round trip off the event loop.
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._invalidate_redis(sub, generation)
+        else:
+            loop.run_in_executor(None, self._invalidate_redis, sub, generation)
+
+    def _invalidate_redis(self, sub: str, generation: int) -> None:
+        key = self.KEY_PREFIX + sub
+        try:
+            pipe = self._redis.pipeline()
+            pipe.hset(key, "gen", generation)
+            pipe.hdel(key, "user")
+            pipe.expire(key, self.ttl)
+            pipe.publish(self.CHANNEL, f"{sub}:{generation}")
+            pipe.execute()
+        except redis.RedisError as exc:
+            logger.warning("Principal cache Redis invalidation failed: %s", exc)
+
+    def _set_local(self, sub: str, generation: int, out: Optional[UserOut]) -> None:
+        """Store ``out`` (``None`` for a tombstone) unless L1 holds a newer generation."""
+        with self._lock:
+            current = self._local.get(sub)
+            if current is None or current[0] <= generation:
+                self._local.set(sub, (generation, out))
+
+    # -- propagation -----------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the thread that applies other workers' invalidations to this worker's L1."""
+        if self._redis is None or self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._listen, name="principal-invalidations", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+
+    def _listen(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                with self._redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    pubsub.subscribe(self.CHANNEL)
+                    # Invalidations published while we were not subscribed are lost.
+                    self._local.clear()
+                    while not self._stopping.is_set():
+                        message = pubsub.get_message(timeout=self.POLL_INTERVAL)
+                        if message is not None and message["type"] == "message":
+                            sub, _, generation = message["data"].decode().rpartition(":")
+                            self._set_local(sub, int(generation), None)
+            except redis.RedisError as exc:
+                logger.warning("Principal invalidation listener lost Redis, retrying: %s", exc)
+                self._stopping.wait(self.RETRY_INTERVAL)
+
+    # -- metrics -------------------------------------------------------------
+
+    def record_db_lookup(self, seconds: float) -> None:
+        with self._lock:
+            self._db_lookups += 1
+            self._db_seconds += seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.local_hits + self.redis_hits
+            total = hits + self.misses
+            avg_db = self._db_seconds / self._db_lookups if self._db_lookups else 0.0
+            return {
+                "local_hits": self.local_hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "hit_rate": hits / total if total else 0.0,
+                "avg_db_lookup_seconds": avg_db,
+                "latency_saved_seconds": hits * avg_db,
+                "size": len(self._local),
+            }
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+def _to_principal(out: UserOut, version: int) -> User:
+    """Rebuild a detached ``User`` carrying only the public profile fields."""
+    return User(**out.model_dump(), is_deleted=False, version=version)
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    redis_url=settings.REDIS_URL,
+)
+REGISTRY.register(StatsCollector(
+    "erp_principal_cache", "Principal cache counters used by get_current_user", principal_cache.stats,
+))
+
+
+_PRINCIPAL_FIELDS = ("is_active", "is_deleted", "role")
+# Session.info key for the principals a transaction changed: sub -> new generation.
+_PENDING_INVALIDATIONS = "principal_invalidations"
+
+
+def _pending(target: User) -> Dict[str, int]:
+    return object_session(target).info.setdefault(_PENDING_INVALIDATIONS, {})
+
+
+@event.listens_for(User, "before_update")
+def _bump_generation(mapper, connection, target: User) -> None:
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in _PRINCIPAL_FIELDS):
+        target.version = (target.version or 0) + 1
+        _pending(target)[str(target.id)] = target.version
+
+
+@event.listens_for(User, "after_delete")
+def _invalidate_on_delete(mapper, connection, target: User) -> None:
+    _pending(target)[str(target.id)] = (target.version or 0) + 1
+
+
+# Only after commit: invalidating at flush time would let a concurrent request
+# re-cache the row it read before the commit.
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    for sub, generation in session.info.pop(_PENDING_INVALIDATIONS, {}).items():
+        principal_cache.invalidate(sub, generation)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_INVALIDATIONS, None)
+
+
+# -- reference data ------------------------------------------------------------
+
+# Response headers worth replaying from a cached entry.
+_CACHED_HEADERS = ("content-type", "etag", "cache-control", "x-next-cursor")
+
+
+class ResponseCache:
+    """
+    Two-tier cache of rendered responses for rarely-changing reference data.
+
+    L1 lives in the worker process and keeps entries for ``local_ttl`` seconds;
+    L2 is Redis, shared by all workers, for ``ttl`` seconds. L2 keys embed a
+    generation counter (``<namespace>:gen``) that ``invalidate`` bumps after
+    every write, so one ``INCR`` orphans the whole namespace at once. L1 keys
+    embed a local generation that the writing worker bumps the same way, so
+    a load that was already running when the write committed can never be
+    served afterwards; other workers may serve their L1 copy until it expires.
+
+    Concurrent misses on one key share a single load: within a worker through
+    an in-flight future, across workers through a short Redis lock whose
+    losers poll L2 for the winner's result. Without ``REDIS_URL`` only L1 and
+    in-process single-flight apply. Redis errors are logged and treated as
+    misses.
+    """
+
+    LOCK_TIMEOUT = 5.0
+    LOCK_POLL_INTERVAL = 0.05
+    # Delete the load lock only if it still holds our token: after LOCK_TIMEOUT
+    # it may have expired and been taken by another worker.
+    _RELEASE_SCRIPT = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end
+    return 0
+    """
+
+    def __init__(self, namespace: str, maxsize: int, ttl: int, local_ttl: float, redis_url: Optional[str] = None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self._local = TTLCache(maxsize, local_ttl)
+        self._redis = redis.asyncio.Redis.from_url(redis_url) if redis_url else None
+        self._release_script = self._redis.register_script(self._RELEASE_SCRIPT) if self._redis else None
+        self._generation = 0  # local part of L1 and in-flight keys
+        self._inflight: Dict[Tuple[int, str], asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._loads = 0
+        self._load_seconds = 0.0
+
+    async def respond(
+        self, key: str, load: Callable[[], Awaitable[Response]], if_none_match: Optional[str] = None,
+    ) -> Response:
+        """
+        The cached response for ``key``, built with ``load`` on a miss. A
+        matching ``If-None-Match`` gets a 304 from the cached ``ETag``.
+        Exceptions raised by ``load`` (e.g. a 404) are not cached.
+        """
+        body, headers = await self._get(key, load)
+        tag = headers.get("etag")
+        if tag and etag_matches(if_none_match, tag):
+            return not_modified(tag)
+        return Response(content=body, headers=headers)
+
+    async def invalidate(self) -> None:
+        """Drop every entry in the namespace; call after committing a write."""
+        self._generation += 1
+        self._local.clear()
+        if self._redis is None:
+            return
+        try:
+            await self._redis.incr(self._generation_key)
+        except redis.RedisError as exc:
+            logger.warning("%s cache Redis invalidation failed: %s", self.namespace, exc)
+
+    # -- lookups -------------------------------------------------------------
+
+    @property
+    def _generation_key(self) -> str:
+        return f"cache:{self.namespace}:gen"
+
+    async def _get(self, key: str, load) -> Tuple[bytes, dict]:
+        local_key = (self._generation, key)
+        entry = self._local.get(local_key)
+        if entry is not None:
+            self._count("local_hits")
+            return entry
+
+        pending = self._inflight.get(local_key)
+        if pending is not None:
+            self._count("coalesced")
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The leading request was cancelled; load on our own.
+                return await self._get(key, load)
+
+        future = asyncio.get_running_loop().create_future()
+        # Mark a failure as retrieved even when no other request was waiting on it.
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[local_key] = future
+        try:
+            entry = await self._fetch(key, load)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(entry)
+            self._local.set(local_key, entry)
+            return entry
+        finally:
+            self._inflight.pop(local_key, None)
+
+    async def _fetch(self, key: str, load) -> Tuple[bytes, dict]:
+        if self._redis is None:
+            return await self._load(load)
+
+        try:
+            generation = int(await self._redis.get(self._generation_key) or 0)
+            redis_key = f"cache:{self.namespace}:{generation}:{key}"
+            entry = await self._redis_get(redis_key)
+            if entry is not None:
+                self._count("redis_hits")
+                return entry
+            token = uuid4().hex
+            locked = await self._redis.set(redis_key + ":lock", token, nx=True, px=int(self.LOCK_TIMEOUT * 1000))
+            if not locked:
+                entry = await self._wait_for(redis_key)
+                if entry is not None:
+                    self._count("coalesced")
+                    return entry
+                token = None  # the holder gave up or timed out; load without the lock
+        except redis.RedisError as exc:
+            logger.warning("%s cache Redis lookup failed: %s", self.namespace, exc)
+            return await self._load(load)
+
+        try:
+            entry = await self._load(load)
+        except BaseException:
+            await self._release(redis_key + ":lock", token)
+            raise
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.hset(redis_key, mapping={"body": entry[0], "headers": orjson.dumps(entry[1])})
+                pipe.expire(redis_key, self.ttl)
+                await pipe.execute()
+        except redis.RedisError as exc:
+            logger.warning("%s cache Redis write failed: %s", self.namespace, exc)
+        await self._release(redis_key + ":lock", token)
+        return entry
+
+    async def _release(self, lock_key: str, token: Optional[str]) -> None:
+        if token is None:
+            return
+        try:
+            await self._release_script(keys=[lock_key], args=[token])
+        except redis.RedisError as exc:
+            logger.warning("%s cache Redis unlock failed: %s", self.namespace, exc)
+
+    async def _redis_get(self, redis_key: str) -> Optional[Tuple[bytes, dict]]:
+        raw = await self._redis.hgetall(redis_key)
+        if not raw:
+            return None
+        return raw[b"body"], orjson.loads(raw[b"headers"])
+
+    async def _wait_for(self, redis_key: str) -> Optional[Tuple[bytes, dict]]:
+        """Poll L2 while another worker holds the load lock; ``None`` if it never shows up."""
+        deadline = time.monotonic() + self.LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.LOCK_POLL_INTERVAL)
+            entry = await self._redis_get(redis_key)
+            if entry is not None:
+                return entry
+            if not await self._redis.exists(redis_key + ":lock"):
+                return None
+        return None
+
+    async def _load(self, load) -> Tuple[bytes, dict]:
+        self._count("misses")
+        started = time.perf_counter()
+        response = await load()
+        with self._lock:
+            self._loads += 1
+            self._load_seconds += time.perf_counter() - started
+        headers = {name: response.headers[name] for name in _CACHED_HEADERS if name in response.headers}
+        return response.body, headers
+
+    # -- metrics -------------------------------------------------------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.local_hits + self.redis_hits + self.coalesced
+            total = hits + self.misses
+            avg_load = self._load_seconds / self._loads if self._loads else 0.0
+            return {
+                "local_hits": self.local_hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": hits / total if total else 0.0,
+                "avg_load_seconds": avg_load,
+                "size": len(self._local),
+            }
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+department_cache = ResponseCache(
+    "departments",
+    maxsize=settings.DEPARTMENT_CACHE_MAX_SIZE,
+    ttl=settings.DEPARTMENT_CACHE_TTL_SECONDS,
+    local_ttl=settings.DEPARTMENT_CACHE_LOCAL_TTL_SECONDS,
+    redis_url=settings.REDIS_URL,
+)
+REGISTRY.register(StatsCollector(
+    "erp_department_cache", "Department response cache counters", department_cache.stats,
+))
@@ -0,0 +1,125 @@
+"""
+Entity tags, ``If-Match`` preconditions and ``If-None-Match`` revalidation
+built on ``BaseModel.version``.
+
+Every HR row carries a ``version`` that the ORM (``version_id_col``) and the
+set-based writers bump on each change, so ``W/"<id>.<version>"`` identifies a
+representation without hashing the response body. A collection is tagged by
+its row count and latest change, which one aggregate over the list's own
+filters yields without loading any rows.
+"""
+
+from typing import List, Optional
+from uuid import UUID
+
+from fastapi import HTTPException, Response
+from sqlalchemy import func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.statements import live_id, live_version
+
+ETAG_HEADER = "ETag"
+# Clients may keep the body but must revalidate it with If-None-Match before reuse.
+CACHE_CONTROL = "private, no-cache"
+
+
+def entity_tag(row_id, version: int) -> str:
+    return f'W/"{row_id}.{version}"'
+
+
+def set_etag(response: Response, obj) -> None:
+    response.headers[ETAG_HEADER] = entity_tag(obj.id, obj.version)
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def etag_matches(if_none_match: Optional[str], tag: str) -> bool:
+    """Weak comparison of ``tag`` against an ``If-None-Match`` header."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = tag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def not_modified(tag: str) -> Response:
+    return Response(status_code=304, headers={ETAG_HEADER: tag, "Cache-Control": CACHE_CONTROL})
+
+
+async def check_not_modified(db: AsyncSession, model, row_id: UUID, if_none_match: Optional[str]) -> Optional[Response]:
+    """A 304 if the live row's current version matches ``If-None-Match``, found by a version-only lookup."""
+    if not if_none_match:
+        return None
+    version = await db.scalar(live_version(model), {"id": row_id})
+    if version is not None and etag_matches(if_none_match, entity_tag(row_id, version)):
+        return not_modified(entity_tag(row_id, version))
+    return None
+
+
+async def check_collection_not_modified(
+    db: AsyncSession, q, model, if_none_match: Optional[str], response: Response,
+) -> Optional[Response]:
+    """
+    Tag the rows selected by ``q`` (before pagination) with their count and
+    latest ``updated_at``/``created_at``. Returns a 304 if that matches
+    ``If-None-Match``; otherwise sets the ``ETag`` on ``response``.
+    """
+    count, last_changed = (await db.execute(
+        q.with_only_columns(func.count(), func.max(func.coalesce(model.updated_at, model.created_at)))
+        .order_by(None)
+    )).one()
+    tag = f'W/"{count}.{last_changed.isoformat() if last_changed else 0}"'
+    if etag_matches(if_none_match, tag):
+        return not_modified(tag)
+    response.headers[ETAG_HEADER] = tag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return None
+
+
+def if_match_versions(if_match: Optional[str], row_id: UUID) -> Optional[List[int]]:
+    """
+    Versions of ``row_id`` that satisfy an ``If-Match`` header.
+
+    ``None`` means there is no precondition (header absent or ``*``); an empty
+    list means no listed tag can match, which callers turn into a 412.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    versions = []
+    for tag in if_match.split(","):
+        tag = tag.strip().removeprefix("W/").strip('"')
+        tag_id, _, version = tag.rpartition(".")
+        if tag_id == str(row_id) and version.isdigit():
+            versions.append(int(version))
+    return versions
+
+
+async def versioned_update(
+    db: AsyncSession, model, row_id: UUID, values: dict,
+    versions: Optional[List[int]], not_found: str,
+):
+    """
+    Apply ``values`` to a live row with one ``UPDATE ... RETURNING`` and bump its
+    version. Raises 412 when ``versions`` is given and the row has moved on,
+    404 when the row does not exist. Does not commit.
+    """
+    stmt = (
+        update(model)
+        .where(model.id == row_id, model.is_deleted == False)
+        .values(**values, version=model.version + 1)
+        .returning(model)
+        .execution_options(populate_existing=True)
+    )
+    if versions is not None:
+        stmt = stmt.where(model.version.in_(versions))
+    obj = await db.scalar(stmt)
+    if obj is None:
+        await raise_update_miss(db, model, row_id, versions, not_found)
+    return obj
+
+
+async def raise_update_miss(db: AsyncSession, model, row_id: UUID, versions, not_found: str):
+    """Tell a failed ``If-Match`` (412) apart from a missing row (404) after a conditional write hit nothing."""
+    if versions is not None and await db.scalar(live_id(model), {"id": row_id}):
+        raise HTTPException(412, "Resource was modified by someone else; fetch it again and retry")
+    raise HTTPException(404, not_found)
@@ -0,0 +1,30 @@
+"""
+``?expand=`` support for list endpoints.
+
+Each endpoint declares which relationships a client may ask for and the loader
+strategy to use: ``joinedload`` for small many-to-one rows that can ride on the
+page query, ``selectinload`` where a second ``IN (...)`` query is cheaper than
+widening every row. Relationships that are not requested are ``noload``-ed, so
+serializing the response can never fall back to one lazy load per row.
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.orm import noload
+
+Expansions = Dict[str, Tuple[object, Callable]]
+
+
+def expand_options(expand: Optional[str], expansions: Expansions) -> List:
+    """Loader options for a comma-separated ``expand`` value; 400 on unknown names."""
+    requested = {name.strip() for name in (expand or "").split(",") if name.strip()}
+    unknown = requested - expansions.keys()
+    if unknown:
+        raise HTTPException(
+            400, f"Unknown expand value(s): {', '.join(sorted(unknown))}; allowed: {', '.join(expansions)}",
+        )
+    return [
+        strategy(attr) if name in requested else noload(attr)
+        for name, (attr, strategy) in expansions.items()
+    ]
@@ -0,0 +1,283 @@
+"""
+Per-request instrumentation: latency, SQL statements and DB time, pool waits
+and response-model serialization time.
+
+Each HTTP request gets a ``RequestStats`` in a context variable. SQLAlchemy
+cursor hooks and the instrumented pools add to it; SQLAlchemy runs async-engine
+work in greenlets that inherit the caller's context, so work done on behalf of
+a request is attributed to it whichever engine ran it. ``InstrumentationMiddleware``
+turns the totals into Prometheus histograms, a ``Server-Timing`` header, a
+slow-request log and, optionally, an enforced statement budget. Statements
+slower than ``SLOW_QUERY_THRESHOLD_MS`` are logged with a normalized fingerprint
+whether or not they ran inside a request.
+"""
+
+import hashlib
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.metrics import (
+    REQUEST_DB_SECONDS, REQUEST_LATENCY, REQUEST_POOL_WAIT_SECONDS, REQUEST_SERIALIZE_SECONDS,
+    REQUEST_SQL_STATEMENTS,
+)
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger(__name__ + ".slow_query")
+
+STATEMENT_COUNT_HEADER = "X-SQL-Statements"
+
+
+@dataclass
+class RequestStats:
+    route: Optional[str] = None
+    statements: List[str] = field(default_factory=list)
+    db_seconds: float = 0.0
+    pool_wait_seconds: float = 0.0
+    serialize_seconds: float = 0.0
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+class StatementBudgetExceeded(RuntimeError):
+    pass
+
+
+@contextmanager
+def request_stats() -> Iterator[RequestStats]:
+    """Attribute SQL, pool and serialization time inside the block to a fresh ``RequestStats``."""
+    token = _current.set(RequestStats())
+    try:
+        yield _current.get()
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def count_statements() -> Iterator[List[str]]:
+    """Collect the SQL executed inside the block, e.g. ``with count_statements() as sql: ...``."""
+    with request_stats() as stats:
+        yield stats.statements
+
+
+def record_pool_wait(seconds: float) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.pool_wait_seconds += seconds
+
+
+def record_serialize(seconds: float) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.serialize_seconds += seconds
+
+
+# -- SQL fingerprints ------------------------------------------------------------
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"\$\d+(?:::\w+(?:\[\])?)?|%\(\w+\)s|%s|\?")
+_PARAM_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_ROWS = re.compile(r"(VALUES\s*\([^()]*\))(?:\s*,\s*\([^()]*\))+", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """Strip literals, parameters, ``IN`` list lengths and multi-row ``VALUES`` so equivalent statements compare equal."""
+    sql = _STRING.sub("?", statement)
+    sql = _PARAM.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PARAM_LIST.sub("(?...)", sql)
+    sql = _VALUES_ROWS.sub(r"\1, ...", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def fingerprint(statement: str) -> str:
+    return hashlib.sha1(normalize_sql(statement).encode()).hexdigest()[:12]
+
+
+# -- SQLAlchemy hooks ------------------------------------------------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.statements.append(statement)
+        stats.db_seconds += elapsed
+    if elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+        slow_query_logger.warning(
+            "slow query %.1fms route=%s fingerprint=%s sql=%s",
+            elapsed * 1000, (stats and stats.route) or "-", fingerprint(statement), normalize_sql(statement)[:1000],
+        )
+
+
+def _handle_error(exception_context) -> None:
+    # after_cursor_execute is skipped for failed statements; drop their start time.
+    conn = exception_context.connection
+    if conn is not None and exception_context.cursor is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+def install_sql_instrumentation(*engines) -> None:
+    """Hook ``engines`` (sync engines, or ``AsyncEngine.sync_engine``) into the request stats."""
+    for engine in engines:
+        if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+            event.listen(engine, "handle_error", _handle_error)
+
+
+# -- response-model serialization ----------------------------------------------
+
+class _TimedResponseField:
+    """Proxy for a route's response ``ModelField`` that times ``validate`` and ``serialize``."""
+
+    def __init__(self, field):
+        self._field = field
+
+    def __getattr__(self, name):
+        return getattr(self._field, name)
+
+    def _timed(self, method, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            record_serialize(time.perf_counter() - started)
+
+    def validate(self, *args, **kwargs):
+        return self._timed(self._field.validate, *args, **kwargs)
+
+    def serialize(self, *args, **kwargs):
+        return self._timed(self._field.serialize, *args, **kwargs)
+
+
+class InstrumentedAPIRoute(APIRoute):
+    """
+    ``APIRoute`` that labels the request's stats with its path template as soon
+    as it is matched, and counts response-model validation and serialization
+    as serialize time.
+    """
+
+    def get_route_handler(self):
+        field = self.secure_cloned_response_field
+        if field is not None and not isinstance(field, _TimedResponseField):
+            self.secure_cloned_response_field = _TimedResponseField(field)
+        handler = super().get_route_handler()
+        path = self.path
+
+        async def instrumented_handler(request):
+            stats = _current.get()
+            if stats is not None:
+                stats.route = path
+            return await handler(request)
+
+        return instrumented_handler
+
+
+# -- middleware ------------------------------------------------------------------
+
+class InstrumentationMiddleware:
+    """
+    ASGI middleware that records a ``RequestStats`` per HTTP request.
+
+    When the response starts it adds ``Server-Timing`` (``app``, ``db``,
+    ``pool`` and ``serialize`` durations) and ``X-SQL-Statements`` headers and
+    checks the optional statement ``budget``: over budget, strict mode raises
+    ``StatementBudgetExceeded`` (a 500, which test clients re-raise), otherwise
+    a warning is logged. Histograms are observed once the body has been sent,
+    so streamed responses include their full duration.
+
+    A streamed body (exports, summaries) may keep running statements after the
+    headers are out, so the budget is checked again once the body is sent.
+    There the response can no longer become a 500; strict mode still raises,
+    which the server logs and test clients re-raise. The header counts only
+    the statements run before the response started.
+    """
+
+    def __init__(self, app, budget: Optional[int] = None, strict: bool = False):
+        self.app = app
+        self.budget = budget
+        self.strict = strict
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        with request_stats() as stats:
+            over_budget = False
+
+            async def send_wrapper(message):
+                nonlocal over_budget
+                if message["type"] == "http.response.start":
+                    stats.route = _route_label(scope)
+                    over_budget = self._check_budget(scope, stats)
+                    message["headers"] = [*message.get("headers", []), *_timing_headers(stats, started)]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+                if not over_budget:
+                    self._check_budget(scope, stats)
+            finally:
+                self._observe(scope, stats, time.perf_counter() - started)
+
+    def _check_budget(self, scope, stats: RequestStats) -> bool:
+        """Raise or warn if ``stats`` is over budget; returns whether it was."""
+        count = len(stats.statements)
+        if self.budget is None or count <= self.budget:
+            return False
+        detail = f"{scope['method']} {stats.route} ran {count} SQL statements (budget {self.budget})"
+        if self.strict:
+            raise StatementBudgetExceeded(detail)
+        logger.warning(detail)
+        return True
+
+    @staticmethod
+    def _observe(scope, stats: RequestStats, elapsed: float) -> None:
+        labels = (scope["method"], stats.route or _route_label(scope))
+        REQUEST_LATENCY.labels(*labels).observe(elapsed)
+        REQUEST_SQL_STATEMENTS.labels(*labels).observe(len(stats.statements))
+        REQUEST_DB_SECONDS.labels(*labels).observe(stats.db_seconds)
+        REQUEST_POOL_WAIT_SECONDS.labels(*labels).observe(stats.pool_wait_seconds)
+        REQUEST_SERIALIZE_SECONDS.labels(*labels).observe(stats.serialize_seconds)
+        if elapsed * 1000 >= settings.SLOW_REQUEST_THRESHOLD_MS:
+            logger.warning(
+                "slow request %s %s %.1fms: %d statements, db %.1fms, pool wait %.1fms, serialize %.1fms",
+                *labels, elapsed * 1000, len(stats.statements), stats.db_seconds * 1000,
+                stats.pool_wait_seconds * 1000, stats.serialize_seconds * 1000,
+            )
+
+
+def _route_label(scope) -> str:
+    # The route template, not the raw path, so ids do not explode label cardinality.
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def _timing_headers(stats: RequestStats, started: float) -> list:
+    headers = [(STATEMENT_COUNT_HEADER.lower().encode(), str(len(stats.statements)).encode())]
+    if settings.SERVER_TIMING_ENABLED:
+        value = ", ".join((
+            f"app;dur={(time.perf_counter() - started) * 1000:.1f}",
+            f'db;dur={stats.db_seconds * 1000:.1f};desc="{len(stats.statements)} queries"',
+            f"pool;dur={stats.pool_wait_seconds * 1000:.1f}",
+            f"serialize;dur={stats.serialize_seconds * 1000:.1f}",
+        ))
+        headers.append((b"server-timing", value.encode()))
+    return headers
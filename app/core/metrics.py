@@ -0,0 +1,84 @@
+"""
+Prometheus metrics shared across the app and exported at ``/metrics``.
+"""
+
+from typing import Callable, List, Tuple
+
+from prometheus_client import REGISTRY, Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily
+
+POOL_CHECKOUT_WAIT = Histogram(
+    "erp_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+POOL_TIMEOUTS = Counter(
+    "erp_db_pool_timeouts_total",
+    "Connection checkouts that gave up after DB_POOL_TIMEOUT",
+    ["pool"],
+)
+
+# Per-request breakdown recorded by app.core.instrumentation.InstrumentationMiddleware.
+_REQUEST_LABELS = ["method", "route"]
+REQUEST_LATENCY = Histogram(
+    "erp_http_request_duration_seconds", "Request latency, to the end of the response body", _REQUEST_LABELS,
+)
+REQUEST_SQL_STATEMENTS = Histogram(
+    "erp_http_request_sql_statements", "SQL statements executed per request", _REQUEST_LABELS,
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 250),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "erp_http_request_db_seconds", "Time per request spent executing SQL", _REQUEST_LABELS,
+)
+REQUEST_POOL_WAIT_SECONDS = Histogram(
+    "erp_http_request_pool_wait_seconds", "Time per request spent waiting for pooled connections", _REQUEST_LABELS,
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+REQUEST_SERIALIZE_SECONDS = Histogram(
+    "erp_http_request_serialize_seconds", "Time per request spent validating/serializing the response model",
+    _REQUEST_LABELS,
+)
+
+
+class PoolCollector:
+    """Reports live pool occupancy for every registered engine at scrape time."""
+
+    def __init__(self):
+        self._engines: List[Tuple[str, object]] = []
+
+    def add(self, name: str, engine) -> None:
+        self._engines.append((name, engine))
+
+    def collect(self):
+        in_use = GaugeMetricFamily("erp_db_pool_in_use", "Connections currently checked out", labels=["pool"])
+        idle = GaugeMetricFamily("erp_db_pool_idle", "Connections idle in the pool", labels=["pool"])
+        overflow = GaugeMetricFamily("erp_db_pool_overflow", "Connections open beyond pool_size", labels=["pool"])
+        for name, engine in self._engines:
+            # Engine.pool is replaced on dispose(), so always read it fresh. NullPool has no counters.
+            pool = engine.pool
+            if not hasattr(pool, "checkedout"):
+                continue
+            in_use.add_metric([name], pool.checkedout())
+            idle.add_metric([name], pool.checkedin())
+            overflow.add_metric([name], max(pool.overflow(), 0))
+        yield in_use
+        yield idle
+        yield overflow
+
+
+class StatsCollector:
+    """Exposes each numeric value of ``stats()`` as a gauge named ``<prefix>_<key>``."""
+
+    def __init__(self, prefix: str, documentation: str, stats: Callable[[], dict]):
+        self.prefix = prefix
+        self.documentation = documentation
+        self.stats = stats
+
+    def collect(self):
+        for key, value in self.stats().items():
+            yield GaugeMetricFamily(f"{self.prefix}_{key}", self.documentation, value=value)
+
+
+pool_collector = PoolCollector()
+REGISTRY.register(pool_collector)
@@ -0,0 +1,220 @@
+"""
+Server-side revocation of access tokens by their ``jti`` claim.
+
+Revoked ids live in a Redis sorted set scored by the token's ``exp``, so the
+set only ever holds tokens that could still be presented. Every worker keeps
+an in-process Bloom filter of that set: a token whose ``jti`` the filter has
+never seen, which is nearly every token, is accepted without any network
+I/O. Only a filter hit is confirmed against Redis, which also weeds out the
+filter's false positives. The client is synchronous (the listener thread
+blocks on it), so the async checks run their Redis calls in a worker thread.
+
+A revocation is added to the sorted set and published on a channel. Each
+worker's listener thread adds published ids to its own filter, and reloads
+the whole set every ``TOKEN_REVOCATION_REFRESH_SECONDS``. The reload drops
+expired ids, which a Bloom filter cannot remove in place, and catches any
+message missed while the listener was disconnected. Without ``REDIS_URL``
+revocations are kept in process and only apply to the worker that made
+them.
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+import redis
+from fastapi import HTTPException
+from prometheus_client import REGISTRY
+
+from app.core.config import settings
+from app.core.metrics import StatsCollector
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings: no false negatives, ``error_rate`` false positives at ``capacity``."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from the two halves of one digest.
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str) -> None:
+        with self._lock:
+            for pos in self._positions(item):
+                self._bits[pos >> 3] |= 1 << (pos & 7)
+            self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class TokenRevocationList:
+    KEY = "auth:revoked"
+    CHANNEL = "auth:revoked"
+    # Bounds how long stop() waits and how stale the refresh timer can get.
+    POLL_INTERVAL = 1.0
+    RETRY_INTERVAL = 5.0
+    # How long startup waits for the first load before serving anyway.
+    LOAD_TIMEOUT = 2.0
+
+    def __init__(self, capacity: int, error_rate: float, refresh_seconds: int, redis_url: Optional[str] = None):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_seconds = refresh_seconds
+        self._redis = redis.Redis.from_url(redis_url) if redis_url else None
+        self._filter = BloomFilter(capacity, error_rate)
+        self._local: Dict[str, float] = {}  # jti -> exp, used when there is no Redis
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._loaded = threading.Event()
+        self._lock = threading.Lock()
+        self.checks = 0
+        self.filter_hits = 0
+        self.revoked_hits = 0
+        self.revocations = 0
+
+    # -- checks ----------------------------------------------------------------
+
+    async def is_revoked(self, jti: Optional[str]) -> bool:
+        """
+        Whether the token carrying ``jti`` was revoked. Tokens issued before the
+        claim existed cannot be revoked and simply run out. If Redis cannot
+        confirm a filter hit, the token is treated as revoked.
+        """
+        if jti is None:
+            return False
+        self._count("checks")
+        if jti not in self._filter:
+            return False
+        self._count("filter_hits")
+
+        if self._redis is None:
+            revoked = self._local.get(jti, 0) > time.time()
+        else:
+            try:
+                exp = await asyncio.to_thread(self._redis.zscore, self.KEY, jti)
+            except redis.RedisError as exc:
+                logger.warning("Token revocation Redis lookup failed, rejecting token: %s", exc)
+                exp = math.inf
+            revoked = exp is not None and exp > time.time()
+        if revoked:
+            self._count("revoked_hits")
+        return revoked
+
+    async def revoke(self, jti: str, exp: float) -> None:
+        """Revoke ``jti`` until ``exp`` (unix time), on every worker."""
+        self._count("revocations")
+        if self._redis is None:
+            with self._lock:
+                now = time.time()
+                live = {key: until for key, until in self._local.items() if until > now}
+                live[jti] = exp
+                self._local = live
+                self._replace_filter(live)
+            return
+        self._filter.add(jti)
+        try:
+            await asyncio.to_thread(self._store, jti, exp)
+        except redis.RedisError as exc:
+            logger.error("Token revocation Redis write failed: %s", exc)
+            raise HTTPException(503, "Could not revoke the token, retry shortly")
+
+    def _store(self, jti: str, exp: float) -> None:
+        pipe = self._redis.pipeline()
+        pipe.zadd(self.KEY, {jti: exp})
+        pipe.zremrangebyscore(self.KEY, "-inf", time.time())
+        pipe.publish(self.CHANNEL, jti)
+        pipe.execute()
+
+    # -- propagation -----------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the listener thread and wait briefly for the initial load."""
+        if self._redis is None or self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._listen, name="token-revocations", daemon=True)
+        self._thread.start()
+        if not self._loaded.wait(self.LOAD_TIMEOUT):
+            logger.warning("Revoked tokens not loaded within %.1fs; continuing", self.LOAD_TIMEOUT)
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+
+    def _listen(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                with self._redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    # Subscribe before loading, so nothing published in between is lost.
+                    pubsub.subscribe(self.CHANNEL)
+                    self._reload()
+                    refreshed = time.monotonic()
+                    while not self._stopping.is_set():
+                        message = pubsub.get_message(timeout=self.POLL_INTERVAL)
+                        if message is not None and message["type"] == "message":
+                            self._filter.add(message["data"].decode())
+                        if time.monotonic() - refreshed >= self.refresh_seconds:
+                            self._reload()
+                            refreshed = time.monotonic()
+            except redis.RedisError as exc:
+                logger.warning("Token revocation listener lost Redis, retrying: %s", exc)
+                self._stopping.wait(self.RETRY_INTERVAL)
+
+    def _reload(self) -> None:
+        """Rebuild the filter from the live entries in Redis."""
+        self._redis.zremrangebyscore(self.KEY, "-inf", time.time())
+        self._replace_filter(jti.decode() for jti in self._redis.zrange(self.KEY, 0, -1))
+        self._loaded.set()
+
+    def _replace_filter(self, jtis: Iterable[str]) -> None:
+        fresh = BloomFilter(self.capacity, self.error_rate)
+        for jti in jtis:
+            fresh.add(jti)
+        # Requests keep reading the old filter until this single assignment.
+        self._filter = fresh
+
+    # -- metrics ---------------------------------------------------------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "checks": self.checks,
+                "filter_hits": self.filter_hits,
+                "revoked_hits": self.revoked_hits,
+                "revocations": self.revocations,
+                "filter_size": self._filter.count,
+            }
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+token_revocations = TokenRevocationList(
+    capacity=settings.TOKEN_REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.TOKEN_REVOCATION_BLOOM_ERROR_RATE,
+    refresh_seconds=settings.TOKEN_REVOCATION_REFRESH_SECONDS,
+    redis_url=settings.REDIS_URL,
+)
+REGISTRY.register(StatsCollector(
+    "erp_token_revocation", "Access token revocation checks", token_revocations.stats,
+))
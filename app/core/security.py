@@ -1,5 +1,9 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+from uuid import uuid4
 from jose import jwt
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, OAuth2PasswordBearer
@@ -7,9 +11,17 @@ from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 
 
+from app.core.config import settings
+from app.db.statements import LIVE_USER_BY_EMAIL
 from app.models import User
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 
@@ -17,20 +29,66 @@ SECRET_KEY = "jhwnxwuuacnxncueycxhcexjhnerjmhxcvyrcmxnpibj"
 ALGORITHM = "HS256"
 
 
+class PasswordHashPool:
+    """
+    Bounded pool for Argon2 work, kept apart from the request threadpool.
+
+    argon2-cffi releases the GIL while hashing, so threads give real
+    parallelism. At most ``max_pending`` jobs may be running or queued; past
+    that, callers get a 503 instead of piling up behind a login burst.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="argon2")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self.max_pending = max_pending
+        self.rejected = 0
+
+    def submit(self, fn, *args) -> Future:
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Too many concurrent authentication requests, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+
+password_pool = PasswordHashPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
+
+
 def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+    return password_pool.submit(pwd_context.verify, plain, hashed).result()
+
+def verify_and_update_password(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """Verify ``plain``; also return a fresh hash when ``hashed`` uses outdated parameters."""
+    return password_pool.submit(pwd_context.verify_and_update, plain, hashed).result()
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_pool.submit(pwd_context.hash, password).result()
+
+async def verify_and_update_password_async(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    return await asyncio.wrap_future(password_pool.submit(pwd_context.verify_and_update, plain, hashed))
+
+async def get_password_hash_async(password: str) -> str:
+    return await asyncio.wrap_future(password_pool.submit(pwd_context.hash, password))
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
-    to_encode.update({"exp": expire})
+    # ``jti`` names this one token, so it can be revoked on its own (see app.core.revocation).
+    to_encode.update({"exp": expire, "jti": uuid4().hex})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+def decode_access_token(token: str) -> dict:
+    """Claims of a token issued by ``create_access_token``; raises ``JWTError`` if invalid or expired."""
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
 def get_user_by_email(db: Session, email: str) -> Optional[User]: 
-    return db.query(User).filter(User.email == email, User.is_deleted == False).first()
+    return db.scalar(LIVE_USER_BY_EMAIL, {"email": email})
 
 def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
     user = get_user_by_email(db, email)
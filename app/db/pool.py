@@ -0,0 +1,33 @@
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.instrumentation import record_pool_wait
+from app.core.metrics import POOL_CHECKOUT_WAIT, POOL_TIMEOUTS
+
+
+class _InstrumentedPoolMixin:
+    """Time every checkout so pool waits can be told apart from query time."""
+
+    metrics_label = "default"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS.labels(self.metrics_label).inc()
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            POOL_CHECKOUT_WAIT.labels(self.metrics_label).observe(waited)
+            record_pool_wait(waited)
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    metrics_label = "sync"
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    metrics_label = "async"
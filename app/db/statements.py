@@ -0,0 +1,39 @@
+"""
+Prebuilt statements for the lookups that run on almost every request.
+
+Each statement is constructed once, with ``bindparam`` placeholders, and
+executed with a parameter dict, e.g. ``await db.scalar(USER_BY_ID, {"id": user_id})``.
+A call then skips building the ``select()``, and the statement's cache key is
+memoized on the object, so finding its SQL in the engine's compiled cache is a
+dict lookup instead of a traversal of a freshly built statement. asyncpg
+additionally keeps each connection's prepared statements for the identical
+SQL (``DB_PREPARED_STATEMENT_CACHE_SIZE``).
+"""
+
+from functools import lru_cache
+
+from sqlalchemy import bindparam, select
+
+from app.models.User import User
+
+USER_BY_ID = select(User).where(User.id == bindparam("id"), User.is_deleted == False)
+USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+LIVE_USER_BY_EMAIL = USER_BY_EMAIL.where(User.is_deleted == False)
+
+
+@lru_cache(maxsize=None)
+def live_by_id(model):
+    """``SELECT <model> WHERE id = :id AND NOT is_deleted``."""
+    return select(model).where(model.id == bindparam("id"), model.is_deleted == False)
+
+
+@lru_cache(maxsize=None)
+def live_id(model):
+    """Existence check: ``SELECT id WHERE id = :id AND NOT is_deleted``."""
+    return select(model.id).where(model.id == bindparam("id"), model.is_deleted == False)
+
+
+@lru_cache(maxsize=None)
+def live_version(model):
+    """Version-only lookup used by conditional GETs."""
+    return select(model.version).where(model.id == bindparam("id"), model.is_deleted == False)
@@ -9,6 +9,11 @@ from app.models.base import BaseModel
 from sqlalchemy.orm import relationship
 class User(BaseModel):
     __tablename__ = "users"
+    # Not versioned by the ORM: logins and lockouts write this row all the time,
+    # and none of those writes is a client edit that could be lost. ``version`` is
+    # the principal generation instead, bumped only when role, is_active or
+    # is_deleted change (see app.core.cache.PrincipalCache).
+    __mapper_args__ = {}
 
     # Basic Info
     name = Column(String(100), nullable=False, index=True)
@@ -17,7 +22,7 @@ class User(BaseModel):
     
     # Role & Status
     role = Column(SQLEnum(UserRole), nullable=False, index=True)
-    is_active = Column(Boolean, default=True, nullable=False, index=True)
+    is_active = Column(Boolean, default=True, nullable=False)
     is_superuser = Column(Boolean, default=False, nullable=False)
     
     # Contact
@@ -40,7 +45,7 @@ class User(BaseModel):
     
     # Relationships
     employee_profile = relationship("Employee", back_populates="user", uselist=False)
-    created_sales = relationship("Sale", back_populates="creator", foreign_keys="Sale.created_by")
+    # created_sales = relationship("Sale", back_populates="creator", foreign_keys="Sale.created_by")
     # assigned_leads = relationship("Lead", back_populates="sales_rep", foreign_keys="Lead.assigned_to")
     # assigned_tickets = relationship("Ticket", back_populates="assignee", foreign_keys="Ticket.assigned_to")
     
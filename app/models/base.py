@@ -1,24 +1,41 @@
 import uuid
 from sqlalchemy import (
     Column, Boolean , DateTime,
-    Integer
+    Integer, text
 )
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import declared_attr
 from sqlalchemy.sql import func
 from app.db.db import Base
 
+# Predicate for partial indexes that serve the API's ``is_deleted == False`` filters.
+# Soft-deleted rows are never listed, so neither ``is_deleted`` nor ``created_at``
+# carries an index of its own: each table indexes its live rows per query shape.
+LIVE_ROWS = text("is_deleted = false")
+
+# Values that soft-delete a row in a set-based UPDATE (see ``etag.versioned_update``).
+SOFT_DELETE = {"is_deleted": True, "deleted_at": func.now()}
+
 class BaseModel(Base):
     __abstract__ = True
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    created_at = Column(DateTime, server_default=func.now(), nullable=False, index=True)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, onupdate=func.now())
 
-    is_deleted = Column(Boolean, default=False, nullable=False, index=True)
+    is_deleted = Column(Boolean, default=False, nullable=False)
     deleted_at = Column(DateTime)
     
     version = Column(Integer, default=1, nullable=False)
 
+    @declared_attr
+    def __mapper_args__(cls):
+        # ORM flushes emit UPDATE ... WHERE version = :loaded and bump it, raising
+        # StaleDataError instead of silently overwriting a concurrent change. API
+        # writes use conditional Core UPDATEs (etag.versioned_update) instead, so
+        # a lost race becomes a 404/412 rather than an exception at flush.
+        return {"version_id_col": cls.version}
+
     def soft_delete(self):
         self.is_deleted = True
         self.deleted_at = func.now()
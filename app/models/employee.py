@@ -1,16 +1,17 @@
+import uuid
 from enum import Enum
 from datetime import datetime, date
 from decimal import Decimal
 from sqlalchemy import (
-    Column, String, Boolean, Enum as SQLEnum, Index, DateTime,
+    Column, String, Boolean, Enum as SQLEnum, Index, DateTime, Integer,
      ForeignKey, CheckConstraint, Text, Date, Numeric,
-    UniqueConstraint
+    UniqueConstraint, PrimaryKeyConstraint, Computed, DDL, event, text
 )
 from sqlalchemy.sql import func
 from sqlalchemy.orm import declarative_base, relationship
-from sqlalchemy.dialects.postgresql import UUID, ARRAY, JSON
+from sqlalchemy.dialects.postgresql import UUID, ARRAY, JSON, DATERANGE, ExcludeConstraint
 from app.db.db import Base
-from pydantic import BaseModel
+from app.models.base import LIVE_ROWS, BaseModel
 
 from app.models.EmunType import EmploymentType
 
@@ -31,6 +32,25 @@ class Department(BaseModel):
     parent = relationship("Department", remote_side="Department.id", backref="sub_departments")
     manager = relationship("User")
 
+    __table_args__ = (
+        Index("idx_departments_live_created", "created_at", "id", postgresql_where=LIVE_ROWS),
+    )
+
+class DepartmentClosure(Base):
+    """
+    Transitive closure of the department tree: one row per ancestor/descendant
+    pair, including each department paired with itself at depth 0.
+    """
+    __tablename__ = "department_closure"
+
+    ancestor_id = Column(ForeignKey("departments.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = Column(ForeignKey("departments.id", ondelete="CASCADE"), primary_key=True)
+    depth = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("idx_department_closure_descendant", "descendant_id", "depth"),
+    )
+
 class Employee(BaseModel):
     """
     Employee HR records linked to User accounts.
@@ -78,7 +98,7 @@ class Employee(BaseModel):
     documents = Column(JSON, default=[])
     
     # Status
-    is_active = Column(Boolean, default=True, nullable=False, index=True)
+    is_active = Column(Boolean, default=True, nullable=False)
     
     # Relationships
     user = relationship("User", back_populates="employee_profile")
@@ -89,16 +109,40 @@ class Employee(BaseModel):
     __table_args__ = (
         CheckConstraint("current_salary >= 0", name="ck_employee_salary"),
         CheckConstraint("annual_leave_balance >= 0", name="ck_annual_leave"),
-        Index("idx_employees_active", "is_active"),
+        # Backs the departments FK (ON DELETE SET NULL), which has no is_deleted filter
         Index("idx_employees_department", "department_id"),
+        Index("idx_employees_live_created", "created_at", "id", postgresql_where=LIVE_ROWS),
+        Index("idx_employees_live_department", "department_id", "created_at", "id", postgresql_where=LIVE_ROWS),
+    )
+
+class EmployeeClosure(Base):
+    """
+    Transitive closure of the reporting chain (``Employee.manager_id``): one row
+    per manager/report pair, including each employee with itself at depth 0.
+    """
+    __tablename__ = "employee_closure"
+
+    ancestor_id = Column(ForeignKey("employees.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = Column(ForeignKey("employees.id", ondelete="CASCADE"), primary_key=True)
+    depth = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("idx_employee_closure_descendant", "descendant_id", "depth"),
     )
 
 class Attendance(BaseModel):
-    """Daily attendance records with check-in/check-out"""
+    """
+    Daily attendance records with check-in/check-out.
+
+    Range-partitioned by month on ``attendance_date`` (see
+    ``app.services.partitions``), so the partition key is part of the
+    primary key; queries that filter on the date only touch the months
+    they cover.
+    """
     __tablename__ = "attendances"
 
-    employee_id = Column(ForeignKey("employees.id", ondelete="CASCADE"), nullable=False, index=True)
-    attendance_date = Column(Date, nullable=False, index=True)
+    employee_id = Column(ForeignKey("employees.id", ondelete="CASCADE"), nullable=False)
+    attendance_date = Column(Date, primary_key=True)
     
     check_in = Column(DateTime)
     check_out = Column(DateTime)
@@ -118,9 +162,48 @@ class Attendance(BaseModel):
     employee = relationship("Employee", back_populates="attendances")
     
     __table_args__ = (
+        PrimaryKeyConstraint("id", "attendance_date"),
+        # Also backs the employees FK (ON DELETE CASCADE)
         UniqueConstraint("employee_id", "attendance_date", name="uq_attendance_employee_date"),
         CheckConstraint("worked_hours >= 0", name="ck_worked_hours"),
-        Index("idx_attendance_date", "attendance_date"),
+        Index(
+            "idx_attendance_live_employee_date", "employee_id", text("attendance_date DESC"), text("id DESC"),
+            postgresql_where=LIVE_ROWS,
+        ),
+        Index("idx_attendance_live_date", text("attendance_date DESC"), text("id DESC"), postgresql_where=LIVE_ROWS),
+        {"postgresql_partition_by": "RANGE (attendance_date)"},
+    )
+
+# Catches rows outside every monthly partition; normally empty.
+event.listen(
+    Attendance.__table__, "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS attendances_default PARTITION OF attendances DEFAULT").execute_if(
+        dialect="postgresql",
+    ),
+)
+
+class AttendanceMonthlyRollup(Base):
+    """
+    Per-employee, per-month attendance totals. Maintained incrementally from
+    every attendance write; rebuilt from ``attendances`` to reconcile drift.
+    """
+    __tablename__ = "attendance_monthly_rollups"
+
+    employee_id = Column(ForeignKey("employees.id", ondelete="CASCADE"), primary_key=True)
+    month = Column(Date, primary_key=True)  # first day of the month
+
+    days_recorded = Column(Integer, nullable=False, default=0)
+    days_present = Column(Integer, nullable=False, default=0)
+    days_absent = Column(Integer, nullable=False, default=0)
+    late_count = Column(Integer, nullable=False, default=0)
+    half_day_count = Column(Integer, nullable=False, default=0)
+    worked_hours = Column(Numeric(8, 2), nullable=False, default=0)
+    overtime_hours = Column(Numeric(8, 2), nullable=False, default=0)
+
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("idx_attendance_rollup_month", "month"),
     )
 
 class LeaveRequest(BaseModel):
@@ -140,6 +223,9 @@ class LeaveRequest(BaseModel):
     approved_by = Column(ForeignKey("users.id", ondelete="SET NULL"))
     approved_at = Column(DateTime)
     rejection_reason = Column(Text)
+
+    # Inclusive [start_date, end_date] range, maintained by Postgres for GiST overlap lookups
+    period = Column(DATERANGE, Computed("daterange(start_date, end_date, '[]')", persisted=True))
     
     # Relationships
     employee = relationship("Employee")
@@ -148,6 +234,51 @@ class LeaveRequest(BaseModel):
     __table_args__ = (
         CheckConstraint("end_date >= start_date", name="ck_leave_dates"),
         CheckConstraint("days_count > 0", name="ck_leave_days"),
-        Index("idx_leave_status", "status"),
-        Index("idx_leave_dates", "start_date", "end_date"),
-    )
\ No newline at end of file
+        # An employee cannot hold two live (pending/approved) requests for overlapping days
+        ExcludeConstraint(
+            ("employee_id", "="), ("period", "&&"),
+            name="ex_leave_no_overlap", using="gist",
+            where=text("NOT is_deleted AND status IN ('pending', 'approved')"),
+        ),
+        Index("idx_leave_period", "period", postgresql_using="gist"),
+        Index("idx_leave_live_created", text("created_at DESC"), text("id DESC"), postgresql_where=LIVE_ROWS),
+        Index(
+            "idx_leave_live_status_created", "status", text("created_at DESC"), text("id DESC"),
+            postgresql_where=LIVE_ROWS,
+        ),
+        Index(
+            "idx_leave_live_employee_created", "employee_id", text("created_at DESC"), text("id DESC"),
+            postgresql_where=LIVE_ROWS,
+        ),
+    )
+
+
+# GiST on a uuid equality column (ex_leave_no_overlap) needs btree_gist
+event.listen(
+    LeaveRequest.__table__, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist").execute_if(dialect="postgresql"),
+)
+
+
+class LeaveLedgerEntry(Base):
+    """
+    Append-only log of leave balance movements. ``balance_after`` is the
+    employee's balance for ``leave_type`` right after the entry was applied.
+    """
+    __tablename__ = "leave_ledger"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    employee_id = Column(ForeignKey("employees.id", ondelete="CASCADE"), nullable=False)
+    leave_request_id = Column(ForeignKey("leave_requests.id", ondelete="SET NULL"))
+    leave_type = Column(String(50), nullable=False)
+
+    delta = Column(Numeric(5, 2), nullable=False)  # negative = debit
+    balance_after = Column(Numeric(5, 2), nullable=False)
+    entry_type = Column(String(20), nullable=False)  # opening (backfill), approval, reversal
+
+    created_by = Column(ForeignKey("users.id", ondelete="SET NULL"))
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("idx_leave_ledger_employee", "employee_id", "created_at"),
+    )
@@ -5,12 +5,10 @@ from decimal import Decimal
 from typing import Optional, List, Any
 from pydantic import BaseModel, EmailStr, Field, field_validator
 
-from models import EmploymentType
-
-
 from app.models.EmunType import EmploymentType
 
 from app.schema.base import UUIDModel , AuditMixin
+from app.schema.user_schema import UserShort
 
 
 
@@ -37,6 +35,11 @@ class DepartmentOut(UUIDModel, AuditMixin):
     description: Optional[str] = None
     is_active: bool
 
+class DepartmentExpandedOut(DepartmentOut):
+    # Filled only for relations named in ?expand=; null otherwise.
+    parent: Optional[DepartmentOut] = None
+    manager: Optional[UserShort] = None
+
 
 
 
@@ -86,6 +89,11 @@ class EmployeeOut(UUIDModel, AuditMixin):
     casual_leave_balance: Decimal
     is_active: bool
 
+class EmployeeExpandedOut(EmployeeOut):
+    user: Optional[UserShort] = None
+    department: Optional[DepartmentOut] = None
+    manager: Optional[EmployeeOut] = None
+
 
 
 
@@ -121,6 +129,35 @@ class AttendanceOut(UUIDModel, AuditMixin):
     is_half_day: bool
     notes: Optional[str] = None
 
+class AttendanceExpandedOut(AttendanceOut):
+    employee: Optional[EmployeeOut] = None
+
+class AttendanceSummaryRow(BaseModel):
+    employee_id: Optional[UUID] = None
+    department_id: Optional[UUID] = None
+    period_start: date
+    days_recorded: int
+    days_present: int
+    days_absent: int
+    late_count: int
+    half_day_count: int
+    worked_hours: Decimal
+    overtime_hours: Decimal
+    absence_rate: float
+
+class AttendanceBulkRowResult(BaseModel):
+    index: int
+    status: str  # created, updated, duplicate, invalid
+    id: Optional[UUID] = None
+    error: Optional[str] = None
+
+class AttendanceBulkResult(BaseModel):
+    created: int = 0
+    updated: int = 0
+    duplicate: int = 0
+    invalid: int = 0
+    rows: List[AttendanceBulkRowResult] = []
+
 
 
 class LeaveRequestCreate(BaseModel):
@@ -146,3 +183,7 @@ class LeaveRequestOut(UUIDModel, AuditMixin):
     approved_by: Optional[UUID] = None
     approved_at: Optional[datetime] = None
     rejection_reason: Optional[str] = None
+
+class LeaveRequestExpandedOut(LeaveRequestOut):
+    employee: Optional[EmployeeOut] = None
+    approver: Optional[UserShort] = None
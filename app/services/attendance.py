@@ -0,0 +1,332 @@
+"""
+Attendance paths that work on many rows at once: bulk writes and aggregates.
+"""
+
+import codecs
+import csv
+import json
+from datetime import date, timedelta
+from types import SimpleNamespace
+from typing import AsyncIterator, List, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, Request
+from sqlalchemy import Date, cast, func, literal, literal_column, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.employee import Attendance, AttendanceMonthlyRollup, Employee
+from app.db.db import AsyncSessionLocal
+from app.schema.employee_schema import AttendanceBulkRowResult, AttendanceCreate, AttendanceSummaryRow
+from app.services.attendance_rollup import ROLLUP_COUNTERS, RollupDelta, aggregate_columns
+from app.services.shift_rules import ShiftPolicy
+
+JSON_TYPES = ("application/json",)
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+CSV_TYPES = ("text/csv", "application/csv")
+
+# Columns refreshed from the incoming row when mode=upsert hits an existing record.
+UPSERT_COLUMNS = (
+    "check_in", "check_out", "worked_hours", "overtime_hours",
+    "is_present", "is_late", "is_half_day", "notes",
+)
+
+# Everything the monthly rollups need to know about a row.
+_ROLLUP_SOURCE = (
+    Attendance.employee_id, Attendance.attendance_date, Attendance.is_present,
+    Attendance.is_late, Attendance.is_half_day, Attendance.worked_hours, Attendance.overtime_hours,
+)
+
+
+async def iter_bulk_rows(request: Request) -> AsyncIterator[Tuple[int, object]]:
+    """
+    Yield ``(index, raw_row)`` pairs from a JSON array, NDJSON or CSV body.
+
+    NDJSON and CSV are parsed line by line as the body streams in, so rows
+    reach the database before the upload has finished. A line that cannot be
+    parsed is yielded as the exception instead of a dict.
+    """
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip().lower()
+
+    if content_type in JSON_TYPES:
+        try:
+            rows = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(400, "Malformed JSON body")
+        if not isinstance(rows, list):
+            raise HTTPException(400, "Expected a JSON array of attendance records")
+        for index, row in enumerate(rows):
+            yield index, row
+        return
+
+    if content_type not in NDJSON_TYPES + CSV_TYPES:
+        raise HTTPException(415, f"Unsupported content type: {content_type}")
+
+    is_csv = content_type in CSV_TYPES
+    lines = _iter_csv_records(_iter_lines(request)) if is_csv else _iter_lines(request)
+    header = None
+    index = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        if is_csv and header is None:
+            try:
+                header = next(csv.reader(line.splitlines(keepends=True), strict=True))
+            except csv.Error:
+                raise HTTPException(400, "Malformed CSV header")
+            continue
+        try:
+            if is_csv:
+                # Empty CSV cells mean "not provided", not an empty string.
+                cells = next(csv.reader(line.splitlines(keepends=True), strict=True))
+                row = {k: v for k, v in zip(header, cells) if v != ""}
+            else:
+                row = json.loads(line)
+        except (ValueError, csv.Error) as exc:
+            row = exc
+        yield index, row
+        index += 1
+
+
+async def _iter_lines(request: Request) -> AsyncIterator[str]:
+    """Physical lines of the body, newlines kept; multibyte characters may span chunks."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    async for chunk in request.stream():
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line + "\n"
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+
+async def _iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Join physical lines into whole CSV records: a quoted field may contain
+    newlines, and a record is complete once its quotes balance (an escaped
+    quote is written as two).
+    """
+    record = ""
+    async for line in lines:
+        record += line
+        if record.count('"') % 2 == 0:
+            yield record
+            record = ""
+    if record:
+        yield record  # unterminated quote; the strict csv.reader in iter_bulk_rows rejects it
+
+
+async def write_attendance_batch(
+    db: AsyncSession, batch: List[Tuple[int, AttendanceCreate]], mode: str = "skip",
+) -> List[AttendanceBulkRowResult]:
+    """
+    Write one batch with a single multi-row ``INSERT ... ON CONFLICT`` on
+    ``uq_attendance_employee_date`` and report the outcome of every row.
+
+    ``mode="skip"`` leaves existing records untouched; ``mode="upsert"``
+    overwrites their punch data. Rows for unknown employees are rejected up
+    front so one bad id cannot abort the whole batch on the foreign key. The
+    monthly rollups receive the batch's net change as one more upsert.
+    """
+    employee_ids = {row.employee_id for _, row in batch}
+    known = set(await db.scalars(
+        select(Employee.id).where(Employee.id.in_(employee_ids), Employee.is_deleted == False)
+    ))
+
+    policy = ShiftPolicy.from_settings()
+    results = []
+    values = []
+    pending = {}
+    for index, row in batch:
+        if row.employee_id not in known:
+            results.append(AttendanceBulkRowResult(index=index, status="invalid", error="Employee not found"))
+            continue
+        worked, overtime = policy.compute(row.check_in, row.check_out)
+        values.append({**row.model_dump(), "worked_hours": worked, "overtime_hours": overtime or 0})
+        pending[(row.employee_id, row.attendance_date)] = index
+    if not values:
+        return results
+
+    delta = RollupDelta()
+    if mode == "upsert":
+        # Lock and remember the rows about to be overwritten so their old
+        # contribution can be taken back out of the rollups.
+        previous = await db.execute(
+            select(*_ROLLUP_SOURCE)
+            .where(
+                tuple_(Attendance.employee_id, Attendance.attendance_date).in_(list(pending)),
+                Attendance.is_deleted == False,
+            )
+            .with_for_update()
+        )
+        for row in previous:
+            delta.add(row, -1)
+
+    stmt = pg_insert(Attendance).values(values)
+    if mode == "upsert":
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_attendance_employee_date",
+            set_={
+                **{name: stmt.excluded[name] for name in UPSERT_COLUMNS},
+                "updated_at": func.now(),
+                "version": Attendance.version + 1,
+            },
+            where=Attendance.is_deleted == False,
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(constraint="uq_attendance_employee_date")
+    # xmax is 0 only for tuples created by this statement, which tells inserts from updates.
+    stmt = stmt.returning(
+        Attendance.id, *_ROLLUP_SOURCE, literal_column("(xmax = 0)").label("inserted"),
+    )
+
+    for row in await db.execute(stmt):
+        index = pending.pop((row.employee_id, row.attendance_date))
+        delta.add(row)
+        results.append(AttendanceBulkRowResult(
+            index=index, status="created" if row.inserted else "updated", id=row.id,
+        ))
+    await delta.apply(db)
+    await db.commit()
+
+    # Whatever was not returned hit an existing (or soft-deleted) record.
+    for index in pending.values():
+        results.append(AttendanceBulkRowResult(
+            index=index, status="duplicate", error="Attendance record for this date already exists",
+        ))
+    return results
+
+
+async def update_attendance_record(
+    db: AsyncSession, att_id: UUID, changes: dict, versions: Optional[List[int]] = None,
+) -> Optional[Attendance]:
+    """
+    Apply a PATCH to one attendance record with a single ``UPDATE ... RETURNING``.
+
+    A locking CTE hands the row's previous rollup contribution back in the same
+    statement, and derived hours are recomputed in SQL from the effective
+    punches (the rule ``ShiftPolicy.apply`` uses for inserts). Returns ``None``
+    if no live record matches ``att_id`` (and one of ``versions``, when given);
+    otherwise applies the rollup delta and commits.
+    """
+    old = select(Attendance.id, *_ROLLUP_SOURCE).where(Attendance.id == att_id, Attendance.is_deleted == False)
+    if versions is not None:
+        old = old.where(Attendance.version.in_(versions))
+    old = old.with_for_update().cte("old")
+
+    def effective(name):
+        column = getattr(Attendance, name)
+        return literal(changes[name], column.type) if name in changes else column
+
+    policy = ShiftPolicy.from_settings()
+    check_in, check_out = effective("check_in"), effective("check_out")
+    values = {
+        **changes,
+        "worked_hours": func.coalesce(policy.worked_hours_sql(check_in, check_out), effective("worked_hours")),
+        "overtime_hours": func.coalesce(policy.overtime_hours_sql(check_in, check_out), effective("overtime_hours")),
+        "version": Attendance.version + 1,
+    }
+    row = (await db.execute(
+        update(Attendance)
+        .where(Attendance.id == old.c.id, Attendance.attendance_date == old.c.attendance_date)
+        .values(**values)
+        .returning(Attendance, *(old.c[c.key].label(f"old_{c.key}") for c in _ROLLUP_SOURCE))
+        .execution_options(populate_existing=True)
+    )).one_or_none()
+    if row is None:
+        return None
+
+    att = row[0]
+    delta = RollupDelta()
+    delta.add(SimpleNamespace(**{c.key: row._mapping[f"old_{c.key}"] for c in _ROLLUP_SOURCE}), -1)
+    delta.add(att)
+    await delta.apply(db)
+    await db.commit()
+    return att
+
+
+SUMMARY_PERIODS = ("day", "week", "month")
+SUMMARY_GROUPS = ("employee", "department")
+
+
+def summary_statement(
+    group_by: str, period: str, start_date: date, end_date: date,
+    employee_id: Optional[UUID] = None, department_id: Optional[UUID] = None,
+):
+    """
+    One ``GROUP BY`` over the requested date range: attendance is bucketed with
+    ``date_trunc`` and aggregated per employee or department entirely in SQL.
+    Monthly summaries over whole calendar months read the rollup table instead.
+    """
+    if period == "month" and start_date.day == 1 and (end_date + timedelta(days=1)).day == 1:
+        return _rollup_summary_statement(group_by, start_date, end_date, employee_id, department_id)
+
+    # period is validated against SUMMARY_PERIODS; inlining it keeps the SELECT
+    # and GROUP BY expressions identical, which a bound parameter would not.
+    bucket = cast(func.date_trunc(literal_column(f"'{period}'"), Attendance.attendance_date), Date)
+    key = Attendance.employee_id if group_by == "employee" else Employee.department_id
+
+    stmt = (
+        select(
+            key.label(f"{group_by}_id"),
+            bucket.label("period_start"),
+            *aggregate_columns(),
+        )
+        .where(
+            Attendance.is_deleted == False,
+            Attendance.attendance_date >= start_date,
+            Attendance.attendance_date <= end_date,
+        )
+        .group_by(key, bucket)
+        .order_by(bucket, key)
+    )
+    if group_by == "department" or department_id:
+        stmt = stmt.join(Employee, Employee.id == Attendance.employee_id)
+    if employee_id:
+        stmt = stmt.where(Attendance.employee_id == employee_id)
+    if department_id:
+        stmt = stmt.where(Employee.department_id == department_id)
+    return stmt
+
+
+def _rollup_summary_statement(
+    group_by: str, start_date: date, end_date: date,
+    employee_id: Optional[UUID] = None, department_id: Optional[UUID] = None,
+):
+    rollup = AttendanceMonthlyRollup
+    key = rollup.employee_id if group_by == "employee" else Employee.department_id
+    stmt = (
+        select(
+            key.label(f"{group_by}_id"),
+            rollup.month.label("period_start"),
+            *(func.sum(getattr(rollup, name)).label(name) for name in ROLLUP_COUNTERS),
+        )
+        .where(rollup.month >= start_date, rollup.month <= end_date)
+        .group_by(key, rollup.month)
+        .order_by(rollup.month, key)
+    )
+    if group_by == "department" or department_id:
+        stmt = stmt.join(Employee, Employee.id == rollup.employee_id)
+    if employee_id:
+        stmt = stmt.where(rollup.employee_id == employee_id)
+    if department_id:
+        stmt = stmt.where(Employee.department_id == department_id)
+    return stmt
+
+
+async def stream_summary(stmt) -> AsyncIterator[str]:
+    """
+    Stream summary rows as NDJSON from a server-side cursor.
+
+    Opens its own session: the request-scoped one is closed before a
+    streaming response body is sent.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=1000))
+        async for row in result.mappings():
+            yield AttendanceSummaryRow(
+                **row,
+                absence_rate=row["days_absent"] / row["days_recorded"] if row["days_recorded"] else 0.0,
+            ).model_dump_json() + "\n"
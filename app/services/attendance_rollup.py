@@ -0,0 +1,146 @@
+"""
+Incremental maintenance of ``attendance_monthly_rollups``.
+
+Every attendance write adds the row's contribution to its employee/month
+rollup as a delta (and subtracts the previous contribution on updates), so
+the rollups never have to be recomputed on the request path. ``rebuild``
+recomputes a month range from ``attendances`` to reconcile any drift.
+"""
+
+import argparse
+import asyncio
+from collections import defaultdict
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import Date, cast, delete, func, insert, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.employee import Attendance, AttendanceMonthlyRollup
+from app.services.partitions import attached_months_select
+
+ROLLUP_COUNTERS = (
+    "days_recorded", "days_present", "days_absent", "late_count",
+    "half_day_count", "worked_hours", "overtime_hours",
+)
+
+
+def aggregate_columns() -> list:
+    """SQL aggregates matching ``ROLLUP_COUNTERS`` over ``attendances`` rows."""
+    return [
+        func.count().label("days_recorded"),
+        func.count().filter(Attendance.is_present == True).label("days_present"),
+        func.count().filter(Attendance.is_present == False).label("days_absent"),
+        func.count().filter(Attendance.is_late == True).label("late_count"),
+        func.count().filter(Attendance.is_half_day == True).label("half_day_count"),
+        func.coalesce(func.sum(Attendance.worked_hours), 0).label("worked_hours"),
+        func.coalesce(func.sum(Attendance.overtime_hours), 0).label("overtime_hours"),
+    ]
+
+
+def _contribution(row) -> dict:
+    # Mirrors aggregate_columns(): a NULL is_present counts as neither present nor absent.
+    return {
+        "days_recorded": 1,
+        "days_present": 1 if row.is_present is True else 0,
+        "days_absent": 1 if row.is_present is False else 0,
+        "late_count": 1 if row.is_late else 0,
+        "half_day_count": 1 if row.is_half_day else 0,
+        "worked_hours": row.worked_hours or 0,
+        "overtime_hours": row.overtime_hours or 0,
+    }
+
+
+class RollupDelta:
+    """Accumulates per employee/month deltas so a whole batch becomes one upsert."""
+
+    def __init__(self):
+        self._deltas = defaultdict(lambda: dict.fromkeys(ROLLUP_COUNTERS, 0))
+
+    def add(self, row, sign: int = 1) -> None:
+        """Add (``sign=1``) or remove (``sign=-1``) the contribution of an attendance row."""
+        totals = self._deltas[(row.employee_id, row.attendance_date.replace(day=1))]
+        for name, value in _contribution(row).items():
+            totals[name] += sign * value
+
+    def statement(self):
+        # Sorted so concurrent writers lock rollup rows in the same order.
+        values = [
+            {"employee_id": employee_id, "month": month, **totals}
+            for (employee_id, month), totals in sorted(self._deltas.items())
+            if any(totals.values())
+        ]
+        if not values:
+            return None
+        stmt = pg_insert(AttendanceMonthlyRollup).values(values)
+        return stmt.on_conflict_do_update(
+            index_elements=["employee_id", "month"],
+            set_={
+                **{name: getattr(AttendanceMonthlyRollup, name) + stmt.excluded[name] for name in ROLLUP_COUNTERS},
+                "updated_at": func.now(),
+            },
+        )
+
+    async def apply(self, db: AsyncSession) -> None:
+        stmt = self.statement()
+        if stmt is not None:
+            await db.execute(stmt)
+
+
+def rebuild_statements(start_month: Optional[date] = None, end_month: Optional[date] = None) -> List:
+    """
+    DELETE + INSERT ... SELECT that recompute the rollups for ``[start_month, end_month]``.
+
+    Only months that still have rows to recompute from are cleared: those with
+    a partition attached, or with rows in the default partition. The rollups
+    of archived months are kept.
+    """
+    month = cast(func.date_trunc(literal_column("'month'"), Attendance.attendance_date), Date)
+    source = (
+        select(Attendance.employee_id, month.label("month"), *aggregate_columns())
+        .where(Attendance.is_deleted == False)
+        .group_by(Attendance.employee_id, month)
+    )
+    present = select(month).distinct()
+    clear = delete(AttendanceMonthlyRollup)
+    if start_month:
+        source = source.where(Attendance.attendance_date >= start_month.replace(day=1))
+        present = present.where(Attendance.attendance_date >= start_month.replace(day=1))
+        clear = clear.where(AttendanceMonthlyRollup.month >= start_month.replace(day=1))
+    if end_month:
+        end = end_month.replace(day=1)
+        next_month = date(end.year + end.month // 12, end.month % 12 + 1, 1)
+        source = source.where(Attendance.attendance_date < next_month)
+        present = present.where(Attendance.attendance_date < next_month)
+        clear = clear.where(AttendanceMonthlyRollup.month <= end)
+    clear = clear.where(or_(
+        AttendanceMonthlyRollup.month.in_(attached_months_select()),
+        AttendanceMonthlyRollup.month.in_(present),
+    ))
+    return [
+        clear,
+        insert(AttendanceMonthlyRollup).from_select(["employee_id", "month", *ROLLUP_COUNTERS], source),
+    ]
+
+
+async def rebuild(db: AsyncSession, start_month: Optional[date] = None, end_month: Optional[date] = None) -> None:
+    for stmt in rebuild_statements(start_month, end_month):
+        await db.execute(stmt)
+
+
+async def _main(start_month: Optional[date], end_month: Optional[date]) -> None:
+    from app.db.db import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        await rebuild(db, start_month, end_month)
+        await db.commit()
+
+
+if __name__ == "__main__":
+    # python -m app.services.attendance_rollup [--start 2024-01-01] [--end 2024-12-01]
+    parser = argparse.ArgumentParser(description="Rebuild attendance_monthly_rollups from attendances")
+    parser.add_argument("--start", type=date.fromisoformat, help="first month to rebuild (any day in it)")
+    parser.add_argument("--end", type=date.fromisoformat, help="last month to rebuild (any day in it)")
+    args = parser.parse_args()
+    asyncio.run(_main(args.start, args.end))
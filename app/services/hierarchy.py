@@ -0,0 +1,116 @@
+"""
+Closure-table maintenance for self-referential trees.
+
+A closure table stores every (ancestor, descendant, depth) pair, so "everything
+under X" and "everything above X" are single indexed lookups instead of one
+query per tree level. The helpers here are written against any closure model
+with ``ancestor_id``/``descendant_id``/``depth`` columns.
+
+Every write to a closure table first takes that table's transaction-level
+advisory lock (``lock_tree``), so moves and inserts in one tree run one at a
+time. Without it, two concurrent moves (X under Y, Y under X) would each pass
+the cycle check against the tree as it was before the other committed. Under
+READ COMMITTED, the statements that run after the lock is granted see
+everything the previous holder committed.
+"""
+
+import asyncio
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import delete, exists, func, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models.employee import Department, DepartmentClosure, Employee, EmployeeClosure
+
+
+class HierarchyCycleError(ValueError):
+    """Raised when a node would be moved underneath itself."""
+
+
+async def lock_tree(db: AsyncSession, closure) -> None:
+    """Serialize writers of ``closure`` until the transaction ends; re-entrant within it."""
+    await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(closure.__tablename__))))
+
+
+async def add_node(db: AsyncSession, closure, node_id: UUID, parent_id: Optional[UUID]) -> None:
+    """Link a new leaf ``node_id`` under ``parent_id`` (or as a root)."""
+    await lock_tree(db, closure)
+    await db.execute(insert(closure).values(ancestor_id=node_id, descendant_id=node_id, depth=0))
+    if parent_id is not None:
+        await db.execute(insert(closure).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(closure.ancestor_id, literal(node_id), closure.depth + 1)
+            .where(closure.descendant_id == parent_id),
+        ))
+
+
+async def move_node(db: AsyncSession, closure, node_id: UUID, new_parent_id: Optional[UUID]) -> None:
+    """
+    Re-parent the subtree rooted at ``node_id`` in two set-based statements:
+    drop every link from the old ancestors into the subtree, then link the new
+    parent's ancestors to every node of the subtree. A no-op if ``node_id``
+    already sits directly under ``new_parent_id``.
+    """
+    await lock_tree(db, closure)
+    current_parent = await db.scalar(
+        select(closure.ancestor_id).where(closure.descendant_id == node_id, closure.depth == 1)
+    )
+    if current_parent == new_parent_id:
+        return
+
+    if new_parent_id is not None and await db.scalar(select(exists().where(
+        closure.ancestor_id == node_id, closure.descendant_id == new_parent_id,
+    ))):
+        raise HierarchyCycleError("A node cannot be moved under itself or one of its descendants")
+
+    subtree = select(closure.descendant_id).where(closure.ancestor_id == node_id)
+    old_ancestors = select(closure.ancestor_id).where(
+        closure.descendant_id == node_id, closure.ancestor_id != node_id,
+    )
+    await db.execute(delete(closure).where(
+        closure.descendant_id.in_(subtree), closure.ancestor_id.in_(old_ancestors),
+    ))
+
+    if new_parent_id is not None:
+        above = aliased(closure)
+        below = aliased(closure)
+        await db.execute(insert(closure).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(above.ancestor_id, below.descendant_id, above.depth + below.depth + 1)
+            .where(above.descendant_id == new_parent_id, below.ancestor_id == node_id),
+        ))
+
+
+async def rebuild(db: AsyncSession, closure, model, parent_col) -> None:
+    """Recompute ``closure`` from scratch by walking ``parent_col`` with a recursive CTE."""
+    tree = (
+        select(model.id.label("ancestor_id"), model.id.label("descendant_id"), literal(0).label("depth"))
+        .cte("tree", recursive=True)
+    )
+    child = aliased(model)
+    tree = tree.union_all(
+        select(tree.c.ancestor_id, child.id, tree.c.depth + 1)
+        .join(child, getattr(child, parent_col.key) == tree.c.descendant_id)
+    )
+    await lock_tree(db, closure)
+    await db.execute(delete(closure))
+    await db.execute(insert(closure).from_select(
+        ["ancestor_id", "descendant_id", "depth"],
+        select(tree.c.ancestor_id, tree.c.descendant_id, tree.c.depth),
+    ))
+
+
+async def _rebuild_all() -> None:
+    from app.db.db import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        await rebuild(db, DepartmentClosure, Department, Department.parent_id)
+        await rebuild(db, EmployeeClosure, Employee, Employee.manager_id)
+        await db.commit()
+
+
+if __name__ == "__main__":
+    # python -m app.services.hierarchy  -- backfill or reconcile the closure tables
+    asyncio.run(_rebuild_all())
@@ -0,0 +1,167 @@
+"""
+Leave request status transitions and the balance movements they cause.
+
+Every transition is a handful of single-statement writes in one short
+transaction, with no read-modify-write of ``Employee``:
+
+1. the request's status flips with ``WHERE status = :current AND version = :v``
+   (optimistic concurrency on ``LeaveRequest.version``);
+2. the balance moves with a conditional ``UPDATE employees SET bal = bal - :days
+   WHERE bal >= :days AND NOT is_deleted RETURNING bal``, so concurrent
+   approvals for the same employee serialize only for the duration of that
+   one row update;
+3. the movement and resulting balance are appended to ``leave_ledger``.
+
+Overlapping live requests for one employee are rejected by the
+``ex_leave_no_overlap`` exclusion constraint rather than by a pre-check, so
+two concurrent submissions cannot both slip through.
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Collection, Optional
+from uuid import UUID
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.statements import live_id
+from app.models.employee import Employee, LeaveLedgerEntry, LeaveRequest
+
+LEAVE_STATUSES = ("pending", "approved", "rejected", "cancelled")
+# Statuses covered by ex_leave_no_overlap; also what the team calendar shows by default.
+ACTIVE_LEAVE_STATUSES = ("pending", "approved")
+
+_EXCLUSION_VIOLATION = "23P01"
+
+# Leave types that draw on a balance column; anything else (e.g. unpaid) does not.
+BALANCE_COLUMNS = {
+    "annual": Employee.annual_leave_balance,
+    "sick": Employee.sick_leave_balance,
+    "casual": Employee.casual_leave_balance,
+}
+
+
+class LeaveTransitionError(Exception):
+    status_code = 409
+
+
+class LeaveNotFound(LeaveTransitionError):
+    status_code = 404
+
+
+class InvalidLeaveStatus(LeaveTransitionError):
+    status_code = 400
+
+
+class StaleLeaveRequest(LeaveTransitionError):
+    """The request changed since it was read (or no longer matches the client's ``expected_versions``)."""
+    status_code = 412
+
+
+class InsufficientLeaveBalance(LeaveTransitionError):
+    pass
+
+
+class LeaveOverlap(LeaveTransitionError):
+    def __init__(self, msg: str = "Leave request overlaps another pending or approved request"):
+        super().__init__(msg)
+
+
+def is_overlap_violation(exc: IntegrityError) -> bool:
+    """True if ``exc`` was raised by the ``ex_leave_no_overlap`` exclusion constraint."""
+    return getattr(exc.orig, "pgcode", None) == _EXCLUSION_VIOLATION
+
+
+def _balance_delta(old_status: str, new_status: str, days: Decimal) -> Decimal:
+    if new_status == "approved" and old_status != "approved":
+        return -days
+    if old_status == "approved" and new_status != "approved":
+        return days
+    return Decimal(0)
+
+
+async def transition_leave_request(
+    db: AsyncSession, leave_id: UUID, actor_id: UUID,
+    new_status: Optional[str] = None, rejection_reason: Optional[str] = None,
+    expected_versions: Optional[Collection[int]] = None,
+) -> LeaveRequest:
+    """
+    Apply a status change and/or rejection reason to a leave request, moving
+    the employee's balance when it enters or leaves ``approved``.
+    ``expected_versions`` carries the client's ``If-Match`` precondition. Commits
+    on success; rolls back and raises a ``LeaveTransitionError`` otherwise.
+    """
+    if new_status is not None and new_status not in LEAVE_STATUSES:
+        raise InvalidLeaveStatus(f"status must be one of: {', '.join(LEAVE_STATUSES)}")
+
+    current = (await db.execute(
+        select(
+            LeaveRequest.status, LeaveRequest.version, LeaveRequest.employee_id,
+            LeaveRequest.leave_type, LeaveRequest.days_count,
+        ).where(LeaveRequest.id == leave_id, LeaveRequest.is_deleted == False)
+    )).one_or_none()
+    if current is None:
+        raise LeaveNotFound("Leave request not found")
+    if expected_versions is not None and current.version not in expected_versions:
+        raise StaleLeaveRequest("Leave request was modified by someone else")
+
+    values = {"version": LeaveRequest.version + 1}
+    if new_status:
+        values.update(status=new_status, approved_by=actor_id, approved_at=datetime.utcnow())
+    if rejection_reason:
+        values["rejection_reason"] = rejection_reason
+
+    try:
+        leave = await db.scalar(
+            update(LeaveRequest)
+            .where(
+                LeaveRequest.id == leave_id,
+                LeaveRequest.status == current.status,
+                LeaveRequest.version == current.version,
+            )
+            .values(**values)
+            .returning(LeaveRequest)
+            .execution_options(populate_existing=True)
+        )
+    except IntegrityError as exc:
+        # e.g. re-opening a rejected request whose days are now taken
+        await db.rollback()
+        if is_overlap_violation(exc):
+            raise LeaveOverlap() from exc
+        raise
+    if leave is None:
+        await db.rollback()
+        raise StaleLeaveRequest("Leave request was modified by someone else")
+
+    column = BALANCE_COLUMNS.get(current.leave_type.lower())
+    delta = _balance_delta(current.status, new_status or current.status, current.days_count)
+    if column is not None and delta:
+        conditions = [Employee.id == current.employee_id, Employee.is_deleted == False]
+        if delta < 0:
+            conditions.append(column >= -delta)
+        balance_after = await db.scalar(
+            update(Employee)
+            .where(*conditions)
+            .values({column.key: column + delta, "version": Employee.version + 1})
+            .returning(column)
+        )
+        if balance_after is None:
+            await db.rollback()
+            # Only the failure path pays for telling the two causes apart.
+            if await db.scalar(live_id(Employee), {"id": current.employee_id}) is None:
+                raise LeaveNotFound("Employee not found")
+            raise InsufficientLeaveBalance(f"Insufficient {current.leave_type} leave balance")
+        await db.execute(insert(LeaveLedgerEntry).values(
+            employee_id=current.employee_id,
+            leave_request_id=leave_id,
+            leave_type=current.leave_type,
+            delta=delta,
+            balance_after=balance_after,
+            entry_type="approval" if delta < 0 else "reversal",
+            created_by=actor_id,
+        ))
+
+    await db.commit()
+    return leave
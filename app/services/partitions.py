@@ -0,0 +1,314 @@
+"""
+Monthly range partitions of ``attendances`` on ``attendance_date``.
+
+Each partition holds one calendar month and is named ``attendances_pYYYYMM``.
+``ensure_attendance_partitions`` creates the missing ones up to
+``ATTENDANCE_PARTITION_MONTHS_AHEAD`` months ahead (scheduled daily), so new
+rows never fall through to ``attendances_default``, which only catches dates
+outside every partition; rows that did land there are moved into the month's
+partition when it is created. ``archive_attendance_partition`` detaches a month,
+writes its rows to a compressed file and drops it; the monthly rollups are
+kept, so summary reports over archived months keep working.
+
+Archival spans several transactions (the detached table is read on its own
+connection while the parent stays usable), so it can be interrupted with a
+month detached: its rows are then in neither the parent nor the archive.
+Both jobs therefore start with ``reattach_orphaned_partitions``, which puts
+any such table back, and archival holds the maintenance advisory lock
+throughout so that step never mistakes a month being archived for an orphan.
+Creating a partition (including adopting rows from the default partition)
+is a single transaction and needs no such repair.
+"""
+
+import csv
+import gzip
+import logging
+import os
+import re
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+from typing import Iterator, List, Optional
+from uuid import UUID
+
+from sqlalchemy import Boolean, Date, DateTime, Integer, Numeric, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+from app.models.employee import Attendance
+from app.services.export import EXPORT_CHUNK_ROWS, csv_value
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = Attendance.__tablename__
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+ARCHIVE_FORMATS = {"csv": ".csv.gz", "parquet": ".parquet"}
+
+_PARTITION_NAME = re.compile(rf"^{PARENT_TABLE}_p(\d{{4}})(\d{{2}})$")
+# DETACH briefly locks the parent; give up rather than queue every query behind it.
+_DETACH_LOCK_TIMEOUT = "5s"
+# Advisory lock key serializing partition maintenance (creation, re-attachment, archival).
+_MAINTENANCE_LOCK = f"{PARENT_TABLE}:partitions"
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_p{month:%Y%m}"
+
+
+def _bounds(month: date) -> str:
+    return f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+
+
+def attached_partitions(conn: Connection) -> List[date]:
+    """First days of the months that have a partition attached, oldest first."""
+    names = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = CAST(:parent AS regclass)"
+    ), {"parent": PARENT_TABLE}).scalars()
+    return sorted(
+        date(int(match[1]), int(match[2]), 1)
+        for match in map(_PARTITION_NAME.match, names) if match
+    )
+
+
+def attached_months_select():
+    """SQL counterpart of ``attached_partitions``, for use inside other statements."""
+    return text(
+        "SELECT to_date(substring(c.relname from '_p([0-9]{6})$'), 'YYYYMM') AS month "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        f"WHERE i.inhparent = CAST('{PARENT_TABLE}' AS regclass) AND c.relname ~ '_p[0-9]{{6}}$'"
+    ).columns(month=Date)
+
+
+def detached_partitions(conn: Connection) -> List[date]:
+    """Months whose ``attendances_pYYYYMM`` table exists but is not attached, oldest first."""
+    names = conn.execute(text(
+        "SELECT relname FROM pg_class "
+        "WHERE relkind = 'r' AND NOT relispartition AND relnamespace = CAST(current_schema() AS regnamespace)"
+    )).scalars()
+    return sorted(
+        date(int(match[1]), int(match[2]), 1)
+        for match in map(_PARTITION_NAME.match, names) if match
+    )
+
+
+def reattach_orphaned_partitions(conn: Connection) -> List[str]:
+    """
+    Attach again every month an interrupted archival left detached, so its rows
+    are visible (and archived on the next run). The caller holds the
+    maintenance lock, so no archival is in progress, and commits.
+    """
+    reattached = []
+    for month in detached_partitions(conn):
+        name = partition_name(month)
+        _adopt_default_rows(conn, month, name)
+        conn.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} {_bounds(month)}"))
+        reattached.append(name)
+    if reattached:
+        logger.warning("Re-attached attendance partitions left detached: %s", ", ".join(reattached))
+    return reattached
+
+
+def ensure_attendance_partitions(
+    conn: Connection, start: Optional[date] = None, months_ahead: Optional[int] = None,
+) -> List[str]:
+    """
+    Re-attach orphaned partitions, then create the missing monthly partitions
+    from ``start`` (default: this month) through ``months_ahead`` months from
+    now. Returns the names created; the caller commits.
+    """
+    if months_ahead is None:
+        months_ahead = settings.ATTENDANCE_PARTITION_MONTHS_AHEAD
+    conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": _MAINTENANCE_LOCK})
+    reattach_orphaned_partitions(conn)
+    current = month_start(date.today())
+    month, last = month_start(start or current), add_months(current, months_ahead)
+    existing = set(attached_partitions(conn))
+
+    created = []
+    while month <= last:
+        if month not in existing:
+            name = partition_name(month)
+            _create_partition(conn, month, name)
+            created.append(name)
+        month = add_months(month, 1)
+    if created:
+        logger.info("Created attendance partitions: %s", ", ".join(created))
+    return created
+
+
+def _in_month(month: date) -> str:
+    return f"attendance_date >= '{month.isoformat()}' AND attendance_date < '{add_months(month, 1).isoformat()}'"
+
+
+def _create_partition(conn: Connection, month: date, name: str) -> None:
+    if not conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {_in_month(month)})")).scalar():
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} {_bounds(month)}"))
+        return
+    # Postgres refuses a partition whose range already has rows in the default
+    # partition, so build the table detached, move the rows over, then attach it.
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    _adopt_default_rows(conn, month, name)
+    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} {_bounds(month)}"))
+
+
+def _adopt_default_rows(conn: Connection, month: date, name: str) -> None:
+    """Move ``month``'s rows from the default partition into the detached table ``name``."""
+    moved = conn.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE {_in_month(month)} RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    )).rowcount
+    if moved:
+        logger.info("Moved %d rows from %s into %s", moved, DEFAULT_PARTITION, name)
+
+
+@contextmanager
+def _maintenance_lock(engine: Engine) -> Iterator[None]:
+    """
+    Hold the maintenance lock across transactions, on a connection of its own.
+    Advisory locks conflict between sessions, so work done under it must not
+    ask for the lock again on another connection.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("SELECT pg_advisory_lock(hashtext(:key))"), {"key": _MAINTENANCE_LOCK})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(hashtext(:key))"), {"key": _MAINTENANCE_LOCK})
+
+
+# -- archival --------------------------------------------------------------------
+
+def archive_attendance_partitions(
+    engine: Engine, older_than_months: int, archive_dir: Optional[str] = None, fmt: Optional[str] = None,
+) -> List[Path]:
+    """
+    Archive every month that ended more than ``older_than_months`` months ago,
+    including any an earlier, interrupted run left detached.
+    """
+    cutoff = add_months(month_start(date.today()), -older_than_months)
+    with _maintenance_lock(engine):
+        with engine.begin() as conn:
+            reattach_orphaned_partitions(conn)
+            months = [month for month in attached_partitions(conn) if month < cutoff]
+        return [_archive_partition(engine, month, archive_dir, fmt) for month in months]
+
+
+def archive_attendance_partition(
+    engine: Engine, month: date, archive_dir: Optional[str] = None, fmt: Optional[str] = None,
+) -> Path:
+    """
+    Detach ``month``'s partition, write its rows to ``archive_dir`` and drop it.
+
+    The file is written under a temporary name and renamed once its row count
+    matches the partition's. If anything fails before that, the partition is
+    attached again, so no rows are lost; if the process dies instead, the next
+    maintenance run re-attaches it.
+    """
+    with _maintenance_lock(engine):
+        return _archive_partition(engine, month, archive_dir, fmt)
+
+
+def _archive_partition(engine: Engine, month: date, archive_dir: Optional[str], fmt: Optional[str]) -> Path:
+    fmt = fmt or settings.ATTENDANCE_ARCHIVE_FORMAT
+    if fmt not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unknown archive format {fmt!r}; expected one of {', '.join(ARCHIVE_FORMATS)}")
+    if fmt == "parquet":
+        _pyarrow()  # fail before detaching anything
+
+    name = partition_name(month)
+    directory = Path(archive_dir or settings.ATTENDANCE_ARCHIVE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{name}{ARCHIVE_FORMATS[fmt]}"
+
+    # Not CONCURRENTLY: Postgres refuses that while a default partition exists.
+    with engine.begin() as conn:
+        conn.execute(text(f"SET LOCAL lock_timeout = '{_DETACH_LOCK_TIMEOUT}'"))
+        conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+    try:
+        with engine.connect() as conn:
+            expected = conn.execute(text(f"SELECT count(*) FROM {name}")).scalar()
+            written = _write_archive(conn, name, path, fmt)
+        if written != expected:
+            raise RuntimeError(f"Archived {written} of {expected} rows from {name}")
+    except BaseException:
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} {_bounds(month)}"))
+        raise
+
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE {name}"))
+    logger.info("Archived %s: %d rows to %s", name, written, path)
+    return path
+
+
+def _write_archive(conn: Connection, name: str, path: Path, fmt: str) -> int:
+    columns = list(Attendance.__table__.columns)
+    result = conn.execution_options(yield_per=EXPORT_CHUNK_ROWS).execute(text(
+        f"SELECT {', '.join(column.name for column in columns)} FROM {name} ORDER BY attendance_date, employee_id"
+    ))
+    partial = path.with_name(path.name + ".partial")
+    try:
+        written = _write_parquet(result, columns, partial) if fmt == "parquet" else _write_csv(result, columns, partial)
+        os.replace(partial, path)
+    finally:
+        partial.unlink(missing_ok=True)
+    return written
+
+
+def _write_csv(result, columns, path: Path) -> int:
+    written = 0
+    with gzip.open(path, "wt", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow([column.name for column in columns])
+        for partition in result.partitions():
+            writer.writerows([csv_value(value) for value in row] for row in partition)
+            written += len(partition)
+    return written
+
+
+def _write_parquet(result, columns, path: Path) -> int:
+    pa, pq = _pyarrow()
+    schema = pa.schema([(column.name, _arrow_type(pa, column.type)) for column in columns])
+    written = 0
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for partition in result.partitions():
+            rows = [
+                {key: str(value) if isinstance(value, UUID) else value for key, value in row._mapping.items()}
+                for row in partition
+            ]
+            writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=schema))
+            written += len(partition)
+    return written
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet archives need pyarrow (pip install pyarrow); use the csv format otherwise")
+    return pyarrow, pyarrow.parquet
+
+
+def _arrow_type(pa, sql_type):
+    if isinstance(sql_type, Numeric):
+        return pa.decimal128(sql_type.precision, sql_type.scale)
+    if isinstance(sql_type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(sql_type, Date):
+        return pa.date32()
+    if isinstance(sql_type, Boolean):
+        return pa.bool_()
+    if isinstance(sql_type, Integer):
+        return pa.int64()
+    return pa.string()  # UUID, String, Text
@@ -0,0 +1,58 @@
+"""
+The list queries behind the HR endpoints, shared with the code that has to
+issue exactly the same SQL: startup warm-up (``app.startup``) and the
+query-plan checks (``tests/test_query_plans.py``).
+
+Each ``filter_*`` helper narrows a ``select()`` of whatever columns the caller
+needs (full entities, ``*_ROWS.columns`` or an export's columns) to the live
+rows matching the endpoint's query parameters.
+"""
+
+from datetime import date
+from typing import Optional
+from uuid import UUID
+
+from app.core.responses import TrustedRows
+from app.models.employee import Attendance, Department, DepartmentClosure, Employee, LeaveRequest
+from app.schema.employee_schema import (
+    AttendanceExpandedOut, DepartmentExpandedOut, EmployeeExpandedOut, LeaveRequestExpandedOut,
+)
+
+# Unexpanded list pages skip the ORM and response-model validation entirely.
+DEPARTMENT_ROWS = TrustedRows(Department, DepartmentExpandedOut)
+EMPLOYEE_ROWS = TrustedRows(Employee, EmployeeExpandedOut)
+ATTENDANCE_ROWS = TrustedRows(Attendance, AttendanceExpandedOut)
+LEAVE_ROWS = TrustedRows(LeaveRequest, LeaveRequestExpandedOut)
+
+
+def filter_employees(q, department_id: Optional[UUID], include_subdepartments: bool, is_active: Optional[bool]):
+    q = q.where(Employee.is_deleted == False)
+    if department_id and include_subdepartments:
+        q = q.join(DepartmentClosure, DepartmentClosure.descendant_id == Employee.department_id).where(
+            DepartmentClosure.ancestor_id == department_id
+        )
+    elif department_id:
+        q = q.where(Employee.department_id == department_id)
+    if is_active is not None:
+        q = q.where(Employee.is_active == is_active)
+    return q
+
+
+def filter_attendance(q, employee_id: Optional[UUID], start_date: Optional[date], end_date: Optional[date]):
+    q = q.where(Attendance.is_deleted == False)
+    if employee_id:
+        q = q.where(Attendance.employee_id == employee_id)
+    if start_date:
+        q = q.where(Attendance.attendance_date >= start_date)
+    if end_date:
+        q = q.where(Attendance.attendance_date <= end_date)
+    return q
+
+
+def filter_leave_requests(q, employee_id: Optional[UUID], status: Optional[str]):
+    q = q.where(LeaveRequest.is_deleted == False)
+    if employee_id:
+        q = q.where(LeaveRequest.employee_id == employee_id)
+    if status:
+        q = q.where(LeaveRequest.status == status)
+    return q
@@ -0,0 +1,61 @@
+"""
+Shift rules that derive ``worked_hours`` and ``overtime_hours`` from punches.
+
+The same rule is available as plain Python (for single writes) and as SQL
+expressions (for set-based recomputation), so both paths always agree.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Optional, Tuple
+
+from sqlalchemy import Numeric, case, cast, func
+
+from app.core.config import settings
+
+_CENTS = Decimal("0.01")
+
+
+@dataclass(frozen=True)
+class ShiftPolicy:
+    standard_hours: Decimal
+    break_minutes: int
+
+    @classmethod
+    def from_settings(cls) -> "ShiftPolicy":
+        return cls(Decimal(str(settings.SHIFT_STANDARD_HOURS)), settings.SHIFT_BREAK_MINUTES)
+
+    @property
+    def break_hours(self) -> Decimal:
+        return Decimal(self.break_minutes) / 60
+
+    def compute(
+        self, check_in: Optional[datetime], check_out: Optional[datetime],
+    ) -> Tuple[Optional[Decimal], Optional[Decimal]]:
+        """Return ``(worked_hours, overtime_hours)``, or ``(None, None)`` without a valid punch pair."""
+        if check_in is None or check_out is None or check_out <= check_in:
+            return None, None
+        span = Decimal(str((check_out - check_in).total_seconds())) / 3600
+        worked = max(span - self.break_hours, Decimal(0)).quantize(_CENTS, ROUND_HALF_UP)
+        overtime = max(worked - self.standard_hours, Decimal(0)).quantize(_CENTS, ROUND_HALF_UP)
+        return worked, overtime
+
+    def apply(self, att) -> None:
+        """Set derived hours on an ``Attendance`` when it has both punches."""
+        worked, overtime = self.compute(att.check_in, att.check_out)
+        if worked is not None:
+            att.worked_hours, att.overtime_hours = worked, overtime
+
+    def worked_hours_sql(self, check_in, check_out):
+        span = cast(func.extract("epoch", check_out - check_in), Numeric) / 3600
+        return case(
+            (check_out > check_in, func.round(func.greatest(span - self.break_hours, 0), 2)),
+            else_=None,
+        )
+
+    def overtime_hours_sql(self, check_in, check_out):
+        return case(
+            (check_out > check_in, func.greatest(self.worked_hours_sql(check_in, check_out) - self.standard_hours, 0)),
+            else_=None,
+        )
@@ -0,0 +1,101 @@
+"""
+API worker lifespan: warm the database pool and start the token revocation
+and principal invalidation listeners on startup; stop them on shutdown.
+
+The schema is owned by Alembic (``alembic upgrade head``), so importing the
+app never touches the database. Once the event loop is running, the warm-up
+opens ``DB_WARMUP_CONNECTIONS`` pooled connections at once and runs each hot
+read statement on every one of them. The first real requests then find
+connections already established, SQLAlchemy's compiled-statement cache
+filled, and the statements prepared on each asyncpg connection. Warm-up is
+best effort: if the database is not reachable yet the worker still starts,
+and connections are made on demand.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import List, Tuple
+
+from fastapi import FastAPI
+from sqlalchemy import select
+
+from app.core.cache import principal_cache
+from app.core.config import settings
+from app.core.pagination import page_query
+from app.core.revocation import token_revocations
+from app.db.db import async_engine
+from app.db.statements import USER_BY_ID, live_by_id
+from app.models.employee import Attendance, Department, Employee, LeaveRequest
+from app.services.queries import (
+    ATTENDANCE_ROWS, DEPARTMENT_ROWS, EMPLOYEE_ROWS, LEAVE_ROWS,
+    filter_attendance, filter_employees, filter_leave_requests,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def hot_statements() -> List[Tuple]:
+    """(statement, params) nearly every session runs: principal lookup, unfiltered list pages, reads by id."""
+    # Values only need the right types; compiled statements and prepared
+    # statements are keyed on the SQL, not on the parameters.
+    by_id = {"id": uuid.uuid4()}
+    pages = [
+        page_query(
+            select(*DEPARTMENT_ROWS.columns).where(Department.is_deleted == False),
+            Department.created_at, Department.id, descending=False,
+        ),
+        page_query(
+            filter_employees(select(*EMPLOYEE_ROWS.columns), None, False, None),
+            Employee.created_at, Employee.id, descending=False,
+        ),
+        page_query(
+            filter_attendance(select(*ATTENDANCE_ROWS.columns), None, None, None),
+            Attendance.attendance_date, Attendance.id,
+        ),
+        page_query(
+            filter_leave_requests(select(*LEAVE_ROWS.columns), None, None),
+            LeaveRequest.created_at, LeaveRequest.id,
+        ),
+    ]
+    return [
+        (USER_BY_ID, by_id),
+        *((stmt, {}) for stmt in pages),
+        *((live_by_id(model), by_id) for model in (Department, Employee, Attendance, LeaveRequest)),
+    ]
+
+
+async def warm_up() -> None:
+    connections = min(settings.DB_WARMUP_CONNECTIONS, settings.DB_POOL_SIZE)
+    if connections <= 0 or settings.DB_PGBOUNCER_MODE:
+        return
+    statements = hot_statements()
+
+    async def prepare_one():
+        async with async_engine.connect() as conn:
+            for stmt, params in statements:
+                await conn.execute(stmt, params)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(prepare_one() for _ in range(connections)))
+    except Exception as exc:
+        logger.warning("Database warm-up failed, continuing without it: %s", exc)
+        return
+    logger.info(
+        "Warmed %d connections with %d statements in %.1fms",
+        connections, len(statements), (time.perf_counter() - started) * 1000,
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await warm_up()
+    await asyncio.to_thread(token_revocations.start)
+    principal_cache.start()
+    yield
+    await asyncio.to_thread(principal_cache.stop)
+    await asyncio.to_thread(token_revocations.stop)
+    await async_engine.dispose()
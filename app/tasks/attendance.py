@@ -0,0 +1,97 @@
+"""
+Background jobs over the attendances table.
+
+Run a worker with ``celery -A app.worker worker`` and the scheduled jobs
+(partition upkeep, archival) with ``celery -A app.worker beat``.
+"""
+
+import logging
+from datetime import date, timedelta
+from typing import List, Optional
+
+from sqlalchemy import func, update
+
+from app.core.config import settings
+from app.db.db import SessionLocal, engine
+from app.models.employee import Attendance
+from app.services.attendance_rollup import rebuild_statements
+from app.services.partitions import archive_attendance_partitions, ensure_attendance_partitions
+from app.services.shift_rules import ShiftPolicy
+from app.worker import celery_app
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="attendance.recompute_hours")
+def recompute_attendance_hours(start_date: str, end_date: str, chunk_days: int = 7) -> int:
+    """
+    Re-derive ``worked_hours``/``overtime_hours`` for ``[start_date, end_date]``
+    under the current shift policy, e.g. after SHIFT_* settings change.
+
+    Works through the range in windows of ``chunk_days``. Each window is one
+    set-based UPDATE computed entirely in SQL and committed on its own, so
+    locks stay short and no ORM objects are loaded. Rows whose hours already
+    match are not rewritten. The monthly rollups for the range are rebuilt
+    at the end. Returns the number of rows changed.
+    """
+    start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    policy = ShiftPolicy.from_settings()
+    worked = policy.worked_hours_sql(Attendance.check_in, Attendance.check_out)
+    overtime = policy.overtime_hours_sql(Attendance.check_in, Attendance.check_out)
+
+    changed = 0
+    with SessionLocal() as db:
+        window_start = start
+        while window_start <= end:
+            window_end = min(window_start + timedelta(days=chunk_days - 1), end)
+            result = db.execute(
+                update(Attendance)
+                .where(
+                    Attendance.attendance_date >= window_start,
+                    Attendance.attendance_date <= window_end,
+                    Attendance.is_deleted == False,
+                    Attendance.check_in.is_not(None),
+                    Attendance.check_out.is_not(None),
+                    # Otherwise the policy yields NULL; keep the stored hours, as inserts and PATCHes do.
+                    Attendance.check_out > Attendance.check_in,
+                    (Attendance.worked_hours.is_distinct_from(worked))
+                    | (Attendance.overtime_hours.is_distinct_from(overtime)),
+                )
+                .values(
+                    worked_hours=worked,
+                    overtime_hours=overtime,
+                    updated_at=func.now(),
+                    version=Attendance.version + 1,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            changed += result.rowcount
+            logger.info("Recomputed hours for %s..%s: %d rows", window_start, window_end, result.rowcount)
+            window_start = window_end + timedelta(days=1)
+
+        for stmt in rebuild_statements(start, end):
+            db.execute(stmt)
+        db.commit()
+    return changed
+
+
+@celery_app.task(name="attendance.create_partitions")
+def create_attendance_partitions() -> List[str]:
+    """Create the attendances partitions for the coming months. Scheduled daily; safe to rerun."""
+    with engine.begin() as conn:
+        return ensure_attendance_partitions(conn)
+
+
+@celery_app.task(name="attendance.archive_partitions")
+def archive_old_attendance_partitions(older_than_months: Optional[int] = None) -> List[str]:
+    """
+    Detach, dump and drop the attendances partitions for months that ended more
+    than ``older_than_months`` (default ``ATTENDANCE_ARCHIVE_AFTER_MONTHS``)
+    months ago. Returns the archive file paths.
+    """
+    months = older_than_months if older_than_months is not None else settings.ATTENDANCE_ARCHIVE_AFTER_MONTHS
+    if months is None:
+        logger.info("Attendance archival is disabled (ATTENDANCE_ARCHIVE_AFTER_MONTHS is not set)")
+        return []
+    return [str(path) for path in archive_attendance_partitions(engine, months)]
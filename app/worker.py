@@ -0,0 +1,30 @@
+from celery import Celery
+from celery.schedules import crontab
+
+from app.core.config import settings
+
+celery_app = Celery(
+    "erp",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND,
+    include=["app.tasks.attendance"],
+)
+celery_app.conf.update(
+    task_serializer="json",
+    accept_content=["json"],
+    # Long batch jobs: hand out one at a time and only ack once finished.
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+)
+
+celery_app.conf.beat_schedule = {
+    "attendance-create-partitions": {
+        "task": "attendance.create_partitions",
+        "schedule": crontab(hour=1, minute=0),
+    },
+}
+if settings.ATTENDANCE_ARCHIVE_AFTER_MONTHS is not None:
+    celery_app.conf.beat_schedule["attendance-archive-partitions"] = {
+        "task": "attendance.archive_partitions",
+        "schedule": crontab(hour=2, minute=0, day_of_month=1),
+    }
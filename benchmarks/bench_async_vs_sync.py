@@ -0,0 +1,88 @@
+"""
+Side-by-side load test of a sync (threadpool) route against an async route.
+
+Both routes run the same query (``SELECT pg_sleep(:delay)``) against the
+database in DATABASE_URL, each through an engine whose pool is sized to the
+requested concurrency, so the only difference is how the handler waits.
+Sync handlers are capped by Starlette's threadpool (40 threads by default);
+async handlers are not.
+
+    python -m benchmarks.bench_async_vs_sync --requests 1000 --concurrency 200
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.db import ASYNC_DATABASE_URL, DATABASE_URL
+
+
+def build_apps(concurrency: int, delay: float):
+    sync_engine = create_engine(DATABASE_URL, pool_size=concurrency, max_overflow=0)
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, pool_size=concurrency, max_overflow=0)
+    query = text("SELECT pg_sleep(:delay)")
+
+    sync_app = FastAPI()
+
+    @sync_app.get("/")
+    def sync_route():
+        with sync_engine.connect() as conn:
+            conn.execute(query, {"delay": delay})
+        return {}
+
+    async_app = FastAPI()
+
+    @async_app.get("/")
+    async def async_route():
+        async with async_engine.connect() as conn:
+            await conn.execute(query, {"delay": delay})
+        return {}
+
+    return sync_app, async_app
+
+
+async def run(app: FastAPI, requests: int, concurrency: int) -> dict:
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def one():
+            async with gate:
+                started = time.perf_counter()
+                await client.get("/")
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "req_per_s": requests / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "elapsed_s": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--delay", type=float, default=0.05, help="seconds each query spends in pg_sleep")
+    args = parser.parse_args()
+
+    sync_app, async_app = build_apps(args.concurrency, args.delay)
+    print(f"{'handler':<8} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'total s':>10}")
+    for name, app in (("sync", sync_app), ("async", async_app)):
+        r = asyncio.run(run(app, args.requests, args.concurrency))
+        print(f"{name:<8} {r['req_per_s']:>10.1f} {r['p50_ms']:>10.1f} {r['p99_ms']:>10.1f} {r['elapsed_s']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Rows/s through ``POST /attendance/bulk`` for each upload format and write mode,
+against the 50k rows/s target for bulk attendance imports.
+
+Creates a throwaway user and ``--employees`` employees, then uploads the same
+``--rows`` records (the employees times the most recent days) as a JSON array,
+NDJSON and CSV. Each format is run three times against the real database:
+
+    skip (new)       every row inserted
+    skip (existing)  every row hits ON CONFLICT, is left alone and reported as duplicate
+    upsert           every row hits ON CONFLICT and is overwritten
+
+The app is driven in process through httpx's ASGI transport with
+authentication overridden, so the numbers cover body parsing, validation,
+the batched ``INSERT ... ON CONFLICT`` and the rollup upserts, but not the
+network. Needs a migrated database in ``DATABASE_URL``.
+
+    python -m benchmarks.bench_bulk_attendance --rows 50000 --batch-size 2000
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import math
+import time
+import uuid
+from datetime import date, datetime, time as clock, timedelta
+
+import httpx
+from sqlalchemy import delete
+
+from main import app
+from app.api.auth import get_current_user
+from app.db.db import AsyncSessionLocal
+from app.models.EmunType import UserRole
+from app.models.User import User
+from app.models.employee import Attendance, AttendanceMonthlyRollup, Employee
+
+TARGET_ROWS_PER_SECOND = 50_000
+FORMATS = ("json", "ndjson", "csv")
+CONTENT_TYPES = {"json": "application/json", "ndjson": "application/x-ndjson", "csv": "text/csv"}
+FIELDS = ("employee_id", "attendance_date", "check_in", "check_out", "is_late", "notes")
+
+
+async def setup(employees: int):
+    tag = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as db:
+        user = User(name=f"bench {tag}", email=f"bench-{tag}@example.invalid", role=UserRole.HR)
+        db.add(user)
+        await db.flush()
+        staff = [
+            Employee(user_id=user.id, employee_number=f"BENCH-{tag}-{i}", joining_date=date.today())
+            for i in range(employees)
+        ]
+        db.add_all(staff)
+        await db.commit()
+        return user, [employee.id for employee in staff]
+
+
+def records(employee_ids, rows: int, late: bool) -> list:
+    days = math.ceil(rows / len(employee_ids))
+    first = date.today() - timedelta(days=days - 1)
+    out = []
+    for offset in range(days):
+        day = first + timedelta(days=offset)
+        for employee_id in employee_ids:
+            out.append({
+                "employee_id": str(employee_id),
+                "attendance_date": day.isoformat(),
+                "check_in": datetime.combine(day, clock(9, 30 if late else 0)).isoformat(),
+                "check_out": datetime.combine(day, clock(18, 0)).isoformat(),
+                "is_late": late,
+                "notes": "late, stuck in \"traffic\"" if late else "",
+            })
+            if len(out) == rows:
+                return out
+    return out
+
+
+def encode(rows: list, fmt: str) -> bytes:
+    if fmt == "json":
+        return json.dumps(rows).encode()
+    if fmt == "ndjson":
+        return "".join(json.dumps(row) + "\n" for row in rows).encode()
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, FIELDS)
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def upload(client: httpx.AsyncClient, body: bytes, fmt: str, mode: str, batch_size: int):
+    started = time.perf_counter()
+    response = await client.post(
+        "/attendance/bulk", params={"mode": mode, "batch_size": batch_size},
+        content=body, headers={"content-type": CONTENT_TYPES[fmt]},
+    )
+    elapsed = time.perf_counter() - started
+    response.raise_for_status()
+    return elapsed, response.json()
+
+
+async def clear_attendance(employee_ids) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Attendance).where(Attendance.employee_id.in_(employee_ids)))
+        await db.execute(delete(AttendanceMonthlyRollup).where(AttendanceMonthlyRollup.employee_id.in_(employee_ids)))
+        await db.commit()
+
+
+async def cleanup(user_id, employee_ids) -> None:
+    await clear_attendance(employee_ids)
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Employee).where(Employee.id.in_(employee_ids)))
+        await db.execute(delete(User).where(User.id == user_id))
+        await db.commit()
+
+
+async def run(rows: int, employees: int, batch_size: int, formats) -> None:
+    user, employee_ids = await setup(employees)
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        first, second = records(employee_ids, rows, late=False), records(employee_ids, rows, late=True)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            print(f"{'format':<8} {'mode':<16} {'rows':>8} {'seconds':>8} {'rows/s':>10}  vs target  outcome")
+            for fmt in formats:
+                await clear_attendance(employee_ids)
+                runs = (
+                    ("skip (new)", "skip", encode(first, fmt), "created"),
+                    ("skip (existing)", "skip", encode(first, fmt), "duplicate"),
+                    ("upsert", "upsert", encode(second, fmt), "updated"),
+                )
+                for label, mode, body, expected in runs:
+                    elapsed, result = await upload(client, body, fmt, mode, batch_size)
+                    rate = len(first) / elapsed
+                    print(
+                        f"{fmt:<8} {label:<16} {len(first):>8} {elapsed:>8.2f} {rate:>10,.0f}  "
+                        f"{rate / TARGET_ROWS_PER_SECOND:>8.0%}   {expected}={result.get(expected)}"
+                    )
+                    assert result.get(expected) == len(first), f"{fmt} {label}: {result}"
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+        await cleanup(user.id, employee_ids)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--employees", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=2_000)
+    parser.add_argument("--format", choices=FORMATS, action="append", dest="formats")
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.employees, args.batch_size, args.formats or FORMATS))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Concurrent leave approvals against a single employee's balance.
+
+Creates a throwaway user/employee with ``--balance`` annual days and
+``--requests`` pending one-day annual requests, then approves all of them at
+once, each approval in its own session. Exactly ``balance`` approvals must
+succeed, the rest must fail with InsufficientLeaveBalance, and the final
+balance must equal the sum of the ledger deltas (never negative).
+
+    python -m benchmarks.bench_leave_approval --requests 200 --balance 50
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import delete, func, select
+
+from app.db.db import AsyncSessionLocal
+from app.models.EmunType import UserRole
+from app.models.User import User
+from app.models.employee import Employee, LeaveLedgerEntry, LeaveRequest
+from app.services.leave import InsufficientLeaveBalance, LeaveTransitionError, transition_leave_request
+
+
+async def setup(requests: int, balance: int):
+    tag = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as db:
+        user = User(name=f"bench {tag}", email=f"bench-{tag}@example.invalid", role=UserRole.HR)
+        db.add(user)
+        await db.flush()
+        employee = Employee(
+            user_id=user.id, employee_number=f"BENCH-{tag}", joining_date=date.today(),
+            annual_leave_balance=Decimal(balance),
+        )
+        db.add(employee)
+        await db.flush()
+        leaves = [
+            LeaveRequest(
+                employee_id=employee.id, leave_type="annual", status="pending", days_count=Decimal(1),
+                start_date=date.today() + timedelta(days=i), end_date=date.today() + timedelta(days=i),
+            )
+            for i in range(requests)
+        ]
+        db.add_all(leaves)
+        await db.commit()
+        return user.id, employee.id, [leave.id for leave in leaves]
+
+
+async def approve(leave_id, actor_id) -> str:
+    async with AsyncSessionLocal() as db:
+        try:
+            await transition_leave_request(db, leave_id, actor_id, new_status="approved")
+            return "approved"
+        except InsufficientLeaveBalance:
+            return "insufficient"
+        except LeaveTransitionError:
+            return "conflict"
+
+
+async def run(requests: int, balance: int) -> None:
+    user_id, employee_id, leave_ids = await setup(requests, balance)
+    try:
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*(approve(leave_id, user_id) for leave_id in leave_ids))
+        elapsed = time.perf_counter() - started
+
+        async with AsyncSessionLocal() as db:
+            final = await db.scalar(select(Employee.annual_leave_balance).where(Employee.id == employee_id))
+            ledger = await db.scalar(
+                select(func.coalesce(func.sum(LeaveLedgerEntry.delta), 0))
+                .where(LeaveLedgerEntry.employee_id == employee_id)
+            )
+
+        print(f"approvals/s  {requests / elapsed:>10.1f}")
+        for outcome in ("approved", "insufficient", "conflict"):
+            print(f"{outcome:<12} {outcomes.count(outcome):>10}")
+        print(f"balance      {balance} -> {final} (ledger {ledger})")
+        assert final >= 0, "balance went negative"
+        assert final == balance + ledger, "balance and ledger disagree"
+        assert outcomes.count("approved") == min(requests, balance), "lost or extra approvals"
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(LeaveLedgerEntry).where(LeaveLedgerEntry.employee_id == employee_id))
+            await db.execute(delete(LeaveRequest).where(LeaveRequest.employee_id == employee_id))
+            await db.execute(delete(Employee).where(Employee.id == employee_id))
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--balance", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.balance))
+
+
+if __name__ == "__main__":
+    main()
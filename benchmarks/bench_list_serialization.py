@@ -0,0 +1,97 @@
+"""
+Rows/s for building a large employee list response, ORM path against the
+trusted path the unexpanded list endpoints use.
+
+    before: ORM entities -> response-model validation and dump -> JSONResponse
+    after:  Core row select of the schema's columns -> dicts -> ORJSONResponse
+
+Rows are read from an in-memory SQLite copy of the employees table so the
+numbers reflect fetch, validation and encoding rather than network time.
+
+    python -m benchmarks.bench_list_serialization --rows 10000 --repeat 5
+"""
+
+import argparse
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+import app.models.User  # noqa: F401  (configures the mappers employees refer to)
+from app.api.employee import EMPLOYEE_EXPANSIONS
+from app.services.queries import EMPLOYEE_ROWS
+from app.core.expand import expand_options
+from app.db.db import Base
+from app.models.EmunType import EmploymentType
+from app.models.employee import Employee
+from app.schema.employee_schema import EmployeeExpandedOut
+
+
+def seed(session: Session, rows: int) -> None:
+    now = datetime.now(timezone.utc)
+    session.add_all(
+        Employee(
+            id=uuid.uuid4(), user_id=uuid.uuid4(), employee_number=f"E{i:06d}",
+            department_id=uuid.uuid4(), job_title="Engineer", employment_type=EmploymentType.FULL_TIME,
+            joining_date=date(2020, 1, 1) + timedelta(days=i % 1500),
+            current_salary=Decimal(random.randint(30_000, 150_000)), currency="USD",
+            annual_leave_balance=Decimal("12.50"), sick_leave_balance=Decimal("6.00"),
+            casual_leave_balance=Decimal("3.00"), is_active=True, created_at=now, updated_at=now,
+        )
+        for i in range(rows)
+    )
+    session.commit()
+
+
+def orm_path(session: Session, adapter: TypeAdapter) -> bytes:
+    employees = session.scalars(select(Employee).options(*expand_options(None, EMPLOYEE_EXPANSIONS))).all()
+    content = adapter.dump_python(adapter.validate_python(employees, from_attributes=True), mode="json")
+    session.expunge_all()  # each request starts with an empty identity map
+    return JSONResponse(content).body
+
+
+def trusted_path(session: Session) -> bytes:
+    return EMPLOYEE_ROWS.response(session.execute(select(*EMPLOYEE_ROWS.columns)).all()).body
+
+
+def measure(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[Employee.__table__])
+    adapter = TypeAdapter(List[EmployeeExpandedOut])
+
+    with Session(engine) as session:
+        seed(session, args.rows)
+        results = {}
+        for name, fn in (("before (ORM + pydantic)", lambda: orm_path(session, adapter)),
+                         ("after (rows + orjson)", lambda: trusted_path(session))):
+            seconds = measure(fn, args.repeat)
+            results[name] = seconds
+            print(f"{name:<26} {seconds * 1000:8.1f} ms  {args.rows / seconds:>10,.0f} rows/s")
+
+    before, after = results.values()
+    print(f"speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
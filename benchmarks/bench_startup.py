@@ -0,0 +1,97 @@
+"""
+Cold-start cost of an API worker: time to import ``main`` and time from
+process start to the first successful response.
+
+Every run spawns a fresh interpreter, so nothing is shared between runs.
+Import time is measured inside the child process. Time to first request
+launches ``uvicorn main:app`` and polls ``/metrics`` (no auth, no database)
+until it answers, so it includes interpreter start, imports and the
+lifespan warm-up against DATABASE_URL.
+
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --runs 5 --record benchmarks/startup_history.jsonl
+
+``--record`` appends the medians with the current commit as one JSON line,
+so the history can be kept in the repo and compared across changes.
+"""
+
+import argparse
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+IMPORT_SNIPPET = "import time; started = time.perf_counter(); import main; print(time.perf_counter() - started)"
+
+
+def import_time() -> float:
+    out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], check=True, capture_output=True, text=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_request(timeout: float) -> float:
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/metrics", timeout=1).status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.TransportError:
+                pass
+            time.sleep(0.01)
+        raise TimeoutError(f"no response within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def git_commit() -> str:
+    out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True)
+    return out.stdout.strip() or "unknown"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--record", metavar="PATH", help="append the medians as a JSON line to PATH")
+    args = parser.parse_args()
+
+    imports = [import_time() for _ in range(args.runs)]
+    first_requests = [time_to_first_request(args.timeout) for _ in range(args.runs)]
+
+    result = {
+        "commit": git_commit(),
+        "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "runs": args.runs,
+        "import_ms": round(statistics.median(imports) * 1000, 1),
+        "first_request_ms": round(statistics.median(first_requests) * 1000, 1),
+    }
+    print(f"import main:           median {result['import_ms']:8.1f} ms  (min {min(imports) * 1000:.1f})")
+    print(f"time to first request: median {result['first_request_ms']:8.1f} ms  (min {min(first_requests) * 1000:.1f})")
+
+    if args.record:
+        with open(args.record, "a") as f:
+            f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
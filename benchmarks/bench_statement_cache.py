@@ -0,0 +1,86 @@
+"""
+Per-call ORM overhead of the hot single-row lookups, built inline on every
+call versus executed from the prebuilt statements in ``app.db.statements``.
+
+Runs against an in-memory SQLite database holding one user, so the database
+round trip is close to free and what remains is SQLAlchemy's own work:
+building the statement, generating its cache key, finding the compiled SQL,
+binding parameters and loading the ORM object.
+
+    python -m benchmarks.bench_statement_cache --calls 20000
+
+Variants:
+    legacy query   ``db.query(User).filter(...).first()`` (the old ``get_user_by_email``)
+    inline select  ``db.scalar(select(User).where(...))`` built per call
+    prebuilt       ``db.scalar(LIVE_USER_BY_EMAIL, {"email": ...})``
+"""
+
+import argparse
+import statistics
+import time
+import uuid
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.db.db import Base
+import app.models.employee  # noqa: F401  (configures the mappers users refer to)
+from app.db.statements import LIVE_USER_BY_EMAIL, USER_BY_ID
+from app.models.EmunType import UserRole
+from app.models.User import User
+
+EMAIL = "bench@example.com"
+
+
+def seed(session: Session) -> uuid.UUID:
+    user = User(
+        id=uuid.uuid4(), name="Bench User", email=EMAIL, password_hash="x",
+        role=UserRole.ADMIN, is_active=True, is_deleted=False,
+    )
+    session.add(user)
+    session.commit()
+    return user.id
+
+
+def variants(user_id: uuid.UUID):
+    return {
+        "by email: legacy query": lambda db: db.query(User).filter(
+            User.email == EMAIL, User.is_deleted == False).first(),
+        "by email: inline select": lambda db: db.scalar(
+            select(User).where(User.email == EMAIL, User.is_deleted == False)),
+        "by email: prebuilt": lambda db: db.scalar(LIVE_USER_BY_EMAIL, {"email": EMAIL}),
+        "by id:    inline select": lambda db: db.scalar(
+            select(User).where(User.id == user_id, User.is_deleted == False)),
+        "by id:    prebuilt": lambda db: db.scalar(USER_BY_ID, {"id": user_id}),
+    }
+
+
+def time_calls(session: Session, call, calls: int) -> float:
+    for _ in range(min(calls, 500)):
+        call(session)
+    started = time.perf_counter()
+    for _ in range(calls):
+        call(session)
+    return (time.perf_counter() - started) / calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[User.__table__])
+    with Session(engine) as session:
+        user_id = seed(session)
+        for name, call in variants(user_id).items():
+            assert call(session).id == user_id, name
+            per_call = statistics.median(time_calls(session, call, args.calls) for _ in range(args.repeat))
+            print(f"{name:26} {per_call * 1e6:7.1f} µs/call")
+        cache = engine._compiled_cache
+        print(f"compiled cache entries: {len(cache)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,18 @@
 from fastapi import FastAPI
-from app.api import auth
-from app.db.db import Base  , engine
-app = FastAPI()
+from app.api import auth, employee, metrics
+from app.core.config import settings
+from app.core.instrumentation import InstrumentationMiddleware
+from app.core.responses import ORJSONResponse
+from app.startup import lifespan
 
-Base.metadata.create_all(bind=engine)
-app.include_router(router=auth.router , prefix='/api/user')
\ No newline at end of file
+# The schema is managed by Alembic: run `alembic upgrade head` before starting workers.
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+
+app.include_router(router=auth.router , prefix='/api/user')
+app.include_router(router=employee.router , prefix='/api/hr')
+app.include_router(router=metrics.router)
+
+app.add_middleware(
+    InstrumentationMiddleware,
+    budget=settings.SQL_STATEMENT_BUDGET, strict=settings.SQL_STATEMENT_BUDGET_STRICT,
+)
@@ -0,0 +1,76 @@
+"""baseline schema
+
+The schema before the HR module: only ``users``, the one table
+``Base.metadata.create_all`` built while the HR models were still unmapped.
+Every later table, column and index comes from a revision of its own.
+
+Databases that create_all built (at any point before migrations were
+introduced) have at least this table. Mark them as at the baseline and
+upgrade; the revisions up to ``0007_leave_period`` skip what already exists
+and backfill what is new:
+
+    alembic stamp 0001_baseline
+    alembic upgrade head
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-17 09:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '0001_baseline'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('users',
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('email', sa.String(length=150), nullable=False),
+    sa.Column('password_hash', sa.String(length=255), nullable=True),
+    sa.Column('role', sa.Enum('ADMIN', 'SALES', 'SALES_MANAGER', 'INVENTORY', 'INVENTORY_MANAGER', 'SUPPORT', 'SUPPORT_MANAGER', 'HR', 'FINANCE', 'PROJECT_MANAGER', 'MARKETING', name='userrole'), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('is_superuser', sa.Boolean(), nullable=False),
+    sa.Column('phone', sa.String(length=20), nullable=True),
+    sa.Column('mobile', sa.String(length=20), nullable=True),
+    sa.Column('avatar_url', sa.String(length=500), nullable=True),
+    sa.Column('language', sa.String(length=10), nullable=True),
+    sa.Column('timezone', sa.String(length=50), nullable=True),
+    sa.Column('last_login', sa.DateTime(), nullable=True),
+    sa.Column('failed_login_attempts', sa.Integer(), nullable=True),
+    sa.Column('locked_until', sa.DateTime(), nullable=True),
+    sa.Column('password_changed_at', sa.DateTime(), nullable=True),
+    sa.Column('preferences', postgresql.JSON(astext_type=sa.Text()), nullable=True),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.CheckConstraint('failed_login_attempts >= 0', name='ck_user_failed_attempts'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_users_active_role', 'users', ['is_active', 'role'], unique=False)
+    op.create_index(op.f('ix_users_created_at'), 'users', ['created_at'], unique=False)
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_is_active'), 'users', ['is_active'], unique=False)
+    op.create_index(op.f('ix_users_is_deleted'), 'users', ['is_deleted'], unique=False)
+    op.create_index(op.f('ix_users_name'), 'users', ['name'], unique=False)
+    op.create_index(op.f('ix_users_role'), 'users', ['role'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_users_role'), table_name='users')
+    op.drop_index(op.f('ix_users_name'), table_name='users')
+    op.drop_index(op.f('ix_users_is_deleted'), table_name='users')
+    op.drop_index(op.f('ix_users_is_active'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_index(op.f('ix_users_created_at'), table_name='users')
+    op.drop_index('idx_users_active_role', table_name='users')
+    op.drop_table('users')
+    sa.Enum(name='userrole').drop(op.get_bind(), checkfirst=True)
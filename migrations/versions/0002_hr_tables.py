@@ -0,0 +1,165 @@
+"""HR tables: departments, employees, attendances, leave_requests
+
+The HR models as they were first mapped, before any of the later HR
+features. Everything is created only if missing, so databases that
+create_all built can be stamped at the baseline and upgraded through here.
+
+Revision ID: 0002_hr_tables
+Revises: 0001_baseline
+Create Date: 2026-10-17 09:05:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '0002_hr_tables'
+down_revision: Union[str, None] = '0001_baseline'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+EMPLOYMENT_TYPES = ('FULL_TIME', 'PART_TIME', 'CONTRACT', 'INTERN', 'FREELANCE')
+# Created below rather than with the table, which would not skip an existing type.
+EMPLOYMENT_TYPE = postgresql.ENUM(*EMPLOYMENT_TYPES, name='employmenttype', create_type=False)
+
+
+def upgrade() -> None:
+    labels = ", ".join(f"'{label}'" for label in EMPLOYMENT_TYPES)
+    op.execute(f"""
+        DO $$ BEGIN
+            CREATE TYPE employmenttype AS ENUM ({labels});
+        EXCEPTION WHEN duplicate_object THEN NULL;
+        END $$
+    """)
+    op.create_table('departments',
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('code', sa.String(length=20), nullable=True),
+    sa.Column('parent_id', sa.UUID(), nullable=True),
+    sa.Column('manager_id', sa.UUID(), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['manager_id'], ['users.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['parent_id'], ['departments.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('code'),
+    if_not_exists=True,
+    )
+    op.create_table('employees',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('employee_number', sa.String(length=50), nullable=False),
+    sa.Column('department_id', sa.UUID(), nullable=True),
+    sa.Column('job_title', sa.String(length=100), nullable=True),
+    sa.Column('employment_type', EMPLOYMENT_TYPE, nullable=True),
+    sa.Column('joining_date', sa.Date(), nullable=False),
+    sa.Column('confirmation_date', sa.Date(), nullable=True),
+    sa.Column('resignation_date', sa.Date(), nullable=True),
+    sa.Column('last_working_date', sa.Date(), nullable=True),
+    sa.Column('manager_id', sa.UUID(), nullable=True),
+    sa.Column('current_salary', sa.Numeric(precision=12, scale=2), nullable=True),
+    sa.Column('currency', sa.String(length=3), nullable=True),
+    sa.Column('annual_leave_balance', sa.Numeric(precision=5, scale=2), nullable=True),
+    sa.Column('sick_leave_balance', sa.Numeric(precision=5, scale=2), nullable=True),
+    sa.Column('casual_leave_balance', sa.Numeric(precision=5, scale=2), nullable=True),
+    sa.Column('emergency_contact_name', sa.String(length=100), nullable=True),
+    sa.Column('emergency_contact_phone', sa.String(length=20), nullable=True),
+    sa.Column('emergency_contact_relation', sa.String(length=50), nullable=True),
+    sa.Column('current_address', sa.Text(), nullable=True),
+    sa.Column('permanent_address', sa.Text(), nullable=True),
+    sa.Column('documents', postgresql.JSON(astext_type=sa.Text()), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.CheckConstraint('annual_leave_balance >= 0', name='ck_annual_leave'),
+    sa.CheckConstraint('current_salary >= 0', name='ck_employee_salary'),
+    sa.ForeignKeyConstraint(['department_id'], ['departments.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['manager_id'], ['employees.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id'),
+    if_not_exists=True,
+    )
+    op.create_table('attendances',
+    sa.Column('employee_id', sa.UUID(), nullable=False),
+    sa.Column('attendance_date', sa.Date(), nullable=False),
+    sa.Column('check_in', sa.DateTime(), nullable=True),
+    sa.Column('check_out', sa.DateTime(), nullable=True),
+    sa.Column('worked_hours', sa.Numeric(precision=5, scale=2), nullable=True),
+    sa.Column('overtime_hours', sa.Numeric(precision=5, scale=2), nullable=True),
+    sa.Column('is_present', sa.Boolean(), nullable=True),
+    sa.Column('is_late', sa.Boolean(), nullable=True),
+    sa.Column('is_half_day', sa.Boolean(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.CheckConstraint('worked_hours >= 0', name='ck_worked_hours'),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('employee_id', 'attendance_date', name='uq_attendance_employee_date'),
+    if_not_exists=True,
+    )
+    op.create_table('leave_requests',
+    sa.Column('employee_id', sa.UUID(), nullable=False),
+    sa.Column('leave_type', sa.String(length=50), nullable=False),
+    sa.Column('start_date', sa.Date(), nullable=False),
+    sa.Column('end_date', sa.Date(), nullable=False),
+    sa.Column('days_count', sa.Numeric(precision=5, scale=2), nullable=False),
+    sa.Column('reason', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('approved_by', sa.UUID(), nullable=True),
+    sa.Column('approved_at', sa.DateTime(), nullable=True),
+    sa.Column('rejection_reason', sa.Text(), nullable=True),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.CheckConstraint('days_count > 0', name='ck_leave_days'),
+    sa.CheckConstraint('end_date >= start_date', name='ck_leave_dates'),
+    sa.ForeignKeyConstraint(['approved_by'], ['users.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True,
+    )
+    op.create_index(op.f('ix_departments_created_at'), 'departments', ['created_at'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_departments_is_deleted'), 'departments', ['is_deleted'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_departments_name'), 'departments', ['name'], unique=True, if_not_exists=True)
+    op.create_index('idx_employees_active', 'employees', ['is_active'], unique=False, if_not_exists=True)
+    op.create_index('idx_employees_department', 'employees', ['department_id'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_employees_created_at'), 'employees', ['created_at'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_employees_employee_number'), 'employees', ['employee_number'], unique=True, if_not_exists=True)
+    op.create_index(op.f('ix_employees_is_active'), 'employees', ['is_active'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_employees_is_deleted'), 'employees', ['is_deleted'], unique=False, if_not_exists=True)
+    op.create_index('idx_attendance_date', 'attendances', ['attendance_date'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_attendances_attendance_date'), 'attendances', ['attendance_date'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_attendances_created_at'), 'attendances', ['created_at'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_attendances_employee_id'), 'attendances', ['employee_id'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_attendances_is_deleted'), 'attendances', ['is_deleted'], unique=False, if_not_exists=True)
+    op.create_index('idx_leave_dates', 'leave_requests', ['start_date', 'end_date'], unique=False, if_not_exists=True)
+    op.create_index('idx_leave_status', 'leave_requests', ['status'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_leave_requests_created_at'), 'leave_requests', ['created_at'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_leave_requests_employee_id'), 'leave_requests', ['employee_id'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_leave_requests_is_deleted'), 'leave_requests', ['is_deleted'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_table('leave_requests')
+    op.drop_table('attendances')
+    op.drop_table('employees')
+    op.drop_table('departments')
+    op.execute("DROP TYPE IF EXISTS employmenttype")
@@ -0,0 +1,52 @@
+"""department_closure: transitive closure of the department tree (``departments.parent_id``)
+
+One row per ancestor/descendant pair, including each row paired with itself at
+depth 0. Backfilled with the same recursive walk as
+``app.services.hierarchy.rebuild``, with writers locked out meanwhile; a
+table that already exists is rebuilt rather than trusted.
+
+Revision ID: 0003_department_closure
+Revises: 0002_hr_tables
+Create Date: 2026-10-17 09:10:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0003_department_closure'
+down_revision: Union[str, None] = '0002_hr_tables'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL = """
+INSERT INTO department_closure (ancestor_id, descendant_id, depth)
+WITH RECURSIVE tree (ancestor_id, descendant_id, depth) AS (
+    SELECT id, id, 0 FROM departments
+    UNION ALL
+    SELECT tree.ancestor_id, child.id, tree.depth + 1
+    FROM tree JOIN departments AS child ON child.parent_id = tree.descendant_id
+)
+SELECT ancestor_id, descendant_id, depth FROM tree
+"""
+
+
+def upgrade() -> None:
+    op.create_table('department_closure',
+    sa.Column('ancestor_id', sa.UUID(), nullable=False),
+    sa.Column('descendant_id', sa.UUID(), nullable=False),
+    sa.Column('depth', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ancestor_id'], ['departments.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['descendant_id'], ['departments.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id'),
+    if_not_exists=True,
+    )
+    op.create_index('idx_department_closure_descendant', 'department_closure', ['descendant_id', 'depth'], unique=False, if_not_exists=True)
+    op.execute("LOCK TABLE departments IN SHARE MODE")
+    op.execute("DELETE FROM department_closure")
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_department_closure_descendant', table_name='department_closure')
+    op.drop_table('department_closure')
@@ -0,0 +1,52 @@
+"""employee_closure: transitive closure of the reporting chain (``employees.manager_id``)
+
+One row per ancestor/descendant pair, including each row paired with itself at
+depth 0. Backfilled with the same recursive walk as
+``app.services.hierarchy.rebuild``, with writers locked out meanwhile; a
+table that already exists is rebuilt rather than trusted.
+
+Revision ID: 0004_employee_closure
+Revises: 0003_department_closure
+Create Date: 2026-10-17 09:15:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0004_employee_closure'
+down_revision: Union[str, None] = '0003_department_closure'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL = """
+INSERT INTO employee_closure (ancestor_id, descendant_id, depth)
+WITH RECURSIVE tree (ancestor_id, descendant_id, depth) AS (
+    SELECT id, id, 0 FROM employees
+    UNION ALL
+    SELECT tree.ancestor_id, child.id, tree.depth + 1
+    FROM tree JOIN employees AS child ON child.manager_id = tree.descendant_id
+)
+SELECT ancestor_id, descendant_id, depth FROM tree
+"""
+
+
+def upgrade() -> None:
+    op.create_table('employee_closure',
+    sa.Column('ancestor_id', sa.UUID(), nullable=False),
+    sa.Column('descendant_id', sa.UUID(), nullable=False),
+    sa.Column('depth', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ancestor_id'], ['employees.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['descendant_id'], ['employees.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id'),
+    if_not_exists=True,
+    )
+    op.create_index('idx_employee_closure_descendant', 'employee_closure', ['descendant_id', 'depth'], unique=False, if_not_exists=True)
+    op.execute("LOCK TABLE employees IN SHARE MODE")
+    op.execute("DELETE FROM employee_closure")
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_employee_closure_descendant', table_name='employee_closure')
+    op.drop_table('employee_closure')
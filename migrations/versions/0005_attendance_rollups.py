@@ -0,0 +1,68 @@
+"""attendance_monthly_rollups: per-employee, per-month attendance totals
+
+Backfilled from the live ``attendances`` rows with the aggregates of
+``app.services.attendance_rollup.aggregate_columns``. Attendance writes are
+locked out until the revision commits, so no write falls between the
+backfill and the incremental maintenance that takes over from it. A table
+that already exists is recomputed rather than trusted.
+
+Revision ID: 0005_attendance_rollups
+Revises: 0004_employee_closure
+Create Date: 2026-10-17 09:20:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0005_attendance_rollups'
+down_revision: Union[str, None] = '0004_employee_closure'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL = """
+INSERT INTO attendance_monthly_rollups (
+    employee_id, month, days_recorded, days_present, days_absent,
+    late_count, half_day_count, worked_hours, overtime_hours
+)
+SELECT
+    employee_id,
+    date_trunc('month', attendance_date)::date,
+    count(*),
+    count(*) FILTER (WHERE is_present = true),
+    count(*) FILTER (WHERE is_present = false),
+    count(*) FILTER (WHERE is_late = true),
+    count(*) FILTER (WHERE is_half_day = true),
+    coalesce(sum(worked_hours), 0),
+    coalesce(sum(overtime_hours), 0)
+FROM attendances
+WHERE is_deleted = false
+GROUP BY employee_id, date_trunc('month', attendance_date)::date
+"""
+
+
+def upgrade() -> None:
+    op.create_table('attendance_monthly_rollups',
+    sa.Column('employee_id', sa.UUID(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('days_recorded', sa.Integer(), nullable=False),
+    sa.Column('days_present', sa.Integer(), nullable=False),
+    sa.Column('days_absent', sa.Integer(), nullable=False),
+    sa.Column('late_count', sa.Integer(), nullable=False),
+    sa.Column('half_day_count', sa.Integer(), nullable=False),
+    sa.Column('worked_hours', sa.Numeric(precision=8, scale=2), nullable=False),
+    sa.Column('overtime_hours', sa.Numeric(precision=8, scale=2), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('employee_id', 'month'),
+    if_not_exists=True,
+    )
+    op.create_index('idx_attendance_rollup_month', 'attendance_monthly_rollups', ['month'], unique=False, if_not_exists=True)
+    op.execute("LOCK TABLE attendances IN SHARE MODE")
+    op.execute("DELETE FROM attendance_monthly_rollups")
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_attendance_rollup_month', table_name='attendance_monthly_rollups')
+    op.drop_table('attendance_monthly_rollups')
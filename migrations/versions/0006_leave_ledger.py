@@ -0,0 +1,68 @@
+"""leave_ledger: append-only log of leave balance movements
+
+Balances that predate the ledger were never logged, so each employee gets
+one ``opening`` entry per balance column (annual, sick, casual) carrying the
+current balance. From then on the entries for a leave type add up to the
+employee's balance. Employees that already have entries for a leave type are
+left alone.
+
+Revision ID: 0006_leave_ledger
+Revises: 0005_attendance_rollups
+Create Date: 2026-10-17 09:25:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0006_leave_ledger'
+down_revision: Union[str, None] = '0005_attendance_rollups'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Leave type -> employees balance column, as in app.services.leave.BALANCE_COLUMNS
+BALANCE_COLUMNS = {
+    "annual": "annual_leave_balance",
+    "sick": "sick_leave_balance",
+    "casual": "casual_leave_balance",
+}
+
+BACKFILL = """
+INSERT INTO leave_ledger (id, employee_id, leave_type, delta, balance_after, entry_type)
+SELECT gen_random_uuid(), e.id, '{leave_type}', e.{column}, e.{column}, 'opening'
+FROM employees AS e
+WHERE e.{column} IS NOT NULL
+  AND NOT EXISTS (
+      SELECT 1 FROM leave_ledger AS l
+      WHERE l.employee_id = e.id AND l.leave_type = '{leave_type}'
+  )
+"""
+
+
+def upgrade() -> None:
+    op.create_table('leave_ledger',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('employee_id', sa.UUID(), nullable=False),
+    sa.Column('leave_request_id', sa.UUID(), nullable=True),
+    sa.Column('leave_type', sa.String(length=50), nullable=False),
+    sa.Column('delta', sa.Numeric(precision=5, scale=2), nullable=False),
+    sa.Column('balance_after', sa.Numeric(precision=5, scale=2), nullable=False),
+    sa.Column('entry_type', sa.String(length=20), nullable=False),
+    sa.Column('created_by', sa.UUID(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['leave_request_id'], ['leave_requests.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True,
+    )
+    op.create_index('idx_leave_ledger_employee', 'leave_ledger', ['employee_id', 'created_at'], unique=False, if_not_exists=True)
+    # Keep approvals from moving a balance while its opening entry is taken.
+    op.execute("LOCK TABLE employees IN SHARE MODE")
+    for leave_type, column in BALANCE_COLUMNS.items():
+        op.execute(BACKFILL.format(leave_type=leave_type, column=column))
+
+
+def downgrade() -> None:
+    op.drop_index('idx_leave_ledger_employee', table_name='leave_ledger')
+    op.drop_table('leave_ledger')
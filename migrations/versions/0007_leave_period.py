@@ -0,0 +1,76 @@
+"""leave_requests.period and the no-overlap exclusion constraint
+
+Adds the stored generated column ``period = daterange(start_date, end_date,
+'[]')``, the ``ex_leave_no_overlap`` exclusion constraint over live
+(pending/approved, not deleted) requests, and a GiST index on ``period``
+that replaces the btree ``idx_leave_dates``.
+
+The constraint cannot be added while an employee already holds overlapping
+live requests, so the upgrade checks for them first and stops with the
+offending request ids; cancel or reject one of each pair and run it again.
+
+Adding the column rewrites ``leave_requests`` under an exclusive lock.
+
+Revision ID: 0007_leave_period
+Revises: 0006_leave_ledger
+Create Date: 2026-10-17 09:28:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '0007_leave_period'
+down_revision: Union[str, None] = '0006_leave_ledger'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LIVE_LEAVE = "NOT {alias}is_deleted AND {alias}status IN ('pending', 'approved')"
+
+CHECK_NO_OVERLAPS = f"""
+DO $$
+DECLARE
+    clashes bigint;
+    first_id uuid;
+    second_id uuid;
+BEGIN
+    SELECT count(*) OVER (), a.id, b.id INTO clashes, first_id, second_id
+    FROM leave_requests AS a
+    JOIN leave_requests AS b
+      ON b.employee_id = a.employee_id AND a.id < b.id
+     AND a.start_date <= b.end_date AND b.start_date <= a.end_date
+    WHERE {LIVE_LEAVE.format(alias="a.")} AND {LIVE_LEAVE.format(alias="b.")}
+    ORDER BY a.id, b.id
+    LIMIT 1;
+    IF FOUND THEN
+        RAISE EXCEPTION '% pair(s) of live leave requests overlap, e.g. % and %', clashes, first_id, second_id
+            USING HINT = 'Cancel or reject one request of each pair, then rerun the upgrade.';
+    END IF;
+END $$
+"""
+
+
+def upgrade() -> None:
+    # GiST on a uuid equality column (ex_leave_no_overlap) needs btree_gist
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.execute("LOCK TABLE leave_requests IN SHARE ROW EXCLUSIVE MODE")
+    op.execute(CHECK_NO_OVERLAPS)
+    op.execute(
+        "ALTER TABLE leave_requests ADD COLUMN IF NOT EXISTS period daterange "
+        "GENERATED ALWAYS AS (daterange(start_date, end_date, '[]')) STORED"
+    )
+    op.execute("ALTER TABLE leave_requests DROP CONSTRAINT IF EXISTS ex_leave_no_overlap")
+    op.execute(
+        "ALTER TABLE leave_requests ADD CONSTRAINT ex_leave_no_overlap "
+        "EXCLUDE USING gist (employee_id WITH =, period WITH &&) "
+        f"WHERE ({LIVE_LEAVE.format(alias='')})"
+    )
+    op.create_index('idx_leave_period', 'leave_requests', ['period'], unique=False, postgresql_using='gist', if_not_exists=True)
+    op.drop_index('idx_leave_dates', table_name='leave_requests', if_exists=True)
+
+
+def downgrade() -> None:
+    op.create_index('idx_leave_dates', 'leave_requests', ['start_date', 'end_date'], unique=False, if_not_exists=True)
+    op.drop_index('idx_leave_period', table_name='leave_requests', postgresql_using='gist')
+    op.drop_constraint('ex_leave_no_overlap', 'leave_requests')
+    op.drop_column('leave_requests', 'period')
+    # btree_gist stays: other objects in the database may have come to use it.
@@ -0,0 +1,80 @@
+"""partial indexes on live rows; drop redundant single-column indexes
+
+Every list endpoint filters ``is_deleted = false`` and then seeks on
+``employee_id``/``department_id``/``status`` and pages by a date. The new
+indexes cover exactly those shapes over live rows only. The single-column
+``is_deleted``/``created_at`` indexes, the duplicated ``attendance_date`` and
+``is_active`` indexes, and ``attendances.employee_id`` (a prefix of
+``uq_attendance_employee_date``) go, so writes maintain fewer indexes.
+
+Indexes are built and dropped ``CONCURRENTLY`` so the tables stay writable.
+
+Revision ID: 0008_live_row_indexes
+Revises: 0007_leave_period
+Create Date: 2026-10-17 09:30:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0008_live_row_indexes'
+down_revision: Union[str, None] = '0007_leave_period'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LIVE_ROWS = sa.text("is_deleted = false")
+
+# name, table, columns
+NEW_INDEXES = [
+    ("idx_departments_live_created", "departments", ["created_at", "id"]),
+    ("idx_employees_live_created", "employees", ["created_at", "id"]),
+    ("idx_employees_live_department", "employees", ["department_id", "created_at", "id"]),
+    ("idx_attendance_live_employee_date", "attendances",
+     ["employee_id", sa.text("attendance_date DESC"), sa.text("id DESC")]),
+    ("idx_attendance_live_date", "attendances", [sa.text("attendance_date DESC"), sa.text("id DESC")]),
+    ("idx_leave_live_created", "leave_requests", [sa.text("created_at DESC"), sa.text("id DESC")]),
+    ("idx_leave_live_status_created", "leave_requests", ["status", sa.text("created_at DESC"), sa.text("id DESC")]),
+    ("idx_leave_live_employee_created", "leave_requests",
+     ["employee_id", sa.text("created_at DESC"), sa.text("id DESC")]),
+]
+
+REDUNDANT_INDEXES = [
+    ("ix_users_is_deleted", "users", ["is_deleted"]),
+    ("ix_users_created_at", "users", ["created_at"]),
+    ("ix_users_is_active", "users", ["is_active"]),  # prefix of idx_users_active_role
+    ("ix_departments_is_deleted", "departments", ["is_deleted"]),
+    ("ix_departments_created_at", "departments", ["created_at"]),
+    ("ix_employees_is_deleted", "employees", ["is_deleted"]),
+    ("ix_employees_created_at", "employees", ["created_at"]),
+    ("ix_employees_is_active", "employees", ["is_active"]),
+    ("idx_employees_active", "employees", ["is_active"]),
+    ("ix_attendances_is_deleted", "attendances", ["is_deleted"]),
+    ("ix_attendances_created_at", "attendances", ["created_at"]),
+    ("ix_attendances_attendance_date", "attendances", ["attendance_date"]),
+    ("idx_attendance_date", "attendances", ["attendance_date"]),
+    ("ix_attendances_employee_id", "attendances", ["employee_id"]),
+    ("ix_leave_requests_is_deleted", "leave_requests", ["is_deleted"]),
+    ("ix_leave_requests_created_at", "leave_requests", ["created_at"]),
+    ("idx_leave_status", "leave_requests", ["status"]),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        # Build the replacements first so no list query is left without an index.
+        for name, table, columns in NEW_INDEXES:
+            op.create_index(
+                name, table, columns, postgresql_where=LIVE_ROWS,
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+        for name, table, _ in REDUNDANT_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in REDUNDANT_INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        for name, table, _ in NEW_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
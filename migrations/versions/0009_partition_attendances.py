@@ -0,0 +1,86 @@
+"""partition attendances by month on attendance_date
+
+Rebuilds ``attendances`` as a range-partitioned table: one partition per
+month from the oldest row through three months ahead, plus a default
+partition for anything outside them. The primary key becomes
+``(id, attendance_date)`` because a partitioned table's unique constraints
+must include the partition key.
+
+Rows are copied in one transaction that holds an exclusive lock on the old
+table throughout, so run this in a maintenance window. Afterwards the
+``attendance.create_partitions`` beat job keeps future months created.
+
+Revision ID: 0009_partition_attendances
+Revises: 0008_live_row_indexes
+Create Date: 2026-10-17 10:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '0009_partition_attendances'
+down_revision: Union[str, None] = '0008_live_row_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+# Runs server-side, so the partition range also comes out right for `alembic upgrade --sql`.
+CREATE_MONTHLY_PARTITIONS = f"""
+DO $$
+DECLARE
+    month date := date_trunc('month', coalesce((SELECT min(attendance_date) FROM attendances), current_date));
+    last date := date_trunc('month', greatest((SELECT max(attendance_date) FROM attendances), current_date))
+                 + interval '{MONTHS_AHEAD} months';
+BEGIN
+    WHILE month <= last LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF attendances_partitioned FOR VALUES FROM (%L) TO (%L)',
+            'attendances_p' || to_char(month, 'YYYYMM'), month, (month + interval '1 month')::date
+        );
+        month := month + interval '1 month';
+    END LOOP;
+END $$
+"""
+
+
+def _add_constraints_and_indexes(primary_key) -> None:
+    op.create_primary_key('attendances_pkey', 'attendances', primary_key)
+    op.create_unique_constraint('uq_attendance_employee_date', 'attendances', ['employee_id', 'attendance_date'])
+    op.create_check_constraint('ck_worked_hours', 'attendances', 'worked_hours >= 0')
+    op.create_foreign_key(
+        'attendances_employee_id_fkey', 'attendances', 'employees', ['employee_id'], ['id'], ondelete='CASCADE',
+    )
+    op.create_index(
+        'idx_attendance_live_employee_date', 'attendances',
+        ['employee_id', sa.text('attendance_date DESC'), sa.text('id DESC')],
+        postgresql_where=sa.text('is_deleted = false'),
+    )
+    op.create_index(
+        'idx_attendance_live_date', 'attendances', [sa.text('attendance_date DESC'), sa.text('id DESC')],
+        postgresql_where=sa.text('is_deleted = false'),
+    )
+
+
+def upgrade() -> None:
+    op.execute("LOCK TABLE attendances IN EXCLUSIVE MODE")
+    op.execute(
+        "CREATE TABLE attendances_partitioned (LIKE attendances INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (attendance_date)"
+    )
+    op.execute(CREATE_MONTHLY_PARTITIONS)
+    op.execute("CREATE TABLE attendances_default PARTITION OF attendances_partitioned DEFAULT")
+    op.execute("INSERT INTO attendances_partitioned SELECT * FROM attendances")
+    op.drop_table('attendances')
+    op.rename_table('attendances_partitioned', 'attendances')
+    _add_constraints_and_indexes(['id', 'attendance_date'])
+
+
+def downgrade() -> None:
+    op.execute("LOCK TABLE attendances IN EXCLUSIVE MODE")
+    op.execute("CREATE TABLE attendances_unpartitioned (LIKE attendances INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO attendances_unpartitioned SELECT * FROM attendances")
+    op.drop_table('attendances')  # and every partition with it
+    op.rename_table('attendances_unpartitioned', 'attendances')
+    _add_constraints_and_indexes(['id'])
@@ -0,0 +1,221 @@
+"""
+In-memory stand-ins for the slice of the redis-py API the caches use.
+
+``FakeRedis`` mirrors ``redis.Redis`` and ``FakeAsyncRedis`` mirrors
+``redis.asyncio.Redis``; both can share one ``store`` to play several workers
+against the same server. Values are kept as bytes, as redis-py returns them.
+Lua scripts are not interpreted: ``register_script`` looks the script up in
+``SCRIPTS`` and runs its Python equivalent.
+"""
+
+import queue
+import time
+from typing import Dict, List, Optional
+
+from app.core.cache import PrincipalCache, ResponseCache
+
+
+def _bytes(value) -> bytes:
+    return value if isinstance(value, bytes) else str(value).encode()
+
+
+class Store:
+    def __init__(self):
+        self.data: Dict[bytes, object] = {}
+        self.expires: Dict[bytes, float] = {}
+        self.subscribers: Dict[bytes, List[queue.Queue]] = {}
+
+    def _live(self, key: bytes):
+        if key in self.expires and self.expires[key] <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return self.data.get(key)
+
+    # -- strings -------------------------------------------------------------
+
+    def get(self, key):
+        return self._live(_bytes(key))
+
+    def set(self, key, value, nx: bool = False, px: Optional[int] = None):
+        key = _bytes(key)
+        if nx and self._live(key) is not None:
+            return None
+        self.data[key] = _bytes(value)
+        self.expires.pop(key, None)
+        if px is not None:
+            self.expires[key] = time.monotonic() + px / 1000
+        return True
+
+    def incr(self, key):
+        key = _bytes(key)
+        value = int(self._live(key) or 0) + 1
+        self.data[key] = _bytes(value)
+        return value
+
+    def exists(self, key):
+        return int(self._live(_bytes(key)) is not None)
+
+    def delete(self, key):
+        key = _bytes(key)
+        self.expires.pop(key, None)
+        return int(self.data.pop(key, None) is not None)
+
+    def expire(self, key, seconds):
+        key = _bytes(key)
+        if self._live(key) is None:
+            return False
+        self.expires[key] = time.monotonic() + seconds
+        return True
+
+    # -- hashes --------------------------------------------------------------
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        item = self._live(_bytes(key))
+        if item is None:
+            item = self.data[_bytes(key)] = {}
+        fields = dict(mapping or {})
+        if field is not None:
+            fields[field] = value
+        for name, val in fields.items():
+            item[_bytes(name)] = _bytes(val)
+        return len(fields)
+
+    def hdel(self, key, *fields):
+        item = self._live(_bytes(key)) or {}
+        return sum(item.pop(_bytes(name), None) is not None for name in fields)
+
+    def hgetall(self, key):
+        return dict(self._live(_bytes(key)) or {})
+
+    def hmget(self, key, *fields):
+        item = self._live(_bytes(key)) or {}
+        return [item.get(_bytes(name)) for name in fields]
+
+    # -- pub/sub ---------------------------------------------------------------
+
+    def publish(self, channel, message):
+        subscribers = self.subscribers.get(_bytes(channel), [])
+        for inbox in subscribers:
+            inbox.put({"type": "message", "channel": _bytes(channel), "data": _bytes(message)})
+        return len(subscribers)
+
+
+# Python equivalents of the caches' Lua scripts.
+def _set_principal(store: Store, keys, args):
+    current = store.hgetall(keys[0]).get(b"gen")
+    if current is not None and int(current) > int(args[0]):
+        return 0
+    store.hset(keys[0], mapping={"gen": args[0], "user": args[1]})
+    store.expire(keys[0], int(args[2]))
+    return 1
+
+
+def _release_lock(store: Store, keys, args):
+    if store.get(keys[0]) == _bytes(args[0]):
+        return store.delete(keys[0])
+    return 0
+
+
+SCRIPTS = {
+    PrincipalCache._SET_SCRIPT: _set_principal,
+    ResponseCache._RELEASE_SCRIPT: _release_lock,
+}
+
+
+class FakeRedis:
+    def __init__(self, store: Optional[Store] = None):
+        self.store = store or Store()
+        self.calls = []
+
+    def __getattr__(self, name):
+        method = getattr(self.store, name)
+
+        def call(*args, **kwargs):
+            self.calls.append(name)
+            return method(*args, **kwargs)
+
+        return call
+
+    def pipeline(self, transaction: bool = True):
+        return _Pipeline(self)
+
+    def pubsub(self, ignore_subscribe_messages: bool = False):
+        return _PubSub(self.store)
+
+    def register_script(self, script: str):
+        implementation = SCRIPTS[script]
+        return lambda keys, args: implementation(self.store, keys, args)
+
+
+class FakeAsyncRedis(FakeRedis):
+    def __getattr__(self, name):
+        call = super().__getattr__(name)
+
+        async def async_call(*args, **kwargs):
+            return call(*args, **kwargs)
+
+        return async_call
+
+    def register_script(self, script: str):
+        run = super().register_script(script)
+
+        async def async_run(keys, args):
+            return run(keys, args)
+
+        return async_run
+
+    def pipeline(self, transaction: bool = True):
+        return _AsyncPipeline(self)
+
+
+class _Pipeline:
+    def __init__(self, client: FakeRedis):
+        self._client = client
+        self._queued = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self._queued.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        queued, self._queued = self._queued, []
+        return [FakeRedis.__getattr__(self._client, name)(*args, **kwargs) for name, args, kwargs in queued]
+
+
+class _AsyncPipeline(_Pipeline):
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._queued = []
+
+    async def execute(self):
+        return _Pipeline.execute(self)
+
+
+class _PubSub:
+    """Subscriber side of ``Store.publish``; subscribe confirmations are never delivered."""
+
+    def __init__(self, store: Store):
+        self._store = store
+        self._inbox: queue.Queue = queue.Queue()
+        self._channels: List[bytes] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        for channel in self._channels:
+            self._store.subscribers[channel].remove(self._inbox)
+
+    def subscribe(self, channel):
+        self._channels.append(_bytes(channel))
+        self._store.subscribers.setdefault(_bytes(channel), []).append(self._inbox)
+
+    def get_message(self, timeout: float = 0.0):
+        try:
+            return self._inbox.get(timeout=timeout)
+        except queue.Empty:
+            return None
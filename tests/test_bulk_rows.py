@@ -0,0 +1,82 @@
+import asyncio
+import csv
+
+import pytest
+
+from app.services.attendance import _iter_csv_records, _iter_lines, iter_bulk_rows
+
+
+class StreamedRequest:
+    """Just enough of a Starlette ``Request`` for the bulk parsers: a body arriving in ``chunks``."""
+
+    def __init__(self, chunks, content_type: str = "text/csv"):
+        self.chunks = chunks
+        self.headers = {"content-type": content_type}
+
+    async def stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+async def collect(iterator) -> list:
+    return [item async for item in iterator]
+
+
+def lines(*chunks) -> list:
+    return asyncio.run(collect(_iter_lines(StreamedRequest(chunks))))
+
+
+def records(*chunks) -> list:
+    return asyncio.run(collect(_iter_csv_records(_iter_lines(StreamedRequest(chunks)))))
+
+
+def bulk_rows(*chunks, content_type: str = "text/csv") -> list:
+    return asyncio.run(collect(iter_bulk_rows(StreamedRequest(chunks, content_type))))
+
+
+def test_lines_keep_newlines_across_chunks():
+    assert lines(b"a,b\nc", b",d\n", b"e\n") == ["a,b\n", "c,d\n", "e\n"]
+
+
+def test_multibyte_character_split_across_chunks():
+    encoded = "Zoë,Ünal\n".encode()
+    split = encoded.index("ë".encode()) + 1
+    assert lines(encoded[:split], encoded[split:]) == ["Zoë,Ünal\n"]
+
+
+def test_last_line_without_newline():
+    assert lines(b"a\n", b"b") == ["a\n", "b"]
+    assert records(b'a,"b\nc"') == ['a,"b\nc"']
+
+
+def test_quoted_newline_joins_lines():
+    assert records(b'id,note\n1,"first\nsecond"\n2,x\n') == ["id,note\n", '1,"first\nsecond"\n', "2,x\n"]
+
+
+def test_escaped_quote_does_not_open_a_field():
+    assert records(b'1,"say ""hi"""\n2,x\n') == ['1,"say ""hi"""\n', "2,x\n"]
+
+
+def test_unterminated_quote_is_one_trailing_record():
+    assert records(b'1,x\n2,"open\n3,y\n') == ["1,x\n", '2,"open\n3,y\n']
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1024])
+def test_csv_rows_split_anywhere(chunk_size):
+    body = 'employee_id,notes\n1,"late, ""traffic""\nback at 10"\n2,\n'.encode()
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+    assert bulk_rows(*chunks) == [
+        (0, {"employee_id": "1", "notes": 'late, "traffic"\nback at 10'}),
+        (1, {"employee_id": "2"}),
+    ]
+
+
+def test_unterminated_quote_is_an_invalid_row():
+    (index, row), = bulk_rows(b'employee_id,notes\n1,"open\n')
+    assert index == 0
+    assert isinstance(row, csv.Error)
+
+
+def test_ndjson_rows():
+    (_, first), (_, second) = bulk_rows(b'{"a": 1}\n{"a":', b" 2}", content_type="application/x-ndjson")
+    assert first == {"a": 1} and second == {"a": 2}
@@ -0,0 +1,33 @@
+import uuid
+
+import pytest
+
+from app.core.etag import entity_tag, etag_matches, if_match_versions
+
+ROW_ID = uuid.uuid4()
+TAG = entity_tag(ROW_ID, 3)
+
+
+@pytest.mark.parametrize("header, matches", [
+    (None, False),
+    ("", False),
+    ("*", True),
+    (TAG, True),
+    (TAG.removeprefix("W/"), True),  # weak comparison
+    (f'W/"other.1", {TAG}', True),
+    (entity_tag(ROW_ID, 2), False),
+])
+def test_etag_matches(header, matches):
+    assert etag_matches(header, TAG) is matches
+
+
+@pytest.mark.parametrize("header, versions", [
+    (None, None),
+    ("*", None),
+    (TAG, [3]),
+    (f'{entity_tag(ROW_ID, 2)}, "{ROW_ID}.5"', [2, 5]),
+    (entity_tag(uuid.uuid4(), 3), []),  # another row's tag never matches
+    (f'W/"{ROW_ID}.latest"', []),
+])
+def test_if_match_versions(header, versions):
+    assert if_match_versions(header, ROW_ID) == versions
@@ -0,0 +1,28 @@
+import pytest
+from fastapi import HTTPException
+
+from app.api.employee import EMPLOYEE_EXPANSIONS
+from app.core.expand import expand_options
+
+
+def strategies(options) -> dict:
+    return {option.context[0].path[1].key: dict(option.context[0].strategy)["lazy"] for option in options}
+
+
+def test_unrequested_relationships_are_noloaded():
+    assert strategies(expand_options(None, EMPLOYEE_EXPANSIONS)) == {
+        "user": "noload", "department": "noload", "manager": "noload",
+    }
+
+
+def test_requested_relationships_use_their_strategy():
+    assert strategies(expand_options(" department, manager,", EMPLOYEE_EXPANSIONS)) == {
+        "user": "noload", "department": "joined", "manager": "selectin",
+    }
+
+
+def test_unknown_expand_is_a_400():
+    with pytest.raises(HTTPException) as exc:
+        expand_options("department,salary", EMPLOYEE_EXPANSIONS)
+    assert exc.value.status_code == 400
+    assert "salary" in exc.value.detail
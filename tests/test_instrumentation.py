@@ -0,0 +1,79 @@
+import pytest
+from sqlalchemy import create_engine, text
+from starlette.testclient import TestClient
+
+from app.core.instrumentation import (
+    STATEMENT_COUNT_HEADER, InstrumentationMiddleware, StatementBudgetExceeded, fingerprint,
+    install_sql_instrumentation, normalize_sql,
+)
+
+
+@pytest.mark.parametrize("statement, expected", [
+    ("SELECT * FROM users WHERE id = $1::UUID", "SELECT * FROM users WHERE id = ?"),
+    ("SELECT * FROM users WHERE email = 'a@b.io' AND age > 42", "SELECT * FROM users WHERE email = ? AND age > ?"),
+    ("SELECT 'it''s'", "SELECT ?"),
+    ("SELECT * FROM t WHERE id IN (%(id_1)s, %(id_2)s, %(id_3)s)", "SELECT * FROM t WHERE id IN (?...)"),
+    ("INSERT INTO t (a, b) VALUES ($1, $2), ($3, $4), ($5, $6)", "INSERT INTO t (a, b) VALUES (?...), ..."),
+    ("SELECT a\n  FROM   t\tWHERE b = ?", "SELECT a FROM t WHERE b = ?"),
+])
+def test_normalize_sql(statement, expected):
+    assert normalize_sql(statement) == expected
+
+
+def test_fingerprint_ignores_parameters_but_not_shape():
+    assert fingerprint("SELECT * FROM t WHERE id IN ($1, $2)") == fingerprint("SELECT * FROM t WHERE id IN ($1, $2, $3)")
+    assert fingerprint("SELECT a FROM t") != fingerprint("SELECT b FROM t")
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    install_sql_instrumentation(engine)
+    yield engine
+    engine.dispose()
+
+
+def budget_client(engine, statements: int, streamed: int = 0, **kwargs) -> TestClient:
+    """A client for an app that runs ``statements`` before responding and ``streamed`` while sending the body."""
+    async def app(scope, receive, send):
+        with engine.connect() as conn:
+            for _ in range(statements):
+                conn.execute(text("SELECT 1"))
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            for _ in range(streamed):
+                conn.execute(text("SELECT 1"))
+                await send({"type": "http.response.body", "body": b"row\n", "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    return TestClient(InstrumentationMiddleware(app, **kwargs))
+
+
+def test_budget_strict_raises(engine):
+    with pytest.raises(StatementBudgetExceeded, match="ran 2 SQL statements"):
+        budget_client(engine, 2, budget=1, strict=True).get("/")
+
+
+def test_budget_lenient_only_warns(engine, caplog):
+    response = budget_client(engine, 2, budget=1).get("/")
+    assert response.status_code == 200
+    assert response.headers[STATEMENT_COUNT_HEADER] == "2"
+    assert "ran 2 SQL statements (budget 1)" in caplog.text
+
+
+def test_within_budget_is_silent(engine, caplog):
+    response = budget_client(engine, 1, budget=1, strict=True).get("/")
+    assert response.status_code == 200
+    assert "SQL statements" not in caplog.text
+
+
+def test_budget_counts_statements_run_while_streaming(engine, caplog):
+    response = budget_client(engine, 1, streamed=2, budget=2).get("/")
+    assert response.headers[STATEMENT_COUNT_HEADER] == "1"
+    assert "ran 3 SQL statements (budget 2)" in caplog.text
+    with pytest.raises(StatementBudgetExceeded):
+        budget_client(engine, 1, streamed=2, budget=2, strict=True).get("/")
+
+
+def test_budget_warns_once(engine, caplog):
+    budget_client(engine, 2, streamed=1, budget=1).get("/")
+    assert caplog.text.count("SQL statements (budget 1)") == 1
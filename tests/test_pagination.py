@@ -0,0 +1,24 @@
+import uuid
+from datetime import date, datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.pagination import decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize("sort_value", [datetime(2024, 5, 17, 9, 30, 12, 123456), date(2024, 2, 29)])
+def test_cursor_round_trip(sort_value):
+    row_id = uuid.uuid4()
+    cursor = encode_cursor(sort_value, row_id)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, type(sort_value)) == (sort_value, row_id)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", encode_cursor(date(2024, 1, 1), "not-a-uuid")])
+def test_invalid_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, date)
+    assert exc.value.status_code == 400
+
@@ -0,0 +1,193 @@
+import asyncio
+import time
+import uuid
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import app.models.employee  # noqa: F401  (configures the mappers users refer to)
+from app.core import cache as cache_module
+from app.core.cache import PrincipalCache
+from app.db.db import Base
+from app.models.EmunType import UserRole
+from app.models.User import User
+from tests.fakes import FakeRedis, Store
+
+
+def make_cache(store: Store = None) -> PrincipalCache:
+    cache = PrincipalCache(maxsize=100, ttl=60)
+    if store is not None:
+        cache._redis = FakeRedis(store)
+        cache._set_script = cache._redis.register_script(PrincipalCache._SET_SCRIPT)
+    return cache
+
+
+def make_user(version: int = 1, **fields) -> User:
+    values = dict(
+        id=uuid.uuid4(), name="Ada", email="ada@example.com", role=UserRole.HR,
+        is_active=True, is_superuser=False, is_deleted=False, language="en", timezone="UTC", version=version,
+    )
+    return User(**{**values, **fields})
+
+
+def get(cache: PrincipalCache, user: User, generation):
+    return asyncio.run(cache.get(str(user.id), generation))
+
+
+@pytest.mark.parametrize("with_redis", [False, True])
+def test_entry_serves_tokens_up_to_its_generation(with_redis):
+    cache = make_cache(Store() if with_redis else None)
+    user = make_user(version=3)
+    asyncio.run(cache.set(user))
+    for generation in (None, 1, 3):
+        principal = get(cache, user, generation)
+        assert principal.id == user.id and principal.version == 3
+    assert get(cache, user, 4) is None
+
+
+def test_redis_tier_is_shared_and_fills_l1():
+    store = Store()
+    writer, reader = make_cache(store), make_cache(store)
+    user = make_user(version=2)
+    asyncio.run(writer.set(user))
+    assert get(reader, user, 2).role == UserRole.HR
+    assert get(reader, user, 2) is not None
+    assert reader.stats()["redis_hits"] == 1 and reader.stats()["local_hits"] == 1
+
+
+def test_tokens_without_generation_skip_redis():
+    store = Store()
+    writer, reader = make_cache(store), make_cache(store)
+    user = make_user()
+    asyncio.run(writer.set(user))
+    assert get(reader, user, None) is None
+    assert reader._redis.calls == []
+
+
+@pytest.mark.parametrize("with_redis", [False, True])
+def test_tombstone_refuses_older_writes(with_redis):
+    store = Store() if with_redis else None
+    cache = make_cache(store)
+    user = make_user(version=1)
+    asyncio.run(cache.set(user))
+    cache.invalidate(str(user.id), 2)
+    assert get(cache, user, 1) is None
+    assert get(cache, user, None) is None
+
+    # A request that read the row before the change committed cannot put it back.
+    asyncio.run(cache.set(user))
+    assert get(cache, user, 1) is None
+    if with_redis:
+        assert store.hgetall(f"principal:{user.id}") == {b"gen": b"2"}
+
+    asyncio.run(cache.set(make_user(version=2, id=user.id, role=UserRole.ADMIN)))
+    assert get(cache, user, 2).role == UserRole.ADMIN
+
+
+def test_redis_tombstone_applies_to_other_workers():
+    store = Store()
+    writer, reader = make_cache(store), make_cache(store)
+    user = make_user(version=1)
+    writer.invalidate(str(user.id), 2)
+    asyncio.run(reader.set(user))
+    assert store.hgetall(f"principal:{user.id}") == {b"gen": b"2"}
+
+
+def wait_for(condition, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_invalidation_reaches_other_workers_l1():
+    store = Store()
+    writer, reader = make_cache(store), make_cache(store)
+    reader.POLL_INTERVAL = 0.01
+    user = make_user(version=1)
+    reader.start()
+    try:
+        assert wait_for(lambda: store.subscribers.get(b"principal:invalidate"))
+        asyncio.run(reader.set(user))
+        writer.invalidate(str(user.id), 2)
+        assert wait_for(lambda: reader._local.get(str(user.id)) == (2, None))
+        assert get(reader, user, 1) is None
+    finally:
+        reader.stop()
+    assert not store.subscribers[b"principal:invalidate"]
+
+
+def test_listener_clears_l1_on_subscribe():
+    store = Store()
+    cache = make_cache(store)
+    cache.POLL_INTERVAL = 0.01
+    asyncio.run(cache.set(make_user()))
+    cache.start()
+    try:
+        assert wait_for(lambda: len(cache._local) == 0)
+    finally:
+        cache.stop()
+
+
+@pytest.fixture
+def principals(monkeypatch) -> PrincipalCache:
+    """The cache the session events invalidate."""
+    fresh = make_cache()
+    monkeypatch.setattr(cache_module, "principal_cache", fresh)
+    return fresh
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[User.__table__])
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def seed(session: Session, principals: PrincipalCache) -> User:
+    user = make_user(version=1)
+    session.add(user)
+    session.commit()
+    asyncio.run(principals.set(user))
+    return user
+
+
+def test_principal_change_bumps_generation_and_invalidates_after_commit(session, principals):
+    user = seed(session, principals)
+    user.role = UserRole.ADMIN
+    session.flush()
+    assert user.version == 2
+    # Not before the commit: a concurrent request could re-cache the old row.
+    assert get(principals, user, 1) is not None
+    session.commit()
+    assert get(principals, user, 1) is None
+    assert principals._local.get(str(user.id)) == (2, None)
+
+
+def test_other_changes_keep_the_entry(session, principals):
+    user = seed(session, principals)
+    user.phone = "555-0100"
+    session.commit()
+    assert user.version == 1
+    assert get(principals, user, 1) is not None
+
+
+def test_rollback_discards_pending_invalidations(session, principals):
+    user = seed(session, principals)
+    user.is_active = False
+    session.flush()
+    session.rollback()
+    session.commit()
+    assert get(principals, user, 1) is not None
+
+
+def test_soft_delete_invalidates(session, principals):
+    user = seed(session, principals)
+    user.is_deleted = True
+    session.commit()
+    assert principals._local.get(str(user.id)) == (2, None)
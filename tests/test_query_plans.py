@@ -0,0 +1,177 @@
+"""
+EXPLAIN-based regression test: every list and read endpoint's query must be
+served by the index meant for it.
+
+Statements are built with the endpoints' own filter and pagination helpers,
+then EXPLAINed against DATABASE_URL with sequential scans disabled, so even
+an empty development database shows which index *can* serve each query. A
+case fails when its plan contains a sequential scan, does not use the
+expected index, or needs a Sort for a keyset page. On the partitioned
+``attendances`` table, date-range queries must also prune to the monthly
+partitions they cover. Skipped unless DATABASE_URL is set, pointing at a
+migrated database:
+
+    alembic upgrade head
+    DATABASE_URL=postgresql://... python -m pytest tests/test_query_plans.py
+"""
+
+import json
+import os
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import pytest
+from sqlalchemy import create_engine, func, select
+
+import app.models.User  # noqa: F401  (configures the mappers employees refer to)
+from app.core.pagination import encode_cursor, page_query
+from app.services.partitions import PARENT_TABLE, add_months, month_start, partition_name
+from app.services.queries import (
+    ATTENDANCE_ROWS, DEPARTMENT_ROWS, EMPLOYEE_ROWS, LEAVE_ROWS,
+    filter_attendance, filter_employees, filter_leave_requests,
+)
+from app.db.db import DATABASE_URL
+from app.models.employee import Attendance, Department, Employee, LeaveRequest
+
+pytestmark = pytest.mark.skipif("DATABASE_URL" not in os.environ, reason="needs a migrated database in DATABASE_URL")
+
+
+class Case(NamedTuple):
+    name: str
+    stmt: object
+    index: str
+    ordered: bool = True  # a keyset page: the index must also provide the order
+    months: Optional[Tuple[date, date]] = None  # attendances partitions the plan may touch
+
+
+def cases() -> List[Case]:
+    some_id = uuid.uuid4()
+    dept_cursor = encode_cursor(datetime(2024, 1, 1), some_id)
+    att_cursor = encode_cursor(date(2024, 1, 1), some_id)
+    # This month is always partitioned, so pruning is checked against a real partition.
+    first = month_start(date.today())
+    last = add_months(first, 1) - timedelta(days=1)
+
+    departments = select(*DEPARTMENT_ROWS.columns).where(Department.is_deleted == False)
+    employees = select(*EMPLOYEE_ROWS.columns)
+    attendance = select(*ATTENDANCE_ROWS.columns)
+    leave = select(*LEAVE_ROWS.columns)
+
+    def dept_page(q, cursor=None):
+        return page_query(q, Department.created_at, Department.id, cursor, descending=False)
+
+    def emp_page(q, cursor=None):
+        return page_query(q, Employee.created_at, Employee.id, cursor, descending=False)
+
+    def att_page(q, cursor=None):
+        return page_query(q, Attendance.attendance_date, Attendance.id, cursor)
+
+    def leave_page(q, cursor=None):
+        return page_query(q, LeaveRequest.created_at, LeaveRequest.id, cursor)
+
+    return [
+        Case("departments", dept_page(departments), "idx_departments_live_created"),
+        Case("departments ?cursor", dept_page(departments, dept_cursor), "idx_departments_live_created"),
+        Case("department by id", select(Department).where(Department.id == some_id, Department.is_deleted == False),
+             "departments_pkey", ordered=False),
+        Case("employees", emp_page(filter_employees(employees, None, False, None)), "idx_employees_live_created"),
+        Case("employees ?cursor", emp_page(filter_employees(employees, None, False, None), dept_cursor),
+             "idx_employees_live_created"),
+        Case("employees ?department_id", emp_page(filter_employees(employees, some_id, False, None)),
+             "idx_employees_live_department"),
+        Case("employees ?department_id&is_active", emp_page(filter_employees(employees, some_id, False, True)),
+             "idx_employees_live_department"),
+        Case("employees ?department_id&include_subdepartments",
+             emp_page(filter_employees(employees, some_id, True, None)),
+             "idx_employees_live_department", ordered=False),
+        Case("attendance", att_page(filter_attendance(attendance, None, None, None)), "idx_attendance_live_date"),
+        Case("attendance ?cursor", att_page(filter_attendance(attendance, None, None, None), att_cursor),
+             "idx_attendance_live_date"),
+        Case("attendance ?start_date&end_date",
+             att_page(filter_attendance(attendance, None, first, last)),
+             "idx_attendance_live_date", months=(first, first)),
+        Case("attendance ?employee_id", att_page(filter_attendance(attendance, some_id, None, None)),
+             "idx_attendance_live_employee_date"),
+        Case("attendance ?employee_id&start_date&end_date",
+             att_page(filter_attendance(attendance, some_id, first, last)),
+             "idx_attendance_live_employee_date", months=(first, first)),
+        Case("leave-requests", leave_page(filter_leave_requests(leave, None, None)), "idx_leave_live_created"),
+        Case("leave-requests ?status", leave_page(filter_leave_requests(leave, None, "pending")),
+             "idx_leave_live_status_created"),
+        Case("leave-requests ?employee_id", leave_page(filter_leave_requests(leave, some_id, None)),
+             "idx_leave_live_employee_created"),
+        Case("leave-requests/calendar",
+             select(LeaveRequest).where(
+                 LeaveRequest.period.overlaps(func.daterange(date(2024, 1, 1), date(2024, 1, 31), "[]")),
+                 LeaveRequest.status.in_(["pending", "approved"]),
+                 LeaveRequest.is_deleted == False,
+             ).order_by(LeaveRequest.start_date, LeaveRequest.employee_id),
+             "idx_leave_period", ordered=False),
+    ]
+
+
+def plan_nodes(node: dict) -> Iterator[dict]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def parent_indexes(conn) -> Dict[str, str]:
+    """Partition-local index name -> the partitioned index it belongs to."""
+    return dict(conn.exec_driver_sql(
+        "SELECT child.relname, parent.relname FROM pg_inherits i "
+        "JOIN pg_class child ON child.oid = i.inhrelid JOIN pg_class parent ON parent.oid = i.inhparent "
+        "WHERE child.relkind = 'i'"
+    ).all())
+
+
+def check(conn, case: Case, parents: Dict[str, str]) -> Optional[str]:
+    sql = str(case.stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + sql).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    nodes = list(plan_nodes(plan[0]["Plan"]))
+
+    seq_scans = [node["Relation Name"] for node in nodes if node["Node Type"] == "Seq Scan"]
+    if seq_scans:
+        return f"sequential scan on {', '.join(seq_scans)}"
+    used = {parents.get(node["Index Name"], node["Index Name"]) for node in nodes if "Index Name" in node}
+    if case.index not in used:
+        return f"expected {case.index}, plan uses {', '.join(sorted(used)) or 'no index'}"
+    if case.ordered and any(node["Node Type"] in ("Sort", "Incremental Sort") for node in nodes):
+        return f"{case.index} does not provide the page order (plan sorts)"
+    if case.months:
+        allowed, month = set(), case.months[0]
+        while month <= case.months[1]:
+            allowed.add(partition_name(month))
+            month = add_months(month, 1)
+        scanned = {
+            node["Relation Name"] for node in nodes
+            if node.get("Relation Name", "").startswith(PARENT_TABLE + "_")
+        }
+        if scanned - allowed:
+            return f"not pruned: also scans {', '.join(sorted(scanned - allowed))}"
+    return None
+
+
+@pytest.fixture(scope="module")
+def conn():
+    engine = create_engine(DATABASE_URL)
+    with engine.connect() as conn:
+        # Only for this transaction: make the planner prefer any usable index over a seq scan.
+        conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        yield conn
+        conn.rollback()
+    engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def parents(conn) -> Dict[str, str]:
+    return parent_indexes(conn)
+
+
+@pytest.mark.parametrize("case", cases(), ids=lambda case: case.name)
+def test_query_uses_its_index(conn, parents, case: Case):
+    problem = check(conn, case, parents)
+    assert problem is None, f"{case.name}: {problem}"
@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException, Response
+
+from app.core.cache import ResponseCache
+from tests.fakes import FakeAsyncRedis, Store
+
+
+def make_cache(store: Store = None) -> ResponseCache:
+    """A cache over ``store`` (one fake Redis server per store), or L1 only without one."""
+    cache = ResponseCache("test", maxsize=100, ttl=60, local_ttl=60)
+    cache.LOCK_POLL_INTERVAL = 0.001
+    if store is not None:
+        cache._redis = FakeAsyncRedis(store)
+        cache._release_script = cache._redis.register_script(ResponseCache._RELEASE_SCRIPT)
+    return cache
+
+
+class Loader:
+    """Counts its calls; each returns a fresh body after yielding to the event loop."""
+
+    def __init__(self, delay: float = 0.01, fail: int = 0):
+        self.calls = 0
+        self.delay = delay
+        self.fail = fail
+
+    async def __call__(self) -> Response:
+        self.calls += 1
+        call = self.calls
+        await asyncio.sleep(self.delay)
+        if call <= self.fail:
+            raise HTTPException(404, "Department not found")
+        return Response(content=f"body {call}", headers={"etag": f'"{call}"'})
+
+
+async def bodies(cache: ResponseCache, load: Loader, n: int = 1) -> list:
+    responses = await asyncio.gather(*(cache.respond("k", load) for _ in range(n)))
+    return [r.body for r in responses]
+
+
+@pytest.mark.parametrize("with_redis", [False, True])
+def test_concurrent_misses_share_one_load(with_redis):
+    cache = make_cache(Store() if with_redis else None)
+    load = Loader()
+    assert asyncio.run(bodies(cache, load, 10)) == [b"body 1"] * 10
+    assert load.calls == 1
+    assert cache.stats()["coalesced"] == 9
+
+
+def test_workers_share_one_load_through_the_redis_lock():
+    store = Store()
+    first, second = make_cache(store), make_cache(store)
+    load = Loader(delay=0.05)
+
+    async def both():
+        return await asyncio.gather(first.respond("k", load), second.respond("k", load))
+
+    assert [r.body for r in asyncio.run(both())] == [b"body 1", b"body 1"]
+    assert load.calls == 1
+    assert not store.exists(b"cache:test:0:k:lock")
+
+
+def test_local_and_redis_hits():
+    store = Store()
+    first, second = make_cache(store), make_cache(store)
+    load = Loader()
+    asyncio.run(bodies(first, load))
+    asyncio.run(bodies(first, load))
+    assert asyncio.run(bodies(second, load)) == [b"body 1"]
+    assert load.calls == 1
+    assert first.stats()["local_hits"] == 1
+    assert second.stats()["redis_hits"] == 1
+
+
+def test_invalidate_drops_both_tiers():
+    store = Store()
+    writer, reader = make_cache(store), make_cache(store)
+    load = Loader()
+    asyncio.run(bodies(writer, load))
+    asyncio.run(writer.invalidate())
+    assert store.get(b"cache:test:gen") == b"1"
+    assert asyncio.run(bodies(writer, load)) == [b"body 2"]
+    # Another worker with an empty L1 looks under the new generation too.
+    assert asyncio.run(bodies(reader, load)) == [b"body 2"]
+    assert load.calls == 2
+
+
+def test_load_running_during_invalidate_is_not_served_after_it():
+    cache = make_cache()
+    load = Loader(delay=0.05)
+
+    async def scenario():
+        stale = asyncio.create_task(cache.respond("k", load))
+        await asyncio.sleep(0.01)
+        await cache.invalidate()
+        fresh = await cache.respond("k", load)
+        return (await stale).body, fresh.body
+
+    assert asyncio.run(scenario()) == (b"body 1", b"body 2")
+    assert asyncio.run(bodies(cache, load)) == [b"body 2"]
+
+
+@pytest.mark.parametrize("with_redis", [False, True])
+def test_load_errors_are_not_cached(with_redis):
+    store = Store() if with_redis else None
+    cache = make_cache(store)
+    load = Loader(fail=1)
+
+    async def scenario():
+        results = await asyncio.gather(*(cache.respond("k", load) for _ in range(3)), return_exceptions=True)
+        return results, await cache.respond("k", load)
+
+    results, retry = asyncio.run(scenario())
+    assert all(isinstance(r, HTTPException) and r.status_code == 404 for r in results)
+    assert retry.body == b"body 2"
+    if with_redis:
+        assert not store.exists(b"cache:test:0:k:lock")
+
+
+def test_expired_lock_taken_by_another_worker_is_left_alone():
+    store = Store()
+    cache = make_cache(store)
+    lock_key = b"cache:test:0:k:lock"
+
+    async def slow_load():
+        # Our lock times out mid-load and another worker takes it.
+        store.delete(lock_key)
+        store.set(lock_key, "other-worker", nx=True, px=5000)
+        return Response(content="body")
+
+    assert asyncio.run(cache.respond("k", slow_load)).body == b"body"
+    assert store.get(lock_key) == b"other-worker"
+
+
+def test_if_none_match_gets_304_from_the_cached_etag():
+    cache = make_cache(Store())
+    load = Loader()
+    asyncio.run(bodies(cache, load))
+    assert asyncio.run(cache.respond("k", load, '"1"')).status_code == 304
+    assert asyncio.run(cache.respond("k", load, '"2"')).status_code == 200
@@ -0,0 +1,28 @@
+import uuid
+
+from app.core.revocation import BloomFilter
+
+
+def test_no_false_negatives():
+    bloom = BloomFilter(capacity=1_000, error_rate=0.01)
+    items = [uuid.uuid4().hex for _ in range(1_000)]
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+    assert bloom.count == len(items)
+
+
+def test_false_positive_rate_at_capacity():
+    bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+    for _ in range(10_000):
+        bloom.add(uuid.uuid4().hex)
+
+    false_positives = sum(uuid.uuid4().hex in bloom for _ in range(20_000))
+    assert false_positives / 20_000 < 0.02
+
+
+def test_sizing():
+    bloom = BloomFilter(capacity=100_000, error_rate=0.001)
+    assert bloom.hashes == 10
+    assert 1_400_000 < bloom.size < 1_500_000
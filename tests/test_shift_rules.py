@@ -0,0 +1,29 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app.services.shift_rules import ShiftPolicy
+
+POLICY = ShiftPolicy(standard_hours=Decimal("8"), break_minutes=60)
+
+
+@pytest.mark.parametrize("check_in, check_out, worked, overtime", [
+    (datetime(2024, 1, 1, 9), datetime(2024, 1, 1, 18), "8.00", "0.00"),
+    (datetime(2024, 1, 1, 9), datetime(2024, 1, 1, 20, 30), "10.50", "2.50"),
+    (datetime(2024, 1, 1, 9), datetime(2024, 1, 1, 9, 30), "0.00", "0.00"),  # shorter than the break
+    (datetime(2024, 1, 1, 9), datetime(2024, 1, 1, 17, 20), "7.33", "0.00"),
+    (datetime(2024, 1, 1, 22), datetime(2024, 1, 2, 7), "8.00", "0.00"),  # overnight shift
+])
+def test_compute(check_in, check_out, worked, overtime):
+    assert POLICY.compute(check_in, check_out) == (Decimal(worked), Decimal(overtime))
+
+
+@pytest.mark.parametrize("check_in, check_out", [
+    (None, datetime(2024, 1, 1, 18)),
+    (datetime(2024, 1, 1, 9), None),
+    (datetime(2024, 1, 1, 18), datetime(2024, 1, 1, 9)),
+    (datetime(2024, 1, 1, 9), datetime(2024, 1, 1, 9)),
+])
+def test_compute_without_a_valid_punch_pair(check_in, check_out):
+    assert POLICY.compute(check_in, check_out) == (None, None)